@@ -0,0 +1,76 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from domain_entity.exceptions import ServiceUnavailable
+
+
+class ConcurrencyLimiter:
+    """
+    Limita quantas requisições executam ao mesmo tempo, com uma fila de
+    espera limitada. Quando a fila está cheia (ou a espera passa de
+    queue_timeout) a requisição falha imediatamente com 503 + Retry-After
+    em vez de acumular trabalho de CPU.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float = 0,
+        retry_after: int = 1,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._active = 0
+        self._queued = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self._semaphore.locked():
+            await self._wait_in_queue()
+        else:
+            await self._semaphore.acquire()
+
+        self._active += 1
+        self._admitted += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._semaphore.release()
+
+    async def _wait_in_queue(self) -> None:
+        if self._queued >= self.max_queue:
+            self._rejected += 1
+            raise ServiceUnavailable(retry_after=self.retry_after)
+
+        self._queued += 1
+        try:
+            if self.queue_timeout > 0:
+                await asyncio.wait_for(
+                    self._semaphore.acquire(), self.queue_timeout
+                )
+            else:
+                await self._semaphore.acquire()
+        except TimeoutError as err:
+            self._rejected += 1
+            self._timed_out += 1
+            raise ServiceUnavailable(retry_after=self.retry_after) from err
+        finally:
+            self._queued -= 1
+
+    def stats(self) -> dict:
+        return {
+            'active': self._active,
+            'queued': self._queued,
+            'admitted': self._admitted,
+            'rejected': self._rejected,
+            'timed_out': self._timed_out,
+        }
@@ -6,14 +6,25 @@ from fastapi.security import OAuth2PasswordRequestForm
 from api_presentation.dependencies import (
     get_auth_service,
     get_current_user,
+    login_admission,
+    rate_limit,
 )
+from api_presentation.server_timing import TimedRoute
 from application_service.auth_service import AuthServiceProtocol
 from domain_entity.schemas import RefreshTokenRequest, Token, UserFromDBDTO
 
-auth_router = APIRouter()
+auth_router = APIRouter(
+    dependencies=[Depends(rate_limit('AUTH'))], route_class=TimedRoute
+)
 
 
-@auth_router.post('/auth-token', response_model=Token)
+# login_admission roda antes de get_auth_service: requisições na fila ou
+# rejeitadas não seguram conexão com o banco.
+@auth_router.post(
+    '/auth-token',
+    response_model=Token,
+    dependencies=[Depends(login_admission)],
+)
 async def auth_get_token(
     user_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     auth_service: Annotated[AuthServiceProtocol, Depends(get_auth_service)],
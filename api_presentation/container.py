@@ -0,0 +1,173 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api_presentation.admission import ConcurrencyLimiter
+from api_presentation.rate_limit import RateLimit
+from application_service import metrics
+from application_service.auth_service import (
+    AuthService,
+    BcryptHasher,
+    ExecutorHasher,
+)
+from application_service.cache import TTLCache
+from application_service.key_store import KeyStore
+from application_service.loop_monitor import LoopLagMonitor
+from application_service.maintenance import RevokedTokenPurger
+from application_service.revocation_index import RevocationIndex
+from application_service.scope_matcher import ScopeMatcher
+from application_service.scope_registry import ScopeRegistry
+from application_service.token_service import JWTLibHandler, JWTTokenService
+from application_service.user_import import UserImporter
+from infra_repository.crud import UserCRUD
+from infra_repository.db import DatabaseHandler
+from settings import Settings
+
+RATE_LIMIT_SCOPES = ('AUTH', 'USER')
+
+
+class ServiceContainer:
+    """
+    Objetos com o tempo de vida da aplicação. É criado uma vez no lifespan
+    e guardado em app.state; por requisição só a sessão do banco é nova.
+    """
+
+    def __init__(self, settings: Settings, db_handler: DatabaseHandler):
+        self.settings = settings
+        self.db_handler = db_handler
+        self.user_crud = UserCRUD()
+
+        metrics.instrument_engine(db_handler.engine, 'primary')
+        for index, replica in enumerate(db_handler.replicas):
+            metrics.instrument_engine(replica.engine, f'replica-{index}')
+
+        bcrypt_hasher = BcryptHasher(
+            context=CryptContext(schemes=['bcrypt'], deprecated='auto')
+        )
+        self.hasher = ExecutorHasher(
+            hasher=bcrypt_hasher,
+            executor=ThreadPoolExecutor(
+                max_workers=settings.HASHER_MAX_WORKERS,
+                thread_name_prefix='hasher',
+            ),
+        )
+
+        # Pool separado para a importação em massa não disputar threads
+        # com o login
+        self.import_hasher = ExecutorHasher(
+            hasher=bcrypt_hasher,
+            executor=ThreadPoolExecutor(
+                max_workers=settings.USER_IMPORT_HASHER_MAX_WORKERS,
+                thread_name_prefix='import-hasher',
+            ),
+        )
+        self.user_importer = UserImporter(
+            hasher=self.import_hasher,
+            user_crud=self.user_crud,
+            session_factory=db_handler.session_factory,
+            batch_size=settings.USER_IMPORT_BATCH_SIZE,
+        )
+
+        if settings.JWT_KEYS_DIR:
+            self.key_store = KeyStore.from_directory(
+                settings.JWT_KEYS_DIR, active_kid=settings.JWT_ACTIVE_KID
+            )
+        else:
+            self.key_store = KeyStore([])
+
+        self.decoded_token_cache = None
+        if settings.TOKEN_CACHE_TTL_SECONDS > 0:
+            self.decoded_token_cache = TTLCache(
+                max_size=settings.TOKEN_CACHE_MAX_SIZE,
+                ttl=settings.TOKEN_CACHE_TTL_SECONDS,
+            )
+        self.scope_matcher = ScopeMatcher(implies=settings.SCOPE_IMPLIES)
+        self.scope_registry = None
+        if settings.TOKEN_COMPACT_SCOPES:
+            self.scope_registry = ScopeRegistry()
+        self.token_service = JWTTokenService(
+            jwt_handler=JWTLibHandler(),
+            settings=settings,
+            key_store=self.key_store,
+            decoded_cache=self.decoded_token_cache,
+            scope_registry=self.scope_registry,
+        )
+
+        self.principal_cache = None
+        if settings.PRINCIPAL_CACHE_TTL_SECONDS > 0:
+            self.principal_cache = TTLCache(
+                max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+                ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+            )
+
+        self.revocation_index = RevocationIndex(
+            authoritative=settings.REVOCATION_INDEX_AUTHORITATIVE
+        )
+        self.revoked_token_purger = RevokedTokenPurger(
+            session_factory=db_handler.session_factory,
+            user_crud=self.user_crud,
+            batch_size=settings.REVOKED_TOKEN_PURGE_BATCH_SIZE,
+            revocation_index=self.revocation_index,
+        )
+
+        self.loop_monitor = LoopLagMonitor(
+            interval=settings.LOOP_LAG_INTERVAL_SECONDS,
+            window=settings.LOOP_LAG_WINDOW_SIZE,
+            block_threshold=settings.LOOP_BLOCK_THRESHOLD_SECONDS,
+        )
+
+        self.login_limiter = ConcurrencyLimiter(
+            max_concurrency=settings.LOGIN_MAX_CONCURRENCY,
+            max_queue=settings.LOGIN_MAX_QUEUE,
+            queue_timeout=settings.LOGIN_QUEUE_TIMEOUT_SECONDS,
+            retry_after=settings.LOGIN_RETRY_AFTER_SECONDS,
+        )
+        # scope: prefixo das configurações do router (AUTH, USER)
+        self.rate_limits = {
+            scope: RateLimit(
+                per_ip=getattr(settings, f'{scope}_RATE_LIMIT_PER_IP'),
+                per_username=getattr(
+                    settings, f'{scope}_RATE_LIMIT_PER_USERNAME'
+                ),
+                window_seconds=getattr(
+                    settings, f'{scope}_RATE_LIMIT_WINDOW_SECONDS'
+                ),
+                max_keys=settings.RATE_LIMIT_MAX_KEYS,
+            )
+            for scope in RATE_LIMIT_SCOPES
+        }
+
+    def auth_service(
+        self, db: AsyncSession, read_db: AsyncSession | None = None
+    ) -> AuthService:
+        return AuthService(
+            hasher=self.hasher,
+            user_crud=self.user_crud,
+            db=db,
+            read_db=read_db,
+            settings=self.settings,
+            token_service=self.token_service,
+            principal_cache=self.principal_cache,
+            revocation_index=self.revocation_index,
+            scope_registry=self.scope_registry,
+            scope_matcher=self.scope_matcher,
+        )
+
+    async def warm_revocation_index(self) -> int:
+        async with self.db_handler.session_factory() as session:
+            return await self.revocation_index.load(
+                user_crud=self.user_crud, async_transaction=session
+            )
+
+    async def warm_scope_registry(self) -> int:
+        if self.scope_registry is None:
+            return 0
+        async with self.db_handler.session_factory() as session:
+            return await self.scope_registry.load(
+                user_crud=self.user_crud, async_transaction=session
+            )
+
+    def close(self) -> None:
+        self.hasher.shutdown()
+        self.import_hasher.shutdown()
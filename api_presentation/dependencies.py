@@ -1,44 +1,63 @@
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Iterable, Iterator
 from typing import Annotated
 
-from fastapi import Depends
+from fastapi import Depends, Request
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
 from fastapi.security import OAuth2PasswordBearer, SecurityScopes
-from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api_presentation.admission import ConcurrencyLimiter
+from api_presentation.container import ServiceContainer
 from application_service.auth_service import (
-    AuthService,
+    AsyncHasherProtocol,
     AuthServiceProtocol,
-    BcryptHasher,
-    HasherProtocol,
-)
-from application_service.token_service import (
-    JWTLibHandler,
-    JWTTokenService,
-    TokenService,
 )
+from application_service.key_store import KeyStore
+from application_service.revocation_index import RevocationIndex
+from application_service.scope_registry import ScopeRegistry
+from application_service.token_service import TokenService
 from domain_entity.schemas import UserFromDBDTO
 from infra_repository.crud import UserCRUD
 from infra_repository.db import db_handler
 from settings import Settings
 
 _settings_singleton = None
-_crypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 oauth_scheme = OAuth2PasswordBearer(tokenUrl='/auth/auth-token')
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    A sessão só pega uma conexão do pool na primeira consulta (autobegin).
+    Sem o bloco session.begin() os serviços podem dar commit no meio da
+    requisição e devolver a conexão antes de trabalho lento; o que sobrar
+    é confirmado aqui. Em caso de erro o fechamento da sessão faz rollback.
+    """
     async for session in db_handler.get_db():
-        async with session.begin():
-            yield session
+        yield session
+        await session.commit()
 
 
-def get_bcrypt_hasher():
-    return BcryptHasher(context=_crypt_context)
+# Sessão de leitura e escrita no primário
+get_write_session = get_session
 
 
-def get_user_crud() -> UserCRUD:
-    return UserCRUD()
+async def get_read_session(
+    primary: Annotated[
+        AsyncSession, Depends(get_write_session, scope='function')
+    ]
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Sessão em uma réplica de leitura. Sem réplica saudável reaproveita a
+    sessão do primário da mesma requisição.
+    """
+    replica = db_handler.next_replica()
+    if replica is None:
+        yield primary
+        return
+    async with replica.session_factory() as session:
+        yield session
+        await session.commit()
 
 
 def get_settings() -> Settings:
@@ -48,27 +67,73 @@ def get_settings() -> Settings:
     return _settings_singleton
 
 
-def get_jwt_token_service() -> TokenService:
-    settings = Settings()
-    jwt_handler = JWTLibHandler()
-    return JWTTokenService(jwt_handler=jwt_handler, settings=settings)
+def get_container(request: Request) -> ServiceContainer:
+    container = getattr(request.app.state, 'container', None)
+    if container is None:
+        # Apps que não passaram pelo lifespan (ex.: TestClient sem with)
+        container = ServiceContainer(get_settings(), db_handler)
+        request.app.state.container = container
+    return container
+
+
+Container = Annotated[ServiceContainer, Depends(get_container)]
+
+
+def get_bcrypt_hasher(container: Container) -> AsyncHasherProtocol:
+    return container.hasher
+
+
+def get_user_crud(container: Container) -> UserCRUD:
+    return container.user_crud
+
+
+def get_jwt_token_service(container: Container) -> TokenService:
+    return container.token_service
+
+
+def get_key_store(container: Container) -> KeyStore:
+    return container.key_store
+
 
+def get_revocation_index(container: Container) -> RevocationIndex:
+    return container.revocation_index
 
+
+def get_scope_registry(container: Container) -> ScopeRegistry | None:
+    return container.scope_registry
+
+
+def get_login_limiter(container: Container) -> ConcurrencyLimiter:
+    return container.login_limiter
+
+
+async def login_admission(
+    limiter: Annotated[ConcurrencyLimiter, Depends(get_login_limiter)]
+) -> AsyncGenerator[None, None]:
+    async with limiter.slot():
+        yield
+
+
+def rate_limit(scope: str):
+    async def rate_limit_checker(
+        request: Request, container: Container
+    ) -> None:
+        await container.rate_limits[scope].check(request)
+
+    return rate_limit_checker
+
+
+# scope='function': commit e devolução da conexão acontecem quando o
+# handler retorna, antes de serializar e enviar a resposta
 def get_auth_service(
-    hasher: Annotated[HasherProtocol, Depends(get_bcrypt_hasher)],
-    user_crud: Annotated[UserCRUD, Depends(get_user_crud)],
-    db: Annotated[AsyncSession, Depends(get_session)],
-    settings: Annotated[Settings, Depends(get_settings)],
-    token_service: Annotated[TokenService, Depends(get_jwt_token_service)],
+    db: Annotated[AsyncSession, Depends(get_write_session, scope='function')],
+    read_db: Annotated[
+        AsyncSession, Depends(get_read_session, scope='function')
+    ],
+    container: Container,
 ) -> AuthServiceProtocol:
 
-    return AuthService(
-        hasher=hasher,
-        user_crud=user_crud,
-        db=db,
-        settings=settings,
-        token_service=token_service,
-    )
+    return container.auth_service(db, read_db)
 
 
 async def get_current_user(
@@ -80,6 +145,36 @@ async def get_current_user(
     return await auth_service.get_current_active_user(token, security_scopes)
 
 
+def _api_routes(routes: Iterable) -> Iterator[APIRoute]:
+    for route in routes:
+        if isinstance(route, APIRoute):
+            yield route
+        elif getattr(route, 'original_router', None) is not None:
+            # include_router guarda o router original
+            yield from _api_routes(route.original_router.routes)
+        elif hasattr(route, 'routes'):
+            yield from _api_routes(route.routes)
+
+
+def _security_dependants(dependant: Dependant) -> Iterator[Dependant]:
+    if dependant.security_scopes_param_name:
+        yield dependant
+    for sub_dependant in dependant.dependencies:
+        yield from _security_dependants(sub_dependant)
+
+
+def route_scope_requirements(routes: Iterable) -> set[tuple[str, ...]]:
+    """Escopos pedidos com Security(..., scopes=[...]) em cada rota."""
+    return {
+        tuple(
+            (dependant.parent_oauth_scopes or [])
+            + (dependant.own_oauth_scopes or [])
+        )
+        for route in _api_routes(routes)
+        for dependant in _security_dependants(route.dependant)
+    }
+
+
 def has_permissions(required_permission: str):
     async def permission_checker(
         current_user: Annotated[dict, Depends(get_current_user)]
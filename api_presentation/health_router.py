@@ -0,0 +1,35 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import SQLAlchemyError
+
+from api_presentation.dependencies import Container
+
+health_router = APIRouter()
+
+
+@health_router.get('/db')
+async def health_db(container: Container):
+    db_handler = container.db_handler
+    try:
+        await db_handler.ping()
+    except (SQLAlchemyError, OSError):
+        return JSONResponse(
+            status_code=503,
+            content={
+                'status': 'unavailable',
+                'pool': db_handler.pool_status(),
+            },
+        )
+
+    # pool.acquire_wait: espera dos checkouts das requisições (fora do
+    # SQLite); o ping acima também conta
+    return {'status': 'ok', 'pool': db_handler.pool_status()}
+
+
+@health_router.get('/loop')
+async def health_loop(container: Container):
+    loop_monitor = container.loop_monitor
+    return {
+        'lag': loop_monitor.stats(),
+        'recent_blocks': list(loop_monitor.reports),
+    }
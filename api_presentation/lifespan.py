@@ -1,19 +1,67 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 
+from api_presentation.container import ServiceContainer
+from api_presentation.dependencies import (
+    get_settings,
+    route_scope_requirements,
+)
 from domain_entity.models import Base
 from infra_repository.db import db_handler
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Serviços com o tempo de vida da aplicação
+    settings = get_settings()
+    container = ServiceContainer(settings, db_handler)
+    app.state.container = container
+
     # Cria tabelas (se necessário) usando a engine diretamente
 
     # 2) veja qual DB está usando (debug)
     print('↪ DATABASE URL:', db_handler.engine.url)
-    async with db_handler.engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if settings.DB_RUN_MIGRATIONS:
+        await db_handler.run_migrations()
+    else:
+        async with db_handler.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    # Carrega os refresh tokens revogados ainda válidos para a memória
+    revoked = await container.warm_revocation_index()
+    print('↪ Refresh tokens revogados carregados:', revoked)
+
+    # Requisitos de escopo das rotas compilados antes da primeira requisição
+    compiled = container.scope_matcher.warm(
+        route_scope_requirements(app.routes)
+    )
+    print('↪ Requisitos de escopo compilados:', compiled)
+
+    # Registro id -> scope da claim compacta (TOKEN_COMPACT_SCOPES)
+    if settings.TOKEN_COMPACT_SCOPES:
+        scopes = await container.warm_scope_registry()
+        print('↪ Escopos no registro:', scopes)
+
+    # Purge periódico dos refresh tokens revogados já expirados
+    purge_task = None
+    purge_interval = settings.REVOKED_TOKEN_PURGE_INTERVAL_SECONDS
+    if purge_interval > 0:
+        purge_task = asyncio.create_task(
+            container.revoked_token_purger.run(purge_interval)
+        )
+
+    # Amostragem do atraso do event loop (e watchdog de bloqueios)
+    loop_monitor_task = None
+    if settings.LOOP_LAG_INTERVAL_SECONDS > 0:
+        loop_monitor_task = asyncio.create_task(container.loop_monitor.run())
     yield
-    # Encerra o pool de conexões ao final
-    await db_handler.engine.dispose()
+    for task in (purge_task, loop_monitor_task):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    # Encerra o pool de conexões e o pool de hashing ao final
+    await db_handler.dispose()
+    container.close()
@@ -0,0 +1,66 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from application_service import metrics
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Template completo da rota (/users/{id}). Dependendo da versão do
+    FastAPI, scope['route'] guarda a rota sem o prefixo do include_router;
+    o prefixo é recuperado dos segmentos iniciais do caminho requisitado.
+    """
+    route = scope.get('route')
+    template = getattr(route, 'path', None)
+    if template is None:
+        return UNMATCHED_ROUTE
+
+    path = scope['path'].removeprefix(scope.get('root_path', ''))
+    segments = path.split('/')
+    prefix_size = len(segments) - template.count('/') - 1
+    if prefix_size <= 0:
+        return template
+    return '/'.join(segments[: prefix_size + 1]) + template
+
+
+class MetricsMiddleware:
+    """
+    Contagem e latência por rota. Middleware ASGI puro (sem
+    BaseHTTPMiddleware) para não criar tarefas nem filas por requisição.
+
+    O label de rota é o template (/users/{id}), lido de scope['route']
+    depois do roteamento; caminhos sem rota viram 'unmatched' para manter
+    a cardinalidade limitada.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route_path = route_template(scope)
+            method = scope['method']
+            metrics.HTTP_REQUEST_SECONDS.labels(method, route_path).observe(
+                time.perf_counter() - started
+            )
+            metrics.HTTP_REQUESTS.labels(
+                method, route_path, str(status_code)
+            ).inc()
@@ -0,0 +1,97 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from api_presentation.dependencies import Container
+from application_service import metrics
+
+metrics_router = APIRouter()
+
+POOL_STATES = ('checked_out', 'idle', 'overflow')
+HASHER_STATES = ('queued', 'running')
+LOOP_LAG_STATS = ('p50', 'p90', 'p99', 'window_max')
+ADMISSION_STATES = ('active', 'queued')
+ADMISSION_OUTCOMES = ('admitted', 'rejected', 'timed_out')
+CACHE_RESULTS = (('hit', 'hits'), ('miss', 'misses'))
+RATE_LIMIT_DECISIONS = ('allowed', 'limited')
+
+
+def _update_cache(name: str, cache) -> None:
+    # Cache desativado (TTL 0) fica fora da exposição
+    if cache is None:
+        return
+    stats = cache.stats()
+    metrics.CACHE_ENTRIES.labels(name).set(stats['size'])
+    for result, key in CACHE_RESULTS:
+        metrics.CACHE_LOOKUPS.labels(name, result).set(stats[key])
+
+
+def _update_pool(database: str, pool: dict) -> None:
+    for state in POOL_STATES:
+        if state in pool:
+            metrics.DB_POOL_CONNECTIONS.labels(database, state).set(
+                pool[state]
+            )
+
+
+def _update_rate_limit(scope: str, rate_limit) -> None:
+    for key, stats in rate_limit.stats().items():
+        # Limite 0 desativa aquela chave
+        if stats is None:
+            continue
+        metrics.RATE_LIMIT_KEYS.labels(scope, key).set(stats['keys'])
+        for decision in RATE_LIMIT_DECISIONS:
+            metrics.RATE_LIMIT_DECISIONS.labels(scope, key, decision).set(
+                stats[decision]
+            )
+        metrics.RATE_LIMIT_EVICTIONS.labels(scope, key).set(stats['evicted'])
+
+
+def update_gauges(container) -> None:
+    """
+    Lê o estado atual no momento da coleta. Os contadores mantidos pelos
+    próprios componentes (limitadores, caches, purge) são copiados aqui.
+    """
+    _update_pool('primary', container.db_handler.pool_status())
+    for index, replica in enumerate(container.db_handler.replicas):
+        _update_pool(f'replica-{index}', replica.pool_status())
+
+    for pool_name, hasher in (
+        ('login', container.hasher),
+        ('import', container.import_hasher),
+    ):
+        stats = hasher.stats()
+        for state in HASHER_STATES:
+            metrics.HASHER_TASKS.labels(pool_name, state).set(stats[state])
+
+    admission = container.login_limiter.stats()
+    for state in ADMISSION_STATES:
+        metrics.LOGIN_ADMISSION_REQUESTS.labels(state).set(admission[state])
+    for outcome in ADMISSION_OUTCOMES:
+        metrics.LOGIN_ADMISSION.labels(outcome).set(admission[outcome])
+
+    _update_cache('principal', container.principal_cache)
+    _update_cache('decoded_token', container.decoded_token_cache)
+
+    for scope, rate_limit in container.rate_limits.items():
+        _update_rate_limit(scope, rate_limit)
+
+    purge = container.revoked_token_purger.stats()
+    metrics.REVOKED_TOKEN_PURGE_RUNS.labels().set(purge['runs'])
+    metrics.REVOKED_TOKEN_PURGE_ROWS.labels().set(purge['rows_purged_total'])
+    metrics.REVOKED_TOKEN_PURGE_LAST_SECONDS.labels().set(
+        purge['last_duration_seconds']
+    )
+
+    loop_stats = container.loop_monitor.stats()
+    for stat in LOOP_LAG_STATS:
+        metrics.EVENT_LOOP_LAG_WINDOW.labels(stat).set(
+            loop_stats[f'{stat}_seconds']
+        )
+
+
+@metrics_router.get('/metrics', response_class=PlainTextResponse)
+async def get_metrics(container: Container):
+    update_gauges(container)
+    return PlainTextResponse(
+        metrics.registry.render(), media_type=metrics.CONTENT_TYPE
+    )
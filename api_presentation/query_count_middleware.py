@@ -0,0 +1,59 @@
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api_presentation.metrics_middleware import route_template
+from application_service import query_counter
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = 'X-DB-Query-Count'
+QUERY_TIME_HEADER = 'X-DB-Query-Time-Ms'
+
+
+class QueryCountMiddleware:
+    """
+    Conta as consultas de cada requisição. Com `emit_headers` a contagem e
+    o tempo no banco vão nos headers X-DB-Query-*; eles refletem as
+    consultas feitas até o início da resposta (o commit da sessão roda
+    depois). Requisições acima de `warn_threshold` consultas geram um
+    warning com o total; 0 desativa o aviso.
+    """
+
+    def __init__(
+        self, app: ASGIApp, emit_headers: bool = False, warn_threshold: int = 0
+    ):
+        self.app = app
+        query_counter.install()
+        self.emit_headers = emit_headers
+        self.warn_threshold = warn_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        with query_counter.track_queries() as stats:
+
+            async def send_wrapper(message: Message) -> None:
+                if (
+                    self.emit_headers
+                    and message['type'] == 'http.response.start'
+                ):
+                    headers = MutableHeaders(scope=message)
+                    headers[QUERY_COUNT_HEADER] = str(stats.count)
+                    headers[QUERY_TIME_HEADER] = f'{stats.duration * 1000:.3f}'
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if self.warn_threshold and stats.count > self.warn_threshold:
+                    logger.warning(
+                        '%s %s executou %d consultas (%.1f ms no banco)',
+                        scope['method'],
+                        route_template(scope),
+                        stats.count,
+                        stats.duration * 1000,
+                    )
@@ -0,0 +1,161 @@
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from fastapi import Request
+
+from domain_entity.exceptions import TooManyRequests
+
+_FORM_CONTENT_TYPES = (
+    'application/x-www-form-urlencoded',
+    'multipart/form-data',
+)
+
+
+class SlidingWindowLimiter:
+    """
+    Contador de janela deslizante aproximada: para cada chave guarda apenas
+    a contagem da janela atual e da anterior, e estima a taxa ponderando a
+    janela anterior pela fração que ainda se sobrepõe. Custo O(1) por hit.
+
+    As chaves ficam em um OrderedDict usado como LRU; ao passar de max_keys
+    a chave menos usada recentemente é descartada.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        window_seconds: float,
+        max_keys: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self.clock = clock
+        # chave -> [índice da janela, contagem anterior, contagem atual]
+        self._counters: OrderedDict[str, list] = OrderedDict()
+        self._allowed = 0
+        self._limited = 0
+        self._evicted = 0
+
+    def hit(self, key: str) -> float:
+        """
+        Registra um hit para a chave. Retorna 0 se permitido ou, se o limite
+        foi atingido, quantos segundos esperar antes de tentar novamente.
+        """
+        now = self.clock()
+        window = int(now // self.window_seconds)
+        elapsed = (now % self.window_seconds) / self.window_seconds
+
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = [window, 0, 0]
+            self._counters[key] = counter
+            if len(self._counters) > self.max_keys:
+                self._counters.popitem(last=False)
+                self._evicted += 1
+        else:
+            self._counters.move_to_end(key)
+            if counter[0] != window:
+                previous = counter[2] if counter[0] == window - 1 else 0
+                counter[:] = [window, previous, 0]
+
+        estimated = counter[1] * (1 - elapsed) + counter[2]
+        if estimated >= self.limit:
+            self._limited += 1
+            return self._retry_after(counter[1], counter[2], elapsed)
+
+        counter[2] += 1
+        self._allowed += 1
+        return 0.0
+
+    def _retry_after(
+        self, previous: int, current: int, elapsed: float
+    ) -> float:
+        # Tempo até o peso da janela anterior cair o suficiente; se só a
+        # janela atual já estoura o limite, espera a próxima janela.
+        if previous and current < self.limit:
+            needed = 1 - (self.limit - current) / previous
+            return max(needed - elapsed, 0.0) * self.window_seconds or 1.0
+        return (1 - elapsed) * self.window_seconds
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def stats(self) -> dict:
+        return {
+            'keys': len(self._counters),
+            'allowed': self._allowed,
+            'limited': self._limited,
+            'evicted': self._evicted,
+        }
+
+
+class RateLimit:
+    """
+    Aplica limites por IP do cliente e por username enviado no corpo
+    (form ou JSON). Um limite igual a 0 desativa aquela chave.
+    """
+
+    def __init__(
+        self,
+        per_ip: int,
+        per_username: int,
+        window_seconds: float,
+        max_keys: int = 100_000,
+    ):
+        self.by_ip = (
+            SlidingWindowLimiter(per_ip, window_seconds, max_keys)
+            if per_ip
+            else None
+        )
+        self.by_username = (
+            SlidingWindowLimiter(per_username, window_seconds, max_keys)
+            if per_username
+            else None
+        )
+
+    async def check(self, request: Request) -> None:
+        if self.by_ip is not None:
+            host = request.client.host if request.client else 'unknown'
+            self._raise_if_limited(self.by_ip.hit(host))
+
+        if self.by_username is not None:
+            username = await submitted_username(request)
+            if username:
+                self._raise_if_limited(self.by_username.hit(username))
+
+    @staticmethod
+    def _raise_if_limited(retry_after: float) -> None:
+        if retry_after:
+            raise TooManyRequests(retry_after=math.ceil(retry_after))
+
+    def stats(self) -> dict:
+        return {
+            'ip': self.by_ip.stats() if self.by_ip else None,
+            'username': (
+                self.by_username.stats() if self.by_username else None
+            ),
+        }
+
+
+async def submitted_username(request: Request) -> str | None:
+    # O Starlette guarda o corpo já lido no Request, então a rota não
+    # precisa ler o body novamente.
+    content_type = request.headers.get('content-type', '')
+    if content_type.startswith(_FORM_CONTENT_TYPES):
+        value = (await request.form()).get('username')
+    elif content_type.startswith('application/json'):
+        try:
+            body = await request.json()
+        except ValueError:
+            return None
+        value = body.get('username') if isinstance(body, dict) else None
+    else:
+        return None
+
+    if isinstance(value, str) and value:
+        return value.lower()
+    return None
@@ -3,10 +3,11 @@ from typing import Annotated
 from fastapi import APIRouter, Depends
 
 from api_presentation.dependencies import get_auth_service
+from api_presentation.server_timing import TimedRoute
 from application_service.auth_service import AuthServiceProtocol
 from domain_entity.schemas import CreateRoleDTO
 
-role_router = APIRouter()
+role_router = APIRouter(route_class=TimedRoute)
 
 
 @role_router.post('/roles')
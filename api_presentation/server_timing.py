@@ -0,0 +1,117 @@
+import functools
+import hmac
+import inspect
+import time
+from collections.abc import Callable
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from application_service import phase_timer, query_counter
+
+SERVER_TIMING_REQUEST_HEADER = 'X-Server-Timing'
+
+
+def format_server_timing(
+    timer: phase_timer.PhaseTimer, db_stats: query_counter.QueryStats
+) -> str:
+    """hash;dur=12.5, jwt;dur=0.3, db;dur=2.1;desc="4 queries", ..."""
+    entries = [
+        f'{name};dur={elapsed * 1000:.3f}'
+        for name, elapsed in timer.phases.items()
+    ]
+    entries.append(
+        f'db;dur={db_stats.duration * 1000:.3f};'
+        f'desc="{db_stats.count} queries"'
+    )
+    entries.append(f'total;dur={timer.elapsed() * 1000:.3f}')
+    return ', '.join(entries)
+
+
+class ServerTimingMiddleware:
+    """
+    Header Server-Timing com o tempo de cada fase da requisição. Ligado
+    para todas as requisições com `always`, ou só para as que enviam
+    X-Server-Timing com o valor de `token` (token vazio desliga essa
+    opção). Desligado, o custo é a leitura de um header.
+    """
+
+    def __init__(self, app: ASGIApp, always: bool = False, token: str = ''):
+        self.app = app
+        query_counter.install()
+        self.always = always
+        self.token = token.encode()
+
+    def _enabled(self, scope: Scope) -> bool:
+        if self.always:
+            return True
+        if not self.token:
+            return False
+        requested = Headers(scope=scope).get(SERVER_TIMING_REQUEST_HEADER)
+        return requested is not None and hmac.compare_digest(
+            requested.encode(), self.token
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or not self._enabled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        with phase_timer.timing() as timer, query_counter.track_queries() as (
+            db_stats
+        ):
+
+            async def send_wrapper(message: Message) -> None:
+                if message['type'] == 'http.response.start':
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        'Server-Timing', format_server_timing(timer, db_stats)
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute que marca o fim da função da rota; o tempo até a Response
+    ficar pronta (validação do response_model e serialização) vira a fase
+    'serialize' do Server-Timing.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs):
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = self._mark_finished(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    @staticmethod
+    def _mark_finished(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+        # functools.wraps mantém a assinatura que o FastAPI inspeciona
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                timer = phase_timer.current()
+                if timer is not None:
+                    timer.endpoint_finished_at = time.perf_counter()
+
+        return wrapper
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            response = await handler(request)
+            timer = phase_timer.current()
+            if timer is not None and timer.endpoint_finished_at is not None:
+                timer.record(
+                    'serialize',
+                    time.perf_counter() - timer.endpoint_finished_at,
+                )
+            return response
+
+        return timed_handler
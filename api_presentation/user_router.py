@@ -1,22 +1,35 @@
+import json
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Security
+from fastapi import APIRouter, Depends, Query, Request, Response, Security
+from fastapi.responses import StreamingResponse
 
 from api_presentation.dependencies import (
+    Container,
     get_auth_service,
     get_current_user,
     oauth_scheme,
+    rate_limit,
 )
+from api_presentation.server_timing import TimedRoute
 from application_service.auth_service import AuthServiceProtocol
+from application_service.user_import import parse_csv, parse_ndjson
 from domain_entity.schemas import (
     UserCreateDTO,
     UserFromDBDTO,
 )
 
-user_router = APIRouter()
+user_router = APIRouter(route_class=TimedRoute)
 
 
-@user_router.post('/create-user', response_model=UserFromDBDTO)
+# Só o cadastro é limitado: nas demais rotas o limite por IP valeria para
+# todos os clientes atrás de um proxy, e a leitura do corpo para achar o
+# username bufferizaria o upload do /import antes da checagem de escopo
+@user_router.post(
+    '/create-user',
+    response_model=UserFromDBDTO,
+    dependencies=[Depends(rate_limit('USER'))],
+)
 async def auth_route_create_user(
     user_data: UserCreateDTO,
     auth_service: Annotated[AuthServiceProtocol, Depends(get_auth_service)],
@@ -32,12 +45,78 @@ async def get_me(
     return await auth_service.get_users_me(token)
 
 
-@user_router.get('/get_users')
+@user_router.get('/get_users', response_model=list[UserFromDBDTO])
 async def get_users(
+    response: Response,
     auth_service: Annotated[AuthServiceProtocol, Depends(get_auth_service)],
     current_user: Annotated[
         UserFromDBDTO, Security(get_current_user, scopes=['users:view'])
     ],
+    container: Container,
+    after_id: Annotated[int | None, Query(ge=0)] = None,
+    limit: Annotated[int | None, Query(ge=1)] = None,
+    stream: bool = False,
 ):
+    """
+    Página de usuários em ordem de id. `after_id` é o cursor: o valor do
+    header X-Next-Cursor da página anterior. Com stream=true retorna
+    NDJSON de todos os usuários após o cursor (ou até `limit`).
+    """
+    if stream:
+        read_session_factory = container.db_handler.read_session_factory()
+
+        # A sessão da requisição já fechou quando o corpo é gerado:
+        # o stream abre a sua própria
+        async def body():
+            async with read_session_factory() as session:
+                service = container.auth_service(session)
+                async for user in service.stream_users(after_id, limit):
+                    yield user.model_dump_json() + '\n'
+
+        return StreamingResponse(body(), media_type='application/x-ndjson')
+
+    settings = container.settings
+    page_size = min(
+        limit or settings.USERS_PAGE_SIZE, settings.USERS_MAX_PAGE_SIZE
+    )
+    users = await auth_service.get_users(after_id=after_id, limit=page_size)
+    if len(users) == page_size:
+        response.headers['X-Next-Cursor'] = str(users[-1].id)
+    return users
+
+
+class _ImportStreamingResponse(StreamingResponse):
+    """
+    O resultado é enviado enquanto o corpo da requisição ainda está sendo
+    lido. O StreamingResponse padrão escuta o receive em paralelo à espera
+    de desconexão (servidores ASGI < 2.4) e consumiria pedaços do corpo;
+    aqui a desconexão chega pelo próprio request.stream().
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+@user_router.post('/import')
+async def import_users(
+    request: Request,
+    container: Container,
+    current_user: Annotated[
+        UserFromDBDTO, Security(get_current_user, scopes=['users:write'])
+    ],
+):
+    """
+    Importa usuários de um corpo NDJSON (padrão) ou CSV (Content-Type
+    text/csv) e retorna um resultado NDJSON por linha.
+    """
+    content_type = request.headers.get('content-type', '')
+    parser = parse_csv if content_type.startswith('text/csv') else parse_ndjson
+    results = container.user_importer.run(parser(request.stream()))
+
+    async def body():
+        async for result in results:
+            yield json.dumps(result, ensure_ascii=False) + '\n'
 
-    return await auth_service.get_users()
+    return _ImportStreamingResponse(body(), media_type='application/x-ndjson')
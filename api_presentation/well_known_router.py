@@ -0,0 +1,66 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Request, Response
+
+from api_presentation.dependencies import (
+    get_key_store,
+    get_scope_registry,
+    get_settings,
+)
+from application_service.key_store import KeyStore
+from application_service.scope_registry import ScopeRegistry
+from domain_entity.exceptions import NotFound
+from settings import Settings
+
+well_known_router = APIRouter()
+
+
+def _cached_document(
+    request: Request, content: bytes, etag: str, max_age: int
+) -> Response:
+    headers = {
+        'Cache-Control': f'public, max-age={max_age}',
+        'ETag': etag,
+    }
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304, headers=headers)
+
+    return Response(
+        content=content,
+        media_type='application/json',
+        headers=headers,
+    )
+
+
+@well_known_router.get('/jwks.json')
+async def get_jwks(
+    request: Request,
+    key_store: Annotated[KeyStore, Depends(get_key_store)],
+    settings: Annotated[Settings, Depends(get_settings)],
+):
+    return _cached_document(
+        request,
+        key_store.jwks_json,
+        key_store.etag,
+        settings.JWKS_CACHE_MAX_AGE_SECONDS,
+    )
+
+
+@well_known_router.get('/scopes.json')
+async def get_scope_registry_document(
+    request: Request,
+    scope_registry: Annotated[
+        ScopeRegistry | None, Depends(get_scope_registry)
+    ],
+    settings: Annotated[Settings, Depends(get_settings)],
+):
+    """Registro id -> scope para decodificar a claim 'pmap'."""
+    if scope_registry is None:
+        raise NotFound('Escopos compactos desativados')
+
+    return _cached_document(
+        request,
+        scope_registry.registry_json,
+        scope_registry.etag,
+        settings.SCOPE_REGISTRY_CACHE_MAX_AGE_SECONDS,
+    )
@@ -1,11 +1,21 @@
-from datetime import datetime, timedelta
-from typing import Protocol, runtime_checkable
+import asyncio
+import threading
+import time
+from collections.abc import AsyncIterator, Callable, Container
+from concurrent.futures import Executor
+from datetime import UTC, datetime, timedelta
+from typing import Protocol, TypeVar, runtime_checkable
 
 from fastapi.security import OAuth2PasswordRequestForm, SecurityScopes
 from jwt import PyJWTError
 from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from application_service import metrics, phase_timer
+from application_service.cache import TTLCache
+from application_service.revocation_index import RevocationIndex
+from application_service.scope_matcher import ScopeMatcher
+from application_service.scope_registry import ScopeRegistry
 from application_service.token_service import TokenService
 from domain_entity.exceptions import (
     BadRequest,
@@ -25,6 +35,8 @@ from domain_entity.schemas import (
 from infra_repository.crud import UserCRUD
 from settings import Settings
 
+T = TypeVar('T')
+
 
 @runtime_checkable
 class AuthServiceProtocol(Protocol):
@@ -43,7 +55,14 @@ class AuthServiceProtocol(Protocol):
     async def refresh_access_token(self, refresh_token: str) -> Token:
         ...   # pragma: no cover
 
-    async def get_users(self) -> list:
+    async def get_users(
+        self, after_id: int | None = None, limit: int | None = None
+    ) -> list[UserFromDBDTO]:
+        ...   # pragma: no cover
+
+    def stream_users(
+        self, after_id: int | None = None, limit: int | None = None
+    ) -> AsyncIterator[UserFromDBDTO]:
         ...   # pragma: no cover
 
     async def get_users_me(self, token) -> UserFromDBDTO:
@@ -94,36 +113,144 @@ class BcryptHasher(HasherProtocol):
         return self.context.verify(password, hash_password)
 
 
+@runtime_checkable
+class AsyncHasherProtocol(Protocol):
+    async def hash(self, password: str) -> str:
+        ...   # pragma: no cover
+
+    async def verify(self, password: str, hash_password: str) -> bool:
+        ...   # pragma: no cover
+
+    def stats(self) -> dict:
+        ...   # pragma: no cover
+
+
+class ExecutorHasher(AsyncHasherProtocol):
+    """
+    Executa um HasherProtocol síncrono em um Executor para não bloquear o
+    event loop. O bcrypt libera o GIL, então um pool de threads escala com
+    o número de cores.
+
+    stats() expõe a fila (tarefas aguardando uma thread livre) e o tempo
+    de espera até o início do hash.
+    """
+
+    def __init__(self, hasher: HasherProtocol, executor: Executor):
+        self.hasher = hasher
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._started = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._submit('hash', self.hasher.hash, password)
+
+    async def verify(self, password: str, hash_password: str) -> bool:
+        return await self._submit(
+            'verify', self.hasher.verify, password, hash_password
+        )
+
+    async def _submit(
+        self, operation: str, func: Callable[..., T], *args
+    ) -> T:
+        submitted_at = time.perf_counter()
+        histogram = metrics.PASSWORD_HASH_SECONDS.labels(operation)
+        # O job roda em outra thread, fora do contexto da requisição
+        timer = phase_timer.current()
+
+        def job() -> T:
+            waited = time.perf_counter() - submitted_at
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._started += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                elapsed = time.perf_counter() - started
+                histogram.observe(elapsed)
+                if timer is not None:
+                    timer.record('hash', elapsed)
+                with self._lock:
+                    self._running -= 1
+
+        with self._lock:
+            self._queued += 1
+        future = self.executor.submit(job)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Se a tarefa ainda estava na fila ela nunca vai rodar.
+            if future.cancel():
+                with self._lock:
+                    self._queued -= 1
+            raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'queued': self._queued,
+                'running': self._running,
+                'started': self._started,
+                'wait_seconds_avg': (
+                    self._wait_total / self._started if self._started else 0.0
+                ),
+                'wait_seconds_max': self._wait_max,
+            }
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
 class AuthService:
     def __init__(
         self,
-        hasher: HasherProtocol,
+        hasher: AsyncHasherProtocol,
         user_crud: UserCRUD,
         db: AsyncSession,
         settings: Settings,
         token_service: TokenService,
+        principal_cache: TTLCache | None = None,
+        revocation_index: RevocationIndex | None = None,
+        read_db: AsyncSession | None = None,
+        scope_registry: ScopeRegistry | None = None,
+        scope_matcher: ScopeMatcher | None = None,
     ):
         self.hasher = hasher
         self.user_crud = user_crud
         self.db = db
+        # Leituras das rotas de consulta; login, refresh e revogação
+        # continuam no primário para não enxergar atraso de replicação
+        self.read_db = read_db if read_db is not None else db
         self.settings = settings
         self.token_service = token_service
+        self.principal_cache = principal_cache
+        self.revocation_index = revocation_index
+        self.scope_registry = scope_registry
+        self.scope_matcher = scope_matcher or ScopeMatcher()
 
     async def create_user_from_route(
         self, user: UserCreateDTO
     ) -> UserFromDBDTO:
 
-        get_user = await self.user_crud.get_user_by_email(
-            email=user.email, async_transaction=self.db
+        # username também é único: sem checá-lo o insert falharia no banco
+        emails, usernames = await self.user_crud.get_existing_identities(
+            [user.email], [user.username], async_transaction=self.db
         )
 
-        if get_user:
+        if emails or usernames:
             raise DuplicateUserError('Usuário já cadastrado.')
 
         if user.pwd_plain != user.confirm_pwd_plain:
             raise PasswordNotMatch()
 
-        pwd_hash = self.hasher.hash(user.pwd_plain)
+        pwd_hash = await self.hasher.hash(user.pwd_plain)
 
         result = await self.user_crud.insert_user(
             User(
@@ -139,6 +266,12 @@ class AuthService:
         if result is None:
             raise UserNotFound(message='Falha na criação do usuário.')
 
+        # Usuário novo não tem roles: grava a linha de escopos vazia para o
+        # login só ler user_effective_scopes
+        await self.user_crud.replace_effective_scopes(
+            {result.id: []}, async_transaction=self.db
+        )
+
         return UserFromDBDTO(
             id=result.id,
             username=result.username,
@@ -150,13 +283,22 @@ class AuthService:
         self, auth_request: OAuth2PasswordRequestForm
     ) -> Token:
 
-        get_user = await self.user_crud.get_user_by_username(
-            auth_request.username, async_transaction=self.db
-        )
-        if get_user is None:
-            raise UserNotFound()
+        with phase_timer.phase('user_lookup'):
+            row = await self.user_crud.get_user_with_scopes(
+                auth_request.username, async_transaction=self.db
+            )
+            if row is None:
+                raise UserNotFound()
+            get_user, scopes = row
+            permissions = await self._effective_scopes(get_user.id, scopes)
+            await self._sync_scope_registry(permissions)
+
+        # Devolve a conexão ao pool antes do bcrypt
+        await self.db.commit()
 
-        if not self.hasher.verify(auth_request.password, get_user.password):
+        if not await self.hasher.verify(
+            auth_request.password, get_user.password
+        ):
 
             raise UnauthorizedException()
 
@@ -166,10 +308,6 @@ class AuthService:
         refresh_token_expire = timedelta(
             days=self.settings.REFRESH_TOKEN_EXPIRE_DAYS
         )
-        permissions = []
-        for role in get_user.roles:
-            for permission in role.permissions:
-                permissions.append(permission.scope)
 
         access_token = self.token_service.create_access_token(
             auth_request.username,
@@ -188,33 +326,32 @@ class AuthService:
 
     async def refresh_access_token(self, refresh_token: str):
         try:
-            payload = self.token_service.jwt_handler.decode(
-                jwt_token=str(refresh_token),
-                key=self.settings.SECRET_KEY,
-                algorithm=self.settings.ALGORITHM,
-            )
+            payload = self.token_service.decode(str(refresh_token))
 
             if payload.get('token_type') != 'refresh':
                 raise BadRequest('Token_type Inválido')
 
-            is_revoked = await self.user_crud.is_token_revoked(
-                token_id=payload['jti'], async_transaction=self.db
-            )
-
-            if is_revoked:
+            with phase_timer.phase('revocation_check'):
+                revoked = await self._is_token_revoked(payload['jti'])
+            if revoked:
                 raise UnauthorizedException(message='Token Revoked')
 
             username = payload.get('sub')
-            get_user = await self.user_crud.get_user_by_username(
-                str(username), async_transaction=self.db
-            )
-            if get_user is None:
+            with phase_timer.phase('user_lookup'):
+                row = await self.user_crud.get_user_with_scopes(
+                    str(username), async_transaction=self.db
+                )
+            if row is None:
                 raise UserNotFound()
+            get_user, scopes = row
 
             # Se usuário foi encontrado, revoga o atual refresh_token,
             # cria novo access token e refresh_token
 
-            await self.revoke_token(token=refresh_token, user_id=get_user.id)
+            with phase_timer.phase('revoke'):
+                await self.revoke_token(
+                    token=refresh_token, user_id=get_user.id
+                )
 
             access_token_expire = timedelta(
                 minutes=self.settings.ACCESS_TOKEN_EXPIRE_MINUTES
@@ -223,10 +360,9 @@ class AuthService:
                 days=self.settings.REFRESH_TOKEN_EXPIRE_DAYS
             )
 
-            permissions = []
-            for role in get_user.roles:
-                for permission in role.permissions:
-                    permissions.append(permission.scope)
+            with phase_timer.phase('user_lookup'):
+                permissions = await self._effective_scopes(get_user.id, scopes)
+                await self._sync_scope_registry(permissions)
 
             access_token = self.token_service.create_access_token(
                 get_user.username,
@@ -246,19 +382,80 @@ class AuthService:
         except PyJWTError as err:
             raise UnauthorizedException() from err
 
-    async def get_users(self):
-        users = await self.user_crud.get_users(async_transaction=self.db)
-        if not users:
-            return []
-        if isinstance(users, User):
-            users = [users]
+    async def _effective_scopes(
+        self, user_id: int, scopes: str | None
+    ) -> list[str]:
+        # Usuários anteriores à tabela materializada são calculados aqui
+        # uma única vez
+        if scopes is None:
+            materialized = await self._refresh_effective_scopes([user_id])
+            return materialized[user_id]
+        return scopes.split(',') if scopes else []
+
+    async def _sync_scope_registry(self, permissions: list[str]) -> None:
+        # Permission criada depois da última carga (ou em outro worker)
+        registry = self.scope_registry
+        if registry is not None and not registry.covers(permissions):
+            await registry.load(self.user_crud, self.db)
+
+    async def _granted_scopes(self, payload: dict) -> Container[str] | None:
+        compact = payload.get('pmap')
+        if compact is None or self.scope_registry is None:
+            perms = payload.get('perms')
+            return frozenset(perms.split(',')) if perms else None
+
+        registry = self.scope_registry
+        version = payload.get('pver')
+        if version not in registry.known_versions:
+            # Do primário: a réplica pode ainda não ter a permission nova
+            await registry.refresh(str(version), self.user_crud, self.db)
+        try:
+            return registry.granted(compact) or None
+        except ValueError:
+            return None
+
+    async def _refresh_effective_scopes(
+        self, user_ids: list[int]
+    ) -> dict[int, list[str]]:
+        scopes_by_user = await self.user_crud.compute_effective_scopes(
+            user_ids=user_ids, async_transaction=self.db
+        )
+        await self.user_crud.replace_effective_scopes(
+            scopes_by_user=scopes_by_user, async_transaction=self.db
+        )
+        return scopes_by_user
+
+    async def _is_token_revoked(self, token_id: str) -> bool:
+        index = self.revocation_index
+        if index is not None:
+            if token_id in index:
+                return True
+            if index.authoritative:
+                return False
+
+        return await self.user_crud.is_token_revoked(
+            token_id=token_id, async_transaction=self.db
+        )
+
+    async def get_users(
+        self, after_id: int | None = None, limit: int | None = None
+    ) -> list[UserFromDBDTO]:
+        users = await self.user_crud.get_users(
+            async_transaction=self.read_db, after_id=after_id, limit=limit
+        )
         return [UserFromDBDTO.model_validate(u) for u in users]
 
+    async def stream_users(
+        self, after_id: int | None = None, limit: int | None = None
+    ) -> AsyncIterator[UserFromDBDTO]:
+        async for user in self.user_crud.stream_users(
+            async_transaction=self.read_db, after_id=after_id, limit=limit
+        ):
+            yield UserFromDBDTO.model_validate(user)
+
     async def get_users_me(self, token: str) -> UserFromDBDTO:
         try:
-            payload = self.token_service.jwt_handler.decode(
-                token, self.settings.SECRET_KEY, self.settings.ALGORITHM
-            )
+            payload = self.token_service.decode(token)
             username = payload.get('sub')
             if username is None:
                 raise UnauthorizedException()
@@ -266,8 +463,8 @@ class AuthService:
         except PyJWTError as err:
             raise UnauthorizedException() from err
 
-        get_user = await self.user_crud.get_user_by_username(
-            username=username, async_transaction=self.db
+        get_user = await self.user_crud.get_principal_by_username(
+            username=username, async_transaction=self.read_db
         )
         if get_user is None:
             raise UnauthorizedException()
@@ -283,31 +480,39 @@ class AuthService:
 
         payload = self.token_service.decode_token(token=token)
         username = payload.get('sub')
-        user_perms = payload.get('perms')
+        user_perms = await self._granted_scopes(payload)
 
         if not username or not user_perms:
             raise UnauthorizedException(bearer=authenticate_value)
 
-        user_perms = user_perms.split(',')
-
-        result = await self.user_crud.get_user_by_username(
-            username=username, async_transaction=self.db
-        )
-        if not result:
-            raise UnauthorizedException(bearer=authenticate_value)
-        if not result.active:
-            raise UnauthorizedException(bearer=authenticate_value)
+        principal = None
+        if self.principal_cache is not None:
+            principal = self.principal_cache.get(username)
 
-        for permission in required_perms.scopes:
-            if permission not in user_perms:
+        if principal is None:
+            # Os escopos vêm do token: roles e permissions não são lidas
+            result = await self.user_crud.get_principal_by_username(
+                username=username, async_transaction=self.read_db
+            )
+            if not result:
+                raise UnauthorizedException(bearer=authenticate_value)
+            if not result.active:
                 raise UnauthorizedException(bearer=authenticate_value)
 
-        return UserFromDBDTO(
-            id=result.id,
-            username=result.username,
-            email=result.email,
-            fullname=result.fullname,
-        )
+            principal = UserFromDBDTO(
+                id=result.id,
+                username=result.username,
+                email=result.email,
+                fullname=result.fullname,
+            )
+            # Só usuários ativos entram no cache
+            if self.principal_cache is not None:
+                self.principal_cache.set(username, principal)
+
+        if not self.scope_matcher.allows(user_perms, required_perms.scopes):
+            raise UnauthorizedException(bearer=authenticate_value)
+
+        return principal
 
     async def create_roles_with_permissions(
         self, role_data: CreateRoleDTO
@@ -338,18 +543,29 @@ class AuthService:
         insert_role = await self.user_crud.insert_role(
             role=role, async_transaction=self.db
         )
+        # Role nova ainda não tem usuários: user_effective_scopes só muda
+        # em assign_role_to_user
         if insert_role:
             return insert_role
         else:
             raise BadRequest('Failed to create role with permissions.')
 
     async def delete_role_by_name(self, role_name: str):
+        affected_users = await self.user_crud.get_users_for_role(
+            role_name=role_name, async_transaction=self.db
+        )
         delete = await self.user_crud.delete_role(
             role_name=role_name, async_transaction=self.db
         )
         if delete <= 0:
             raise BadRequest('Role não encontrada')
 
+        await self._refresh_effective_scopes(list(affected_users))
+
+        if self.principal_cache is not None:
+            for username in affected_users.values():
+                self.principal_cache.invalidate(username)
+
         return {'Roles deletadas': delete}
 
     async def assign_role_to_user(self, role_id: int, user_id: int):
@@ -366,7 +582,10 @@ class AuthService:
 
         if role not in user.roles:
             user.roles.append(role)
+            await self._refresh_effective_scopes([user.id])
             await self.db.commit()
+            if self.principal_cache is not None:
+                self.principal_cache.invalidate(user.username)
 
             return {
                 'message': f'Role {role.name} assigned to user {user.username}'
@@ -379,7 +598,7 @@ class AuthService:
     async def list_roles_and_permissions_for_user_id(self, user_id: int):
 
         result = await self.user_crud.get_roles_and_permissions_for_user_id(
-            user_id=user_id, async_transaction=self.db
+            user_id=user_id, async_transaction=self.read_db
         )
 
         if not result:
@@ -389,17 +608,14 @@ class AuthService:
 
     async def revoke_token(self, token: str, user_id: int):
         try:
-            payload = self.token_service.jwt_handler.decode(
-                token,
-                self.settings.SECRET_KEY,
-                self.settings.ALGORITHM,
-                options={'verify_exp': False},
+            payload = self.token_service.decode(
+                token, options={'verify_exp': False}
             )
 
             if payload['token_type'] != 'refresh':
                 raise BadRequest('Invalid Token Type')
 
-            expires_at = datetime.fromtimestamp(payload['exp'])
+            expires_at = datetime.fromtimestamp(payload['exp'], UTC)
             token_id = payload['jti']
 
             token_to_revoke = RevokedRefreshToken(
@@ -409,6 +625,8 @@ class AuthService:
             await self.user_crud.revoke_token(
                 token_to_revoke=token_to_revoke, async_transaction=self.db
             )
+            if self.revocation_index is not None:
+                self.revocation_index.add(token_id, expires_at)
 
             return {'detail': 'Logout realizado com sucesso'}
 
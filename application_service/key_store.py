@@ -0,0 +1,106 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Any
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from jwt.algorithms import get_default_algorithms
+
+_EC_ALGORITHMS = {
+    'secp256r1': 'ES256',
+    'secp384r1': 'ES384',
+    'secp521r1': 'ES512',
+}
+
+
+def algorithm_for_key(key: Any) -> str:
+    if isinstance(key, rsa.RSAPrivateKey | rsa.RSAPublicKey):
+        return 'RS256'
+    if isinstance(key, ec.EllipticCurvePrivateKey | ec.EllipticCurvePublicKey):
+        try:
+            return _EC_ALGORITHMS[key.curve.name]
+        except KeyError as err:
+            raise ValueError(
+                f'Curva EC não suportada: {key.curve.name}'
+            ) from err
+    if isinstance(key, ed25519.Ed25519PrivateKey | ed25519.Ed25519PublicKey):
+        return 'EdDSA'
+    raise ValueError(f'Tipo de chave não suportado: {type(key).__name__}')
+
+
+class SigningKey:
+    """
+    Chave assimétrica identificada por kid. Sem chave privada ela só serve
+    para verificar tokens (chave aposentada durante uma rotação).
+    """
+
+    def __init__(
+        self, kid: str, private_key: Any = None, public_key: Any = None
+    ):
+        if private_key is None and public_key is None:
+            raise ValueError(f'Chave {kid} sem material')
+        self.kid = kid
+        self.private_key = private_key
+        self.public_key = public_key or private_key.public_key()
+        self.algorithm = algorithm_for_key(self.public_key)
+
+    def to_jwk(self) -> dict:
+        algorithm = get_default_algorithms()[self.algorithm]
+        jwk = json.loads(algorithm.to_jwk(self.public_key))
+        jwk.update({'kid': self.kid, 'alg': self.algorithm, 'use': 'sig'})
+        return jwk
+
+
+class KeyStore:
+    """
+    Conjunto de chaves publicadas no JWKS. Apenas active_kid assina novos
+    tokens; todas as chaves do conjunto continuam verificando tokens que
+    carregam o seu kid, o que permite rotacionar sem invalidar sessões.
+
+    O documento JWKS e o ETag são calculados uma única vez.
+    """
+
+    def __init__(self, keys: list[SigningKey], active_kid: str = ''):
+        self._keys = {key.kid: key for key in keys}
+        signers = [key.kid for key in keys if key.private_key is not None]
+
+        if not active_kid and len(signers) > 1:
+            raise ValueError('Várias chaves privadas: defina JWT_ACTIVE_KID')
+        active_kid = active_kid or (signers[0] if signers else '')
+        if active_kid and active_kid not in signers:
+            raise ValueError(f'Chave privada {active_kid} não encontrada')
+
+        self.signing_key = self._keys.get(active_kid)
+        self.jwks_json = json.dumps(
+            {'keys': [key.to_jwk() for key in self._keys.values()]},
+            separators=(',', ':'),
+            sort_keys=True,
+        ).encode()
+        self.etag = f'"{hashlib.sha256(self.jwks_json).hexdigest()[:32]}"'
+
+    @classmethod
+    def from_directory(cls, path: str, active_kid: str = '') -> 'KeyStore':
+        """
+        Carrega cada arquivo <kid>.pem do diretório, seja chave privada
+        (assina e verifica) ou pública (só verifica).
+        """
+        keys = []
+        for pem_file in sorted(Path(path).glob('*.pem')):
+            data = pem_file.read_bytes()
+            kid = pem_file.stem
+            if b'PRIVATE KEY' in data:
+                private_key = serialization.load_pem_private_key(
+                    data, password=None
+                )
+                keys.append(SigningKey(kid, private_key=private_key))
+            else:
+                public_key = serialization.load_pem_public_key(data)
+                keys.append(SigningKey(kid, public_key=public_key))
+        return cls(keys, active_kid=active_kid)
+
+    def get(self, kid: str) -> SigningKey | None:
+        return self._keys.get(kid)
+
+    def __len__(self) -> int:
+        return len(self._keys)
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import math
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from collections.abc import Callable
+from datetime import UTC, datetime
+
+from application_service import metrics
+
+logger = logging.getLogger(__name__)
+
+_LAG_SECONDS = metrics.EVENT_LOOP_LAG_SECONDS.labels()
+_BLOCKS = metrics.EVENT_LOOP_BLOCKS.labels()
+
+
+def _percentile(ordered: list[float], quantile: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(quantile * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class LoopLagMonitor:
+    """
+    Mede o atraso do event loop: a cada `interval` segundos dorme e compara
+    o horário em que acordou com o esperado. stats() traz p50/p90/p99 e o
+    máximo das últimas `window` amostras.
+
+    Com `block_threshold` > 0 uma thread watchdog acompanha as amostras;
+    se o loop passar de `block_threshold` sem acordar, ela captura a pilha
+    da thread do loop naquele instante, ou seja, o código que está
+    bloqueando. Os últimos `max_reports` bloqueios ficam em reports.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        window: int = 600,
+        block_threshold: float = 0.0,
+        max_reports: int = 20,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.clock = clock
+        self.reports: deque[dict] = deque(maxlen=max_reports)
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._max_lag = 0.0
+        self._blocks = 0
+        self._beat = clock()
+        self._beats = 0
+        self._reported_beat = -1
+        self._pending_report: dict | None = None
+        self._loop_thread_id: int | None = None
+        self._stop = threading.Event()
+
+    def record(self, lag: float) -> None:
+        with self._lock:
+            self._samples.append(lag)
+            self._max_lag = max(self._max_lag, lag)
+            self._beat = self.clock()
+            self._beats += 1
+            # O watchdog viu o bloqueio em andamento; aqui se sabe a
+            # duração total
+            if self._pending_report is not None:
+                self._pending_report['blocked_seconds'] = lag
+                self._pending_report = None
+        _LAG_SECONDS.observe(lag)
+
+    async def run(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._beat = self.clock()
+        watchdog = None
+        if self.block_threshold > 0:
+            self._stop.clear()
+            watchdog = threading.Thread(
+                target=self._watch, name='loop-watchdog', daemon=True
+            )
+            watchdog.start()
+        try:
+            while True:
+                expected = self.clock() + self.interval
+                await asyncio.sleep(self.interval)
+                self.record(max(self.clock() - expected, 0.0))
+        finally:
+            if watchdog is not None:
+                self._stop.set()
+                watchdog.join()
+
+    def _watch(self) -> None:
+        poll = min(self.block_threshold, self.interval) / 2
+        while not self._stop.wait(poll):
+            with self._lock:
+                late = self.clock() - self._beat - self.interval
+                if (
+                    late <= self.block_threshold
+                    or self._beats == self._reported_beat
+                ):
+                    continue
+                self._reported_beat = self._beats
+            self._capture(late)
+
+    def _capture(self, blocked_for: float) -> None:
+        frame = None
+        if self._loop_thread_id is not None:
+            frame = sys._current_frames().get(self._loop_thread_id)
+        stack = ''.join(traceback.format_stack(frame)) if frame else ''
+        report = {
+            'detected_at': datetime.now(UTC).isoformat(),
+            'blocked_seconds': blocked_for,
+            'stack': stack,
+        }
+        with self._lock:
+            self._pending_report = report
+            self.reports.append(report)
+            self._blocks += 1
+        _BLOCKS.inc()
+        logger.warning(
+            'Event loop bloqueado há %.3fs:\n%s', blocked_for, stack
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            ordered = sorted(self._samples)
+            max_lag = self._max_lag
+            blocks = self._blocks
+        return {
+            'samples': len(ordered),
+            'p50_seconds': _percentile(ordered, 0.5),
+            'p90_seconds': _percentile(ordered, 0.9),
+            'p99_seconds': _percentile(ordered, 0.99),
+            'window_max_seconds': ordered[-1] if ordered else 0.0,
+            'max_seconds': max_lag,
+            'blocks': blocks,
+        }
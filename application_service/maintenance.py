@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import time
+from datetime import UTC, datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from application_service.revocation_index import RevocationIndex
+from infra_repository.crud import UserCRUD
+
+logger = logging.getLogger(__name__)
+
+
+class RevokedTokenPurger:
+    """
+    Remove de revoked_refresh_tokens as linhas cujo expires_at já passou.
+
+    Cada lote roda na sua própria transação para manter os locks curtos;
+    o purge continua até um lote voltar incompleto.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        user_crud: UserCRUD,
+        batch_size: int,
+        revocation_index: RevocationIndex | None = None,
+    ):
+        self.session_factory = session_factory
+        self.user_crud = user_crud
+        self.batch_size = batch_size
+        self.revocation_index = revocation_index
+        self.runs = 0
+        self.rows_purged_total = 0
+        self.last_rows_purged = 0
+        self.last_duration_seconds = 0.0
+
+    async def purge_once(self) -> int:
+        started = time.perf_counter()
+        now = datetime.now(UTC)
+        purged = 0
+
+        while True:
+            async with self.session_factory() as session, session.begin():
+                deleted = await self.user_crud.delete_expired_revoked_tokens(
+                    now=now,
+                    batch_size=self.batch_size,
+                    async_transaction=session,
+                )
+            purged += deleted
+            if deleted < self.batch_size:
+                break
+            # Devolve o event loop entre lotes
+            await asyncio.sleep(0)
+
+        if self.revocation_index is not None:
+            self.revocation_index.prune()
+
+        self.runs += 1
+        self.rows_purged_total += purged
+        self.last_rows_purged = purged
+        self.last_duration_seconds = time.perf_counter() - started
+        logger.info(
+            'revoked_refresh_tokens purge: %d linhas em %.3fs',
+            purged,
+            self.last_duration_seconds,
+        )
+        return purged
+
+    async def run(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.purge_once()
+            except Exception:
+                logger.exception('Falha no purge de revoked_refresh_tokens')
+
+    def stats(self) -> dict:
+        return {
+            'runs': self.runs,
+            'rows_purged_total': self.rows_purged_total,
+            'last_rows_purged': self.last_rows_purged,
+            'last_duration_seconds': self.last_duration_seconds,
+        }
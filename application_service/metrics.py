@@ -0,0 +1,406 @@
+import bisect
+import math
+import threading
+import time
+import weakref
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Buckets padrão do Prometheus, para latência de requisições e bcrypt
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+# Operações de microssegundos a milissegundos (JWT, consultas)
+FAST_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    1.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = ','.join(
+        f'{name}="{_escape(value)}"'
+        for name, value in zip(names, values, strict=True)
+    )
+    return f'{{{pairs}}}' if pairs else ''
+
+
+class _Metric:
+    type_name = ''
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """
+        Série com os valores de label informados. O objeto retornado pode
+        ser guardado pelo chamador para evitar a busca no caminho quente.
+        """
+        if len(values) != len(self.labelnames):
+            raise ValueError(f'{self.name} espera os labels {self.labelnames}')
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError   # pragma: no cover
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError   # pragma: no cover
+
+    def render(self) -> str:
+        header = (
+            f'# HELP {self.name} {self.documentation}\n'
+            f'# TYPE {self.name} {self.type_name}\n'
+        )
+        return header + ''.join(f'{line}\n' for line in self._samples())
+
+
+class _Value:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            labels = _format_labels(self.labelnames, values)
+            yield f'{self.name}{labels} {_format_value(child.value)}'
+
+
+class Gauge(Counter):
+    """Valor instantâneo; atualizado com set() no momento da coleta."""
+
+    type_name = 'gauge'
+
+
+class _HistogramValue:
+    def __init__(self, buckets: tuple[float, ...]):
+        self._buckets = buckets
+        # Uma posição a mais para o bucket +Inf
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> tuple[list[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def _samples(self) -> Iterator[str]:
+        bucket_labels = (*self.labelnames, 'le')
+        upper_bounds = [*map(_format_value, self.buckets), '+Inf']
+        for values, child in list(self._children.items()):
+            counts, total = child.snapshot()
+            cumulative = 0
+            for upper_bound, count in zip(upper_bounds, counts, strict=True):
+                cumulative += count
+                labels = _format_labels(bucket_labels, (*values, upper_bound))
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.labelnames, values)
+            yield f'{self.name}_sum{labels} {_format_value(total)}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f'Métrica duplicada: {metric.name}')
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Formato texto de exposição do Prometheus (0.0.4)."""
+        return ''.join(metric.render() for metric in self._metrics.values())
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(
+    Counter(
+        'http_requests_total',
+        'Requisições HTTP por rota e status.',
+        ('method', 'route', 'status'),
+    )
+)
+HTTP_REQUEST_SECONDS = registry.register(
+    Histogram(
+        'http_request_duration_seconds',
+        'Latência das requisições HTTP por rota.',
+        ('method', 'route'),
+    )
+)
+PASSWORD_HASH_SECONDS = registry.register(
+    Histogram(
+        'password_hash_duration_seconds',
+        'Tempo de CPU do hasher por operação, sem a espera na fila.',
+        ('operation',),
+    )
+)
+JWT_SECONDS = registry.register(
+    Histogram(
+        'jwt_duration_seconds',
+        'Tempo de encode e decode de JWT.',
+        ('operation',),
+        buckets=FAST_BUCKETS,
+    )
+)
+DB_QUERY_SECONDS = registry.register(
+    Histogram(
+        'db_query_duration_seconds',
+        'Duração das consultas por banco e tipo de comando.',
+        ('database', 'operation'),
+        buckets=FAST_BUCKETS,
+    )
+)
+DB_POOL_CONNECTIONS = registry.register(
+    Gauge(
+        'db_pool_connections',
+        'Conexões do pool por estado.',
+        ('database', 'state'),
+    )
+)
+DB_POOL_ACQUIRE_SECONDS = registry.register(
+    Histogram(
+        'db_pool_acquire_duration_seconds',
+        'Espera por uma conexão do pool (checkout) por banco.',
+        ('database',),
+        buckets=FAST_BUCKETS,
+    )
+)
+HASHER_TASKS = registry.register(
+    Gauge(
+        'hasher_tasks',
+        'Tarefas do executor de hash por estado.',
+        ('pool', 'state'),
+    )
+)
+CACHE_LOOKUPS = registry.register(
+    Counter(
+        'cache_lookups_total',
+        'Buscas nos caches em memória por resultado (hit ou miss).',
+        ('cache', 'result'),
+    )
+)
+CACHE_ENTRIES = registry.register(
+    Gauge(
+        'cache_entries',
+        'Entradas em cada cache em memória.',
+        ('cache',),
+    )
+)
+LOGIN_ADMISSION_REQUESTS = registry.register(
+    Gauge(
+        'login_admission_requests',
+        'Logins em execução e na fila do limitador de concorrência.',
+        ('state',),
+    )
+)
+LOGIN_ADMISSION = registry.register(
+    Counter(
+        'login_admission_total',
+        'Logins por desfecho da admissão (admitidos, rejeitados e, entre '
+        'os rejeitados, os que estouraram o tempo na fila).',
+        ('outcome',),
+    )
+)
+RATE_LIMIT_KEYS = registry.register(
+    Gauge(
+        'rate_limit_keys',
+        'Chaves (IPs ou usernames) acompanhadas por cada limitador.',
+        ('scope', 'key'),
+    )
+)
+RATE_LIMIT_DECISIONS = registry.register(
+    Counter(
+        'rate_limit_decisions_total',
+        'Requisições liberadas e limitadas por limitador.',
+        ('scope', 'key', 'decision'),
+    )
+)
+RATE_LIMIT_EVICTIONS = registry.register(
+    Counter(
+        'rate_limit_evictions_total',
+        'Chaves descartadas por exceder RATE_LIMIT_MAX_KEYS.',
+        ('scope', 'key'),
+    )
+)
+REVOKED_TOKEN_PURGE_RUNS = registry.register(
+    Counter(
+        'revoked_token_purge_runs_total',
+        'Execuções do purge de revoked_refresh_tokens.',
+    )
+)
+REVOKED_TOKEN_PURGE_ROWS = registry.register(
+    Counter(
+        'revoked_token_purge_rows_total',
+        'Linhas expiradas removidas de revoked_refresh_tokens.',
+    )
+)
+REVOKED_TOKEN_PURGE_LAST_SECONDS = registry.register(
+    Gauge(
+        'revoked_token_purge_last_duration_seconds',
+        'Duração da última execução do purge.',
+    )
+)
+EVENT_LOOP_LAG_SECONDS = registry.register(
+    Histogram(
+        'event_loop_lag_seconds',
+        'Atraso do event loop em cada amostra.',
+        buckets=(
+            0.001,
+            0.0025,
+            0.005,
+            0.01,
+            0.025,
+            0.05,
+            0.1,
+            0.25,
+            0.5,
+            1.0,
+            2.5,
+            5.0,
+        ),
+    )
+)
+EVENT_LOOP_LAG_WINDOW = registry.register(
+    Gauge(
+        'event_loop_lag_window_seconds',
+        'Percentis e máximo do atraso nas últimas amostras.',
+        ('stat',),
+    )
+)
+EVENT_LOOP_BLOCKS = registry.register(
+    Counter(
+        'event_loop_blocks_total',
+        'Bloqueios do event loop acima do limite do watchdog.',
+    )
+)
+
+_SQL_OPERATIONS = frozenset({'SELECT', 'INSERT', 'UPDATE', 'DELETE'})
+_engine_labels: weakref.WeakKeyDictionary[
+    Engine, str
+] = weakref.WeakKeyDictionary()
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    elapsed = time.perf_counter() - context._metrics_started
+    operation = statement.lstrip()[:6].upper()
+    if operation not in _SQL_OPERATIONS:
+        operation = 'OTHER'
+    database = _engine_labels.get(conn.engine, 'unknown')
+    DB_QUERY_SECONDS.labels(database, operation).observe(elapsed)
+
+
+def instrument_engine(engine: AsyncEngine, database: str) -> None:
+    """
+    Mede cada consulta do engine com os eventos before/after
+    cursor_execute. Chamadas repetidas para o mesmo engine não duplicam
+    os listeners.
+    """
+    sync_engine = engine.sync_engine
+    _engine_labels[sync_engine] = database
+    if not event.contains(
+        sync_engine, 'before_cursor_execute', _before_cursor_execute
+    ):
+        event.listen(
+            sync_engine, 'before_cursor_execute', _before_cursor_execute
+        )
+        event.listen(
+            sync_engine, 'after_cursor_execute', _after_cursor_execute
+        )
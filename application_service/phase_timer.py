@@ -0,0 +1,68 @@
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+class PhaseTimer:
+    """
+    Tempo acumulado por fase (hash, jwt, db, ...) de uma requisição. As
+    fases podem se sobrepor: 'db' também conta dentro de 'user_lookup'.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        # Fim da função da rota; o que vem depois é serialização
+        self.endpoint_finished_at: float | None = None
+        # O hasher registra a partir das threads do executor
+        self._lock = threading.Lock()
+
+    def record(self, name: str, elapsed: float) -> None:
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+_current: ContextVar[PhaseTimer | None] = ContextVar(
+    'phase_timer', default=None
+)
+
+
+def current() -> PhaseTimer | None:
+    return _current.get()
+
+
+@contextmanager
+def timing() -> Iterator[PhaseTimer]:
+    """Ativa a medição de fases no contexto atual."""
+    timer = PhaseTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Mede o bloco como a fase `name`; sem timing() ativo não faz nada."""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.record(name, time.perf_counter() - started)
+
+
+def record(name: str, elapsed: float) -> None:
+    """Para quem já mediu a duração (ex.: junto com as métricas)."""
+    timer = _current.get()
+    if timer is not None:
+        timer.record(name, elapsed)
@@ -0,0 +1,76 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import Engine, event
+
+
+@dataclass
+class QueryStats:
+    """Consultas executadas dentro de um track_queries()."""
+
+    count: int = 0
+    duration: float = 0.0
+    statements: list[str] = field(default_factory=list)
+    keep_statements: bool = False
+    parent: 'QueryStats | None' = field(default=None, repr=False)
+
+    def record(self, statement: str, elapsed: float) -> None:
+        stats: QueryStats | None = self
+        # Escopos aninhados (teste envolvendo uma requisição) somam também
+        # nos escopos externos
+        while stats is not None:
+            stats.count += 1
+            stats.duration += elapsed
+            if stats.keep_statements:
+                stats.statements.append(statement)
+            stats = stats.parent
+
+
+_current: ContextVar[QueryStats | None] = ContextVar(
+    'query_stats', default=None
+)
+
+
+@contextmanager
+def track_queries(keep_statements: bool = False) -> Iterator[QueryStats]:
+    """
+    Conta as consultas (e o tempo no banco) feitas no contexto atual. A
+    contagem segue para tarefas filhas, pois elas copiam o contexto.
+    """
+    stats = QueryStats(keep_statements=keep_statements, parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    if _current.get() is not None:
+        context._query_counter_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    stats = _current.get()
+    started = getattr(context, '_query_counter_started', None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def install() -> None:
+    """
+    Registra os listeners em todos os engines (eventos da classe Engine).
+    Fora de um track_queries() o custo é uma leitura de ContextVar.
+    """
+    if not event.contains(
+        Engine, 'before_cursor_execute', _before_cursor_execute
+    ):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,95 @@
+import heapq
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from infra_repository.crud import UserCRUD
+
+
+def _as_timestamp(value: datetime | float) -> float:
+    if isinstance(value, datetime):
+        # SQLite devolve datetimes sem timezone, gravados em UTC
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=UTC)
+        return value.timestamp()
+    return float(value)
+
+
+class RevocationIndex:
+    """
+    Índice em memória dos refresh tokens revogados, indexado pelo jti.
+
+    Cada jti (UUID) é guardado como o inteiro de 128 bits correspondente em
+    um set, e um heap ordenado por expires_at permite descartar as entradas
+    cujo token já expirou (e que seriam rejeitadas pelo próprio JWT).
+
+    O índice é local ao processo: um token revogado por outro worker não
+    aparece nele. Por isso só a presença é conclusiva e, por padrão, cada
+    ausência é confirmada no banco. authoritative=True dispensa essa
+    consulta e só é seguro com um único processo.
+    """
+
+    def __init__(
+        self,
+        authoritative: bool = False,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._authoritative = authoritative
+        self.clock = clock
+        self.loaded = False
+        self._revoked: set[int] = set()
+        self._expirations: list[tuple[float, int]] = []
+
+    @property
+    def authoritative(self) -> bool:
+        # Antes de carregar a tabela o índice não sabe nada
+        return self._authoritative and self.loaded
+
+    @staticmethod
+    def _key(jti: str) -> int | None:
+        try:
+            return UUID(str(jti)).int
+        except ValueError:
+            return None
+
+    def add(self, jti: str, expires_at: datetime | float) -> None:
+        key = self._key(jti)
+        if key is None:
+            return
+        self.prune()
+        expires = _as_timestamp(expires_at)
+        if expires <= self.clock():
+            return
+        self._revoked.add(key)
+        heapq.heappush(self._expirations, (expires, key))
+
+    def __contains__(self, jti: object) -> bool:
+        key = self._key(str(jti))
+        return key is not None and key in self._revoked
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def prune(self) -> int:
+        now = self.clock()
+        removed = 0
+        while self._expirations and self._expirations[0][0] <= now:
+            _, key = heapq.heappop(self._expirations)
+            self._revoked.discard(key)
+            removed += 1
+        return removed
+
+    async def load(
+        self, user_crud: UserCRUD, async_transaction: AsyncSession
+    ) -> int:
+        now = datetime.fromtimestamp(self.clock(), UTC)
+        rows = await user_crud.get_active_revoked_tokens(
+            now=now, async_transaction=async_transaction
+        )
+        for token_id, expires_at in rows:
+            self.add(token_id, expires_at)
+        self.loaded = True
+        return len(self._revoked)
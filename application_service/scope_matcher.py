@@ -0,0 +1,77 @@
+import functools
+from collections.abc import Container, Iterable
+
+WILDCARD = '*'
+
+
+def _implied_by(implies: dict[str, list[str]]) -> dict[str, frozenset[str]]:
+    """{'admin': ['write'], 'write': ['view']} -> view: {write, admin}, ..."""
+    inverted: dict[str, set[str]] = {}
+    for action in implies:
+        stack, seen = list(implies[action]), set()
+        while stack:
+            implied = stack.pop()
+            if implied in seen or implied == action:
+                continue
+            seen.add(implied)
+            inverted.setdefault(implied, set()).add(action)
+            stack.extend(implies.get(implied, ()))
+    return {action: frozenset(by) for action, by in inverted.items()}
+
+
+class ScopeMatcher:
+    """
+    Confere os escopos exigidos por uma rota contra os do token, com
+    curingas e hierarquia de ações. Escopos têm a forma 'recurso:ação':
+
+        users:*   qualquer ação em users
+        *:view    view em qualquer recurso
+        *         tudo
+
+    `implies` mapeia uma ação para as que ela concede: com
+    {'write': ['view']}, users:write atende uma rota que exige users:view.
+    A hierarquia é transitiva e vale para qualquer recurso.
+
+    Cada requisito é compilado uma vez (e em cache) no conjunto de escopos
+    que o atenderiam; a checagem é um punhado de buscas no Container do
+    token (frozenset ou bitmap), sem depender de quantos escopos o usuário
+    tem.
+    """
+
+    def __init__(
+        self,
+        implies: dict[str, list[str]] | None = None,
+        cache_size: int = 1024,
+    ):
+        self._implied_by = _implied_by(implies or {})
+        self.compile = functools.lru_cache(maxsize=cache_size)(self._compile)
+
+    def candidates(self, scope: str) -> frozenset[str]:
+        """Escopos concedidos que atendem `scope`."""
+        resource, separator, action = scope.partition(':')
+        if not separator:
+            return frozenset({scope, WILDCARD})
+        actions = {action, WILDCARD} | self._implied_by.get(action, set())
+        return frozenset(
+            {
+                f'{granted_resource}:{granted_action}'
+                for granted_resource in (resource, WILDCARD)
+                for granted_action in actions
+            }
+            | {WILDCARD}
+        )
+
+    def _compile(self, required: tuple[str, ...]) -> tuple[frozenset, ...]:
+        return tuple(self.candidates(scope) for scope in required)
+
+    def allows(self, granted: Container[str], required: Iterable[str]) -> bool:
+        return all(
+            any(scope in granted for scope in candidates)
+            for candidates in self.compile(tuple(required))
+        )
+
+    def warm(self, requirements: Iterable[tuple[str, ...]]) -> int:
+        """Compila os requisitos das rotas na subida da aplicação."""
+        for required in requirements:
+            self.compile(tuple(required))
+        return self.compile.cache_info().currsize
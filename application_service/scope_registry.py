@@ -0,0 +1,152 @@
+import asyncio
+import base64
+import hashlib
+import json
+from collections.abc import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from infra_repository.crud import UserCRUD
+
+BITMAP = 'b'
+VARINTS = 'v'
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def _encode_varints(ids: list[int]) -> bytes:
+    out = bytearray()
+    previous = 0
+    for value in ids:
+        delta, previous = value - previous, value
+        while delta >= 0x80:
+            out.append(delta & 0x7F | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
+
+
+def _decode_varints(data: bytes) -> int:
+    mask = current = delta = shift = 0
+    for byte in data:
+        delta |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            current += delta
+            mask |= 1 << current
+            delta = shift = 0
+    if shift:
+        raise ValueError('varint incompleto')
+    return mask
+
+
+class GrantedScopes:
+    """Escopos de um token compacto; `scope in granted` é um teste de bit."""
+
+    def __init__(self, registry: 'ScopeRegistry', mask: int):
+        self.registry = registry
+        self.mask = mask
+
+    def __contains__(self, scope: object) -> bool:
+        if not isinstance(scope, str):
+            return False
+        bit = self.registry.id_by_scope.get(scope)
+        return bit is not None and self.mask >> bit & 1 == 1
+
+    def __bool__(self) -> bool:
+        return self.mask != 0
+
+
+class ScopeRegistry:
+    """
+    Tabela permission id -> scope para a claim compacta do access token.
+    Cada escopo é o bit de número igual ao id da sua permission; a claim
+    'pmap' leva esse conjunto no menor de dois formatos:
+
+        'b' + base64url(bitmap little-endian, bit i = permission i)
+        'v' + base64url(varints LEB128 das diferenças entre ids ordenados)
+
+    e 'pver' a versão do registro usada na emissão. O registro é publicado
+    em /.well-known/scopes.json para verificadores externos. Os ids não
+    mudam entre versões, então um token continua válido com um registro
+    mais novo.
+    """
+
+    def __init__(self, scopes: dict[int, str] | None = None):
+        self.known_versions: set[str] = set()
+        self._lock = asyncio.Lock()
+        self._set(scopes or {})
+
+    def _set(self, scopes: dict[int, str]) -> None:
+        self.id_by_scope = {scope: bit for bit, scope in scopes.items()}
+        body = json.dumps(
+            {str(bit): scopes[bit] for bit in sorted(scopes)},
+            separators=(',', ':'),
+        )
+        self.version = hashlib.sha256(body.encode()).hexdigest()[:16]
+        self.registry_json = (
+            f'{{"version":"{self.version}","scopes":{body}}}'.encode()
+        )
+        self.etag = f'"{self.version}"'
+        self.known_versions.add(self.version)
+
+    async def load(
+        self, user_crud: UserCRUD, async_transaction: AsyncSession
+    ) -> int:
+        rows = await user_crud.get_permission_scopes(
+            async_transaction=async_transaction
+        )
+        self._set(dict(rows))
+        return len(rows)
+
+    async def refresh(
+        self,
+        version: str,
+        user_crud: UserCRUD,
+        async_transaction: AsyncSession,
+    ) -> None:
+        """
+        Recarrega ao ver um token de versão desconhecida (emitido por
+        outro worker após uma permission nova). Cada versão recarrega uma
+        vez só, mesmo que continue desconhecida depois da carga.
+        """
+        async with self._lock:
+            if version in self.known_versions:
+                return
+            await self.load(user_crud, async_transaction)
+            self.known_versions.add(version)
+
+    def covers(self, scopes: Iterable[str]) -> bool:
+        return all(scope in self.id_by_scope for scope in scopes)
+
+    def encode(self, scopes: Iterable[str]) -> str:
+        """Levanta KeyError para escopos fora do registro."""
+        ids = sorted({self.id_by_scope[scope] for scope in scopes})
+        mask = 0
+        for bit in ids:
+            mask |= 1 << bit
+        bitmap = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+        varints = _encode_varints(ids)
+        if len(bitmap) < len(varints):
+            return BITMAP + _b64encode(bitmap)
+        return VARINTS + _b64encode(varints)
+
+    def granted(self, claim: str) -> GrantedScopes:
+        """Levanta ValueError se a claim estiver malformada."""
+        kind, data = claim[:1], _b64decode(claim[1:])
+        if kind == BITMAP:
+            mask = int.from_bytes(data, 'little')
+        elif kind == VARINTS:
+            mask = _decode_varints(data)
+        else:
+            raise ValueError(f'formato de pmap desconhecido: {kind!r}')
+        return GrantedScopes(self, mask)
+
+    def __len__(self) -> int:
+        return len(self.id_by_scope)
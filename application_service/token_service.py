@@ -1,38 +1,62 @@
+import hashlib
+import time
 from datetime import UTC, datetime, timedelta
 from typing import Any, Protocol, runtime_checkable
 from uuid import uuid4
 
 import jwt
-from jwt import PyJWTError
+from jwt import InvalidKeyError, PyJWTError
 
+from application_service import metrics, phase_timer
+from application_service.cache import TTLCache
+from application_service.key_store import KeyStore
+from application_service.scope_registry import ScopeRegistry
 from domain_entity.exceptions import UnauthorizedException
 from settings import Settings
 
+_ENCODE_SECONDS = metrics.JWT_SECONDS.labels('encode')
+_DECODE_SECONDS = metrics.JWT_SECONDS.labels('decode')
+
 
 class JWTHandler(Protocol):
-    def encode(self, payload: dict, key: str, algorithm: str) -> str:
+    def encode(
+        self,
+        payload: dict,
+        key: Any,
+        algorithm: str,
+        headers: dict[str, Any] | None = None,
+    ) -> str:
         ...   # pragma: no cover
 
     def decode(
         self,
         jwt_token: str,
-        key: str,
+        key: Any,
         algorithm: str,
         options: dict[str, Any] | None = None,
     ) -> dict:
 
         ...   # pragma: no cover1
 
+    def get_unverified_header(self, jwt_token: str) -> dict:
+        ...   # pragma: no cover
+
 
 class JWTLibHandler(JWTHandler):
-    def encode(self, payload: dict, key: str, algorithm: str) -> str:
-        encode = jwt.encode(payload, key, algorithm)
+    def encode(
+        self,
+        payload: dict,
+        key: Any,
+        algorithm: str,
+        headers: dict[str, Any] | None = None,
+    ) -> str:
+        encode = jwt.encode(payload, key, algorithm, headers=headers)
         return encode
 
     def decode(
         self,
         jwt_token: str,
-        key: str,
+        key: Any,
         algorithm: str,
         options: dict[str, Any] | None = None,
     ) -> dict:
@@ -43,6 +67,9 @@ class JWTLibHandler(JWTHandler):
 
         return decode
 
+    def get_unverified_header(self, jwt_token: str) -> dict:
+        return jwt.get_unverified_header(jwt_token)
+
 
 @runtime_checkable
 class TokenService(Protocol):
@@ -62,14 +89,31 @@ class TokenService(Protocol):
     ) -> str:
         ...   # pragma: no cover
 
+    def decode(
+        self, token: str, options: dict[str, Any] | None = None
+    ) -> dict:
+        ...   # pragma: no cover
+
     def decode_token(self, token: str) -> dict:
         ...   # pragma: no cover
 
 
 class JWTTokenService(TokenService):
-    def __init__(self, jwt_handler: JWTHandler, settings: Settings):
+    def __init__(
+        self,
+        jwt_handler: JWTHandler,
+        settings: Settings,
+        key_store: KeyStore | None = None,
+        decoded_cache: TTLCache | None = None,
+        scope_registry: ScopeRegistry | None = None,
+    ):
         self.jwt_handler = jwt_handler
         self.settings = settings
+        self.key_store = key_store
+        # sha256(token) -> claims já verificados
+        self.decoded_cache = decoded_cache
+        # Com registro, os escopos vão na claim compacta 'pmap'
+        self.scope_registry = scope_registry
 
     def create_access_token(
         self,
@@ -84,13 +128,14 @@ class JWTTokenService(TokenService):
 
         to_encode['exp'] = str(int(expire.timestamp()))
         to_encode['token_type'] = 'access'  # nosec: B105
-        to_encode['perms'] = ','.join(permissions)
-
-        encoded_jwt = self.jwt_handler.encode(
-            to_encode, self.settings.SECRET_KEY, self.settings.ALGORITHM
-        )
+        registry = self.scope_registry
+        if registry is not None and registry.covers(permissions):
+            to_encode['pmap'] = registry.encode(permissions)
+            to_encode['pver'] = registry.version
+        else:
+            to_encode['perms'] = ','.join(permissions)
 
-        return encoded_jwt
+        return self._encode(to_encode)
 
     def create_refresh_token(
         self, username: str, expires_delta: timedelta | None = None
@@ -102,16 +147,79 @@ class JWTTokenService(TokenService):
         to_encode = {'sub': username, 'exp': expire, 'token_type': 'refresh'}
         to_encode['jti'] = str(uuid4())
 
-        encoded_jwt = self.jwt_handler.encode(
-            to_encode, self.settings.SECRET_KEY, self.settings.ALGORITHM
+        return self._encode(to_encode)
+
+    def _encode(self, payload: dict) -> str:
+        started = time.perf_counter()
+        try:
+            return self._sign(payload)
+        finally:
+            elapsed = time.perf_counter() - started
+            _ENCODE_SECONDS.observe(elapsed)
+            phase_timer.record('jwt', elapsed)
+
+    def _sign(self, payload: dict) -> str:
+        signing_key = self.key_store.signing_key if self.key_store else None
+        if signing_key is None:
+            return self.jwt_handler.encode(
+                payload, self.settings.SECRET_KEY, self.settings.ALGORITHM
+            )
+
+        return self.jwt_handler.encode(
+            payload,
+            signing_key.private_key,
+            signing_key.algorithm,
+            headers={'kid': signing_key.kid},
         )
 
-        return encoded_jwt
+    def decode(
+        self, token: str, options: dict[str, Any] | None = None
+    ) -> dict:
+        """
+        Valida o token com a chave indicada pelo kid do header. Tokens sem
+        kid são validados com o SECRET_KEY compartilhado. Levanta
+        PyJWTError se o token for inválido.
+        """
+        key, algorithm = self.settings.SECRET_KEY, self.settings.ALGORITHM
+
+        if self.key_store is not None and len(self.key_store):
+            kid = self.jwt_handler.get_unverified_header(token).get('kid')
+            if kid is not None:
+                verification_key = self.key_store.get(kid)
+                if verification_key is None:
+                    raise InvalidKeyError(f'kid desconhecido: {kid}')
+                key = verification_key.public_key
+                algorithm = verification_key.algorithm
+            elif not key:
+                raise InvalidKeyError('Token sem kid')
+
+        started = time.perf_counter()
+        try:
+            return self.jwt_handler.decode(token, key, algorithm, options)
+        finally:
+            elapsed = time.perf_counter() - started
+            _DECODE_SECONDS.observe(elapsed)
+            phase_timer.record('jwt', elapsed)
 
     def decode_token(self, token: str) -> dict:
-        try:
-            return self.jwt_handler.decode(
-                token, self.settings.SECRET_KEY, self.settings.ALGORITHM
-            )
-        except PyJWTError as err:
-            raise UnauthorizedException() from err
+        if self.decoded_cache is None:
+            try:
+                return self.decode(token)
+            except PyJWTError as err:
+                raise UnauthorizedException() from err
+
+        cache_key = hashlib.sha256(token.encode()).digest()
+        claims = self.decoded_cache.get(cache_key)
+        if claims is None:
+            try:
+                claims = self.decode(token)
+            except PyJWTError as err:
+                raise UnauthorizedException() from err
+
+            # A entrada nunca sobrevive ao exp do próprio token
+            if claims.get('exp') is not None:
+                self.decoded_cache.set(
+                    cache_key, claims, ttl=float(claims['exp']) - time.time()
+                )
+
+        return dict(claims)
@@ -0,0 +1,234 @@
+import asyncio
+import codecs
+import csv
+import json
+import logging
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from application_service.auth_service import AsyncHasherProtocol
+from domain_entity.schemas import UserCreateDTO
+from infra_repository.crud import UserCRUD
+
+logger = logging.getLogger(__name__)
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """
+    Quebra o corpo em linhas conforme os chunks chegam, sem juntar o
+    arquivo inteiro em memória.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line.rstrip('\r')
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending.rstrip('\r')
+
+
+async def parse_ndjson(
+    chunks: AsyncIterable[bytes],
+) -> AsyncIterator[tuple[int, Any]]:
+    """
+    Um objeto JSON por linha. Retorna (número da linha, objeto); linhas
+    com JSON inválido retornam a exceção no lugar do objeto.
+    """
+    line_number = 0
+    async for line in iter_lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as err:
+            yield line_number, err
+
+
+async def parse_csv(
+    chunks: AsyncIterable[bytes],
+) -> AsyncIterator[tuple[int, Any]]:
+    """
+    CSV com cabeçalho na primeira linha (username, email, fullname,
+    pwd_plain, confirm_pwd_plain). Campos com quebra de linha não são
+    suportados.
+    """
+    header = None
+    line_number = 0
+    async for line in iter_lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        yield line_number, dict(zip(header, values, strict=False))
+
+
+class UserImporter:
+    """
+    Importação em massa de usuários. As linhas são processadas em lotes de
+    `batch_size`: validação com UserCreateDTO, checagem de duplicados com
+    uma consulta por lote, hashes em paralelo no executor do hasher e um
+    INSERT de várias linhas. Cada lote roda na própria transação, então os
+    lotes anteriores continuam gravados se um lote posterior falhar.
+    """
+
+    def __init__(
+        self,
+        hasher: AsyncHasherProtocol,
+        user_crud: UserCRUD,
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: int,
+    ):
+        self.hasher = hasher
+        self.user_crud = user_crud
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+
+    async def run(
+        self, rows: AsyncIterable[tuple[int, Any]]
+    ) -> AsyncIterator[dict]:
+        """
+        Recebe (número da linha, dados) e retorna um resultado por linha:
+        {'line', 'status': created|duplicate|invalid|error, ...}.
+        """
+        batch: list[tuple[int, Any]] = []
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                for result in await self._import_batch(batch):
+                    yield result
+                batch = []
+        if batch:
+            for result in await self._import_batch(batch):
+                yield result
+
+    async def _import_batch(self, batch: list[tuple[int, Any]]) -> list[dict]:
+        results: dict[int, dict] = {}
+        valid: list[tuple[int, UserCreateDTO]] = []
+
+        for line, data in batch:
+            error = self._validate(data)
+            if isinstance(error, str):
+                results[line] = {
+                    'line': line,
+                    'status': 'invalid',
+                    'error': error,
+                }
+            else:
+                valid.append((line, error))
+
+        if valid:
+            try:
+                created = await self._insert_valid(valid, results)
+            except IntegrityError:
+                # Outra requisição gravou o mesmo email entre a checagem e
+                # o INSERT: o lote inteiro é desfeito
+                logger.warning('Conflito ao importar lote de usuários')
+                created = {}
+                for line, user in valid:
+                    results.setdefault(
+                        line,
+                        {
+                            'line': line,
+                            'status': 'error',
+                            'email': user.email,
+                            'error': 'Conflito ao gravar o lote.',
+                        },
+                    )
+            for line, user_id in created.items():
+                results[line]['id'] = user_id
+
+        return [results[line] for line, _ in batch]
+
+    @staticmethod
+    def _validate(data: Any) -> UserCreateDTO | str:
+        if isinstance(data, Exception):
+            return f'JSON inválido: {data}'
+        try:
+            user = UserCreateDTO.model_validate(data)
+        except ValidationError as err:
+            return '; '.join(
+                f"{'.'.join(map(str, e['loc']))}: {e['msg']}"
+                for e in err.errors()
+            )
+        if user.pwd_plain != user.confirm_pwd_plain:
+            return 'As senhas não conferem.'
+        return user
+
+    async def _insert_valid(
+        self,
+        valid: list[tuple[int, UserCreateDTO]],
+        results: dict[int, dict],
+    ) -> dict[int, int]:
+        async with self.session_factory() as session:
+            existing = await self.user_crud.get_existing_identities(
+                emails=[user.email for _, user in valid],
+                usernames=[user.username for _, user in valid],
+                async_transaction=session,
+            )
+        existing_emails, existing_usernames = existing
+
+        to_insert: list[tuple[int, UserCreateDTO]] = []
+        for line, user in valid:
+            # Repetidos dentro do próprio lote também são duplicados
+            if (
+                user.email in existing_emails
+                or user.username in existing_usernames
+            ):
+                results[line] = {
+                    'line': line,
+                    'status': 'duplicate',
+                    'email': user.email,
+                }
+                continue
+            existing_emails.add(user.email)
+            existing_usernames.add(user.username)
+            to_insert.append((line, user))
+
+        if not to_insert:
+            return {}
+
+        # Hash fora da transação: nenhuma conexão fica presa ao bcrypt
+        hashes = await asyncio.gather(
+            *(self.hasher.hash(user.pwd_plain) for _, user in to_insert)
+        )
+
+        async with self.session_factory() as session, session.begin():
+            rows = [
+                {
+                    'username': user.username,
+                    'email': user.email,
+                    'fullname': user.fullname,
+                    'password': pwd_hash,
+                    'active': True,
+                }
+                for (_, user), pwd_hash in zip(to_insert, hashes, strict=True)
+            ]
+            ids = await self.user_crud.insert_users(
+                rows, async_transaction=session
+            )
+            # Usuário novo não tem roles: grava a linha de escopos vazia
+            # para o primeiro login não precisar calculá-la
+            await self.user_crud.replace_effective_scopes(
+                {user_id: [] for user_id in ids}, async_transaction=session
+            )
+
+        created = {}
+        for (line, user), user_id in zip(to_insert, ids, strict=True):
+            results[line] = {
+                'line': line,
+                'status': 'created',
+                'email': user.email,
+            }
+            created[line] = user_id
+        return created
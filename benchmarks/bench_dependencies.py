@@ -0,0 +1,78 @@
+"""
+Micro-benchmark do custo por requisição da montagem do AuthService.
+
+Compara a montagem antiga (Settings(), JWTLibHandler, JWTTokenService,
+BcryptHasher, UserCRUD e AuthService novos a cada requisição) com o
+ServiceContainer criado uma vez no lifespan.
+
+Uso:
+    DB_URL=sqlite+aiosqlite:///:memory: \\
+        python -m benchmarks.bench_dependencies --iterations 20000
+"""
+import argparse
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock
+
+from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api_presentation.container import ServiceContainer
+from application_service.auth_service import (
+    AuthService,
+    BcryptHasher,
+    ExecutorHasher,
+)
+from application_service.token_service import JWTLibHandler, JWTTokenService
+from infra_repository.crud import UserCRUD
+from infra_repository.db import db_handler
+from settings import Settings
+
+_crypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+# Não cria threads até o primeiro hash; nenhuma chamada aqui faz hash
+_executor = ThreadPoolExecutor(max_workers=1)
+
+
+def per_request(db: AsyncSession) -> AuthService:
+    # Montagem feita antes do container, a cada requisição
+    settings = Settings()
+    token_service = JWTTokenService(
+        jwt_handler=JWTLibHandler(), settings=settings
+    )
+    return AuthService(
+        hasher=ExecutorHasher(
+            hasher=BcryptHasher(context=_crypt_context), executor=_executor
+        ),
+        user_crud=UserCRUD(),
+        db=db,
+        settings=settings,
+        token_service=token_service,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--iterations', type=int, default=20_000)
+    args = parser.parse_args()
+
+    db = AsyncMock(spec=AsyncSession)
+    container = ServiceContainer(Settings(), db_handler)
+
+    results = {
+        'per_request': timeit.timeit(
+            lambda: per_request(db), number=args.iterations
+        ),
+        'container': timeit.timeit(
+            lambda: container.auth_service(db), number=args.iterations
+        ),
+    }
+    container.close()
+
+    for name, total in results.items():
+        print(f'{name:>12}: {total / args.iterations * 1e6:9.2f} µs/req')
+    saved = (results['per_request'] - results['container']) / args.iterations
+    print(f'{"economia":>12}: {saved * 1e6:9.2f} µs/req')
+
+
+if __name__ == '__main__':
+    main()
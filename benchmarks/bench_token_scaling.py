@@ -0,0 +1,384 @@
+"""
+Custo da emissão e validação de tokens em função de roles por usuário e
+permissions por role.
+
+Para cada ponto da grade (R roles, cada uma com P permissions próprias,
+ou seja R x P escopos) cria um banco limpo e mede, chamando o AuthService
+diretamente como uma requisição faria:
+
+    login          authenticate_get_token com user_effective_scopes pronto
+    login_cold     login logo após mudar as roles (escopos recalculados)
+    refresh        refresh_access_token
+    current_user   get_current_active_user, sem cache de principal
+
+Por fluxo: latência p50/p95, consultas e linhas lidas do banco por
+chamada, memória alocada (pico do tracemalloc) e tamanho do access token.
+O bcrypt usa custo mínimo para não esconder o resto do fluxo. Com
+--compact-scopes os tokens levam a claim compacta (TOKEN_COMPACT_SCOPES).
+
+Uso:
+    python -m benchmarks.bench_token_scaling --roles 1,10,50 \\
+        --permissions 1,10,50 --output base.json
+    python -m benchmarks.bench_token_scaling --compare base.json \\
+        --max-regression 0.25
+
+Com --compare o processo termina com código 1 se latência, linhas ou
+memória de algum ponto piorarem além de --max-regression.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+from fastapi.security import SecurityScopes
+from passlib.context import CryptContext
+from sqlalchemy import delete, event, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.pool import StaticPool
+
+from application_service import query_counter
+from application_service.auth_service import (
+    AuthService,
+    BcryptHasher,
+    ExecutorHasher,
+)
+from application_service.scope_registry import ScopeRegistry
+from application_service.token_service import JWTLibHandler, JWTTokenService
+from benchmarks.load_test import git_revision, percentile
+from benchmarks.seed_data import BulkWriter, permission_rows, role_rows
+from domain_entity.models import (
+    Base,
+    Permission,
+    Role,
+    User,
+    UserEffectiveScopes,
+    role_permission,
+    user_role,
+)
+from infra_repository.crud import UserCRUD
+
+USERNAME = 'bench_scaling'
+PASSWORD = 'bench-password'
+FLOWS = ('login', 'login_cold', 'refresh', 'current_user')
+# Métricas verificadas com --compare
+COMPARED = ('p50_ms', 'queries', 'rows', 'alloc_kib', 'token_bytes')
+
+
+def parse_sizes(value: str) -> list[int]:
+    return [int(size) for size in value.split(',')]
+
+
+class CountingSession(Session):
+    """Sessão do benchmark; o RowCounter escuta só esta classe."""
+
+
+class RowCounter:
+    """
+    Linhas lidas pelos SELECTs das sessões do benchmark, inclusive os de
+    selectinload. O do_orm_execute executa a consulta e congela o
+    resultado para contá-lo antes de devolvê-lo ao chamador, então não
+    depende do driver. `selects` permite conferir que a contagem viu as
+    consultas medidas.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.selects = 0
+        event.listen(CountingSession, 'do_orm_execute', self._on_execute)
+
+    def _on_execute(self, state: ORMExecuteState):
+        if not state.is_select:
+            return None
+        frozen = state.invoke_statement().freeze()
+        self.selects += 1
+        self.rows += len(frozen().all())
+        return frozen()
+
+    def close(self) -> None:
+        event.remove(CountingSession, 'do_orm_execute', self._on_execute)
+
+
+async def populate(engine, roles: int, permissions: int) -> None:
+    """Um usuário com `roles` roles de `permissions` permissions cada."""
+    pwd_hash = CryptContext(schemes=['bcrypt'], bcrypt__rounds=4).hash(
+        PASSWORD
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        writer = BulkWriter(conn)
+        await writer.write(
+            Permission.__table__,
+            ('id', 'scope', 'description'),
+            list(permission_rows(1, roles * permissions)),
+        )
+        await writer.write(
+            Role.__table__,
+            ('id', 'name', 'description'),
+            list(role_rows(1, roles)),
+        )
+        await writer.write(
+            role_permission,
+            ('role_id', 'permission_id'),
+            [
+                (role_id, (role_id - 1) * permissions + n + 1)
+                for role_id in range(1, roles + 1)
+                for n in range(permissions)
+            ],
+        )
+        await conn.execute(
+            insert(User).values(
+                id=1,
+                username=USERNAME,
+                email=f'{USERNAME}@bench.test',
+                fullname='Bench',
+                password=pwd_hash,
+                active=True,
+            )
+        )
+        await writer.write(
+            user_role,
+            ('user_id', 'role_id'),
+            [(1, role_id) for role_id in range(1, roles + 1)],
+        )
+
+
+class Scenario:
+    """Um ponto da grade: banco populado e um AuthService por chamada."""
+
+    def __init__(self, engine, settings):
+        self.engine = engine
+        self.factory = async_sessionmaker(
+            engine, expire_on_commit=False, sync_session_class=CountingSession
+        )
+        self.rows = RowCounter()
+        self.settings = settings
+        self.user_crud = UserCRUD()
+        self.scope_registry = None
+        if settings.TOKEN_COMPACT_SCOPES:
+            self.scope_registry = ScopeRegistry()
+        self.token_service = JWTTokenService(
+            jwt_handler=JWTLibHandler(),
+            settings=settings,
+            scope_registry=self.scope_registry,
+        )
+        self.hasher = ExecutorHasher(
+            hasher=BcryptHasher(context=CryptContext(schemes=['bcrypt'])),
+            executor=ThreadPoolExecutor(max_workers=1),
+        )
+        self.form = SimpleNamespace(username=USERNAME, password=PASSWORD)
+        self.tokens = None
+
+    async def call(self, flow: str) -> None:
+        async with self.factory() as session:
+            service = AuthService(
+                hasher=self.hasher,
+                user_crud=self.user_crud,
+                db=session,
+                settings=self.settings,
+                token_service=self.token_service,
+                scope_registry=self.scope_registry,
+            )
+            if flow in ('login', 'login_cold'):
+                self.tokens = await service.authenticate_get_token(self.form)
+            elif flow == 'refresh':
+                self.tokens = await service.refresh_access_token(
+                    self.tokens.refresh_token
+                )
+            else:
+                await service.get_current_active_user(
+                    self.tokens.access_token, SecurityScopes(['res0000:list'])
+                )
+            await session.commit()
+
+    async def prepare(self, flow: str) -> None:
+        # Fora da medição: o que a chamada anterior deixou pronto
+        if flow == 'login_cold':
+            async with self.engine.begin() as conn:
+                await conn.execute(delete(UserEffectiveScopes))
+        elif self.tokens is None:
+            await self.call('login')
+
+    async def measure(self, flow: str, iterations: int) -> dict:
+        latencies, queries, rows = [], 0, 0
+        for _ in range(iterations):
+            await self.prepare(flow)
+            rows_before, selects_before = self.rows.rows, self.rows.selects
+            with query_counter.track_queries() as stats:
+                started = time.perf_counter()
+                await self.call(flow)
+                latencies.append(time.perf_counter() - started)
+            if stats.count and self.rows.selects == selects_before:
+                # Sem isso --compare nunca acusaria regressão de linhas
+                raise RuntimeError(
+                    f'{flow}: {stats.count} consultas sem linhas contadas'
+                )
+            queries += stats.count
+            rows += self.rows.rows - rows_before
+
+        # Memória em uma chamada à parte: o tracemalloc distorce o tempo
+        await self.prepare(flow)
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            await self.call(flow)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+            'queries': round(queries / iterations, 2),
+            'rows': round(rows / iterations, 2),
+            'alloc_kib': round((peak - baseline) / 1024, 1),
+            'token_bytes': len(self.tokens.access_token),
+        }
+
+    def close(self) -> None:
+        self.rows.close()
+        self.hasher.executor.shutdown()
+
+
+async def run_point(
+    db_url: str, roles: int, permissions: int, iterations: int, settings
+) -> dict:
+    engine = create_async_engine(
+        db_url,
+        poolclass=StaticPool if db_url.endswith(':memory:') else None,
+    )
+    try:
+        await populate(engine, roles, permissions)
+        scenario = Scenario(engine, settings)
+        if scenario.scope_registry is not None:
+            async with scenario.factory() as session:
+                await scenario.scope_registry.load(scenario.user_crud, session)
+        try:
+            flows = {
+                flow: await scenario.measure(flow, iterations)
+                for flow in FLOWS
+            }
+        finally:
+            scenario.close()
+    finally:
+        await engine.dispose()
+    return {
+        'roles': roles,
+        'permissions': permissions,
+        'scopes': roles * permissions,
+        'flows': flows,
+    }
+
+
+def regressions(
+    report: dict, baseline: dict, max_regression: float
+) -> list[str]:
+    found = []
+    for key, point in report['points'].items():
+        previous = baseline.get('points', {}).get(key)
+        if previous is None:
+            continue
+        for flow, row in point['flows'].items():
+            before = previous['flows'].get(flow, {})
+            for metric in COMPARED:
+                old, new = before.get(metric), row[metric]
+                if old and new > old * (1 + max_regression):
+                    found.append(
+                        f'{key} {flow} {metric}: {old} -> {new} '
+                        f'({new / old - 1:+.1%})'
+                    )
+    return found
+
+
+def print_report(report: dict) -> None:
+    header = (
+        f"{'RxP':<10}{'escopos':>8} {'fluxo':<14}{'p50ms':>9}{'p95ms':>9}"
+        f"{'queries':>9}{'linhas':>9}{'KiB':>9}{'token':>8}"
+    )
+    print(header)
+    print('-' * len(header))
+    for key, point in report['points'].items():
+        for flow, row in point['flows'].items():
+            print(
+                f"{key:<10}{point['scopes']:>8} {flow:<14}"
+                f"{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}"
+                f"{row['queries']:>9}{row['rows']:>9}"
+                f"{row['alloc_kib']:>9}{row['token_bytes']:>8}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument(
+        '--db-url',
+        default=None,
+        help='padrão: DB_URL do ambiente ou SQLite em memória; '
+        'as tabelas são recriadas a cada ponto',
+    )
+    parser.add_argument('--roles', type=parse_sizes, default=[1, 10, 50])
+    parser.add_argument('--permissions', type=parse_sizes, default=[1, 10, 50])
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--output', type=Path)
+    parser.add_argument('--compare', type=Path, help='JSON de uma execução')
+    parser.add_argument('--max-regression', type=float, default=0.25)
+    parser.add_argument('--compact-scopes', action='store_true')
+    args = parser.parse_args()
+
+    db_url = (
+        args.db_url
+        or os.environ.get('DB_URL')
+        or 'sqlite+aiosqlite:///:memory:'
+    )
+    os.environ.setdefault('DB_URL', db_url)
+    os.environ.setdefault('SECRET_KEY', 'bench-secret-key-' + 'x' * 32)
+    os.environ.setdefault('ALGORITHM', 'HS256')
+    if args.compact_scopes:
+        os.environ['TOKEN_COMPACT_SCOPES'] = 'true'
+    from settings import Settings
+
+    settings = Settings()
+    query_counter.install()
+
+    async def sweep() -> dict:
+        return {
+            f'{roles}x{permissions}': await run_point(
+                db_url, roles, permissions, args.iterations, settings
+            )
+            for roles in args.roles
+            for permissions in args.permissions
+        }
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'config': {
+            'db_url': db_url.split('@')[-1],
+            'iterations': args.iterations,
+            'compact_scopes': settings.TOKEN_COMPACT_SCOPES,
+        },
+        'points': asyncio.run(sweep()),
+    }
+    print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        found = regressions(report, baseline, args.max_regression)
+        for line in found:
+            print(f'regressão: {line}')
+        if found:
+            sys.exit(1)
+        print(f'sem regressões vs {baseline.get("revision")}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,459 @@
+"""
+Teste de carga ponta a ponta dos fluxos de autenticação.
+
+Sobe o main.app em processo (httpx.ASGITransport) ou em um uvicorn local,
+popula o banco com usuários de teste e dispara uma mistura de requisições
+com N usuários virtuais concorrentes. Reporta p50/p95/p99, requisições por
+segundo e taxa de erro por rota e grava o resultado em JSON para comparar
+commits.
+
+Uso:
+    python -m benchmarks.load_test --concurrency 32 --duration 30 \\
+        --output resultado.json
+    python -m benchmarks.load_test --mode uvicorn --compare resultado.json
+    DB_URL=postgresql+asyncpg://... python -m benchmarks.load_test
+
+Sem DB_URL no ambiente usa um arquivo SQLite temporário. Os rate limits
+são desligados, a menos que --keep-rate-limits seja passado.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+PASSWORD = 'bench-password'
+USERNAME_PREFIX = 'bench_'
+READER_SCOPE = 'users:view'
+
+# rota -> peso padrão na mistura
+DEFAULT_MIX = {
+    'auth-token': 1,
+    'refresh': 2,
+    'logout': 1,
+    'me': 10,
+    'get_users': 4,
+}
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for item in value.split(','):
+        route, _, weight = item.partition('=')
+        if route not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f'rota desconhecida: {route}')
+        mix[route] = int(weight or 1)
+    return mix
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """
+    Precisa rodar antes de importar main: o db_handler é criado no import
+    com o DB_URL do ambiente.
+    """
+    if not os.environ.get('DB_URL'):
+        db_path = Path(tempfile.gettempdir()) / 'auth_api_load_test.db'
+        os.environ['DB_URL'] = f'sqlite+aiosqlite:///{db_path}'
+    os.environ.setdefault('SECRET_KEY', 'load-test-secret-key-' + 'x' * 32)
+    os.environ.setdefault('ALGORITHM', 'HS256')
+    os.environ.setdefault('REVOKED_TOKEN_PURGE_INTERVAL_SECONDS', '0')
+    if not args.keep_rate_limits:
+        for scope in ('AUTH', 'USER'):
+            os.environ[f'{scope}_RATE_LIMIT_PER_IP'] = '0'
+            os.environ[f'{scope}_RATE_LIMIT_PER_USERNAME'] = '0'
+
+
+async def seed(users: int) -> None:
+    """Cria a role de leitura e `users` usuários com a mesma senha."""
+    from passlib.context import CryptContext
+    from sqlalchemy import func, insert, select
+
+    from domain_entity.models import (
+        Permission,
+        Role,
+        User,
+        UserEffectiveScopes,
+        user_role,
+    )
+    from infra_repository.db import db_handler
+
+    await db_handler.create_tables()
+    async with db_handler.session_factory() as session, session.begin():
+        existing = (
+            await session.scalar(
+                select(func.count(User.id)).where(
+                    User.username.startswith(USERNAME_PREFIX)
+                )
+            )
+            or 0
+        )
+        if existing >= users:
+            return
+
+        role = await session.scalar(
+            select(Role).where(Role.name == 'bench-reader')
+        )
+        if role is None:
+            permission = await session.scalar(
+                select(Permission).where(Permission.scope == READER_SCOPE)
+            )
+            role = Role(
+                name='bench-reader',
+                description='leitura (teste de carga)',
+                permissions=[
+                    permission
+                    or Permission(
+                        scope=READER_SCOPE, description='bench users:view'
+                    )
+                ],
+            )
+            session.add(role)
+            await session.flush()
+
+        # Um único hash para todos: o custo do bcrypt fica no login
+        pwd_hash = CryptContext(schemes=['bcrypt']).hash(PASSWORD)
+        ids = (
+            await session.scalars(
+                insert(User).returning(User.id),
+                [
+                    {
+                        'username': f'{USERNAME_PREFIX}{n:06d}',
+                        'email': f'{USERNAME_PREFIX}{n}@load.test',
+                        'fullname': f'Bench {n}',
+                        'password': pwd_hash,
+                        'active': True,
+                    }
+                    for n in range(existing, users)
+                ],
+            )
+        ).all()
+        await session.execute(
+            insert(user_role),
+            [{'user_id': user_id, 'role_id': role.id} for user_id in ids],
+        )
+        await session.execute(
+            insert(UserEffectiveScopes),
+            [{'user_id': user_id, 'scopes': READER_SCOPE} for user_id in ids],
+        )
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    status: dict[int, int] = field(default_factory=lambda: defaultdict(int))
+
+    def record(self, elapsed: float, status: int | None) -> None:
+        self.latencies.append(elapsed)
+        self.status[status or 0] += 1
+        if status is None or status >= 400:
+            self.errors += 1
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    # nearest-rank
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(stats: RouteStats, elapsed: float) -> dict:
+    values = sorted(stats.latencies)
+    count = len(values)
+    return {
+        'requests': count,
+        'rps': round(count / elapsed, 2) if elapsed else 0.0,
+        'error_rate': round(stats.errors / count, 4) if count else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3) if values else 0.0,
+        'status': {str(k): v for k, v in sorted(stats.status.items())},
+    }
+
+
+class VirtualUser:
+    """Um cliente com a própria sessão (access + refresh token)."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        username: str,
+        stats: dict[str, RouteStats],
+    ):
+        self.client = client
+        self.username = username
+        self.stats = stats
+        self.access_token: str | None = None
+        self.refresh_token: str | None = None
+
+    async def _call(self, route: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.stats[route].record(time.perf_counter() - started, None)
+            return None
+        self.stats[route].record(
+            time.perf_counter() - started, response.status_code
+        )
+        return response
+
+    @property
+    def _bearer(self) -> dict:
+        return {'Authorization': f'Bearer {self.access_token}'}
+
+    def _store_tokens(self, response) -> None:
+        if response is not None and response.status_code == 200:
+            body = response.json()
+            self.access_token = body['access_token']
+            self.refresh_token = body['refresh_token']
+
+    async def run(self, route: str) -> None:
+        # Sem sessão, qualquer rota começa pelo login
+        if self.access_token is None:
+            route = 'auth-token'
+
+        if route == 'auth-token':
+            response = await self._call(
+                route,
+                'POST',
+                '/auth/auth-token',
+                data={'username': self.username, 'password': PASSWORD},
+            )
+            self._store_tokens(response)
+        elif route == 'refresh':
+            response = await self._call(
+                route,
+                'POST',
+                '/auth/refresh',
+                json={'refresh_token': self.refresh_token},
+            )
+            self._store_tokens(response)
+        elif route == 'logout':
+            await self._call(
+                route,
+                'POST',
+                '/auth/logout',
+                json={'refresh_token': self.refresh_token},
+                headers=self._bearer,
+            )
+            self.access_token = self.refresh_token = None
+        elif route == 'me':
+            await self._call(route, 'GET', '/users/me', headers=self._bearer)
+        elif route == 'get_users':
+            await self._call(
+                route,
+                'GET',
+                '/users/get_users',
+                params={'limit': 50},
+                headers=self._bearer,
+            )
+
+
+async def drive(
+    client: httpx.AsyncClient, args: argparse.Namespace
+) -> tuple[dict[str, RouteStats], float]:
+    stats: dict[str, RouteStats] = defaultdict(RouteStats)
+    rng = random.Random(args.seed)
+    routes = list(args.mix)
+    weights = [args.mix[route] for route in routes]
+    deadline = time.perf_counter() + args.duration
+    budget = [args.requests]
+
+    def has_budget() -> bool:
+        if args.requests:
+            if budget[0] <= 0:
+                return False
+            budget[0] -= 1
+            return True
+        return time.perf_counter() < deadline
+
+    async def worker(n: int) -> None:
+        user = VirtualUser(
+            client, f'{USERNAME_PREFIX}{n % args.users:06d}', stats
+        )
+        while has_budget():
+            await user.run(rng.choices(routes, weights)[0])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(args.concurrency)))
+    return stats, time.perf_counter() - started
+
+
+async def run_asgi(args: argparse.Namespace):
+    from api_presentation.lifespan import lifespan
+    from main import app
+
+    async with lifespan(app):
+        await seed(args.users)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url='http://load-test'
+        ) as client:
+            return await drive(client, args)
+
+
+async def wait_ready(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get('/health')).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f'servidor em {url} não respondeu em {timeout}s')
+
+
+async def run_http(args: argparse.Namespace):
+    await seed(args.users)
+    server = None
+    url = args.url
+    if url is None:
+        url = f'http://127.0.0.1:{args.port}'
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                '-m',
+                'uvicorn',
+                'main:app',
+                '--port',
+                str(args.port),
+                '--workers',
+                str(args.workers),
+                '--log-level',
+                'warning',
+            ],
+            env=os.environ.copy(),
+        )
+    try:
+        await wait_ready(url)
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(
+            base_url=url, limits=limits, timeout=30
+        ) as client:
+            return await drive(client, args)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: dict, baseline: dict | None) -> None:
+    header = (
+        f"{'rota':<12}{'reqs':>8}{'rps':>10}{'erro%':>8}"
+        f"{'p50ms':>10}{'p95ms':>10}{'p99ms':>10}"
+    )
+    print(header)
+    print('-' * len(header))
+    baseline = baseline or {}
+    for route, row in report['routes'].items():
+        line = (
+            f"{route:<12}{row['requests']:>8}{row['rps']:>10.1f}"
+            f"{row['error_rate'] * 100:>8.2f}{row['p50_ms']:>10.2f}"
+            f"{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+        )
+        previous = baseline.get('routes', {}).get(route)
+        if previous and previous['p95_ms']:
+            delta = row['p95_ms'] / previous['p95_ms'] - 1
+            line += f'   p95 {delta:+.1%} vs {baseline.get("revision")}'
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--mode', choices=('asgi', 'uvicorn'), default='asgi')
+    parser.add_argument(
+        '--url', help='servidor já em execução (ignora --mode)'
+    )
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument(
+        '--requests',
+        type=int,
+        default=0,
+        help='total de requisições; quando > 0 substitui --duration',
+    )
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument(
+        '--mix',
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help='pesos, ex.: me=10,refresh=2,auth-token=1',
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keep-rate-limits', action='store_true')
+    parser.add_argument('--output', type=Path)
+    parser.add_argument('--compare', type=Path, help='JSON de uma execução')
+    args = parser.parse_args()
+
+    configure_environment(args)
+    runner = run_asgi if args.mode == 'asgi' and not args.url else run_http
+    stats, elapsed = asyncio.run(runner(args))
+
+    total = RouteStats()
+    for route_stats in stats.values():
+        total.latencies.extend(route_stats.latencies)
+        total.errors += route_stats.errors
+        for status, count in route_stats.status.items():
+            total.status[status] += count
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'config': {
+            'mode': 'url' if args.url else args.mode,
+            'db_url': os.environ['DB_URL'].split('@')[-1],
+            'concurrency': args.concurrency,
+            'workers': args.workers,
+            'users': args.users,
+            'mix': args.mix,
+        },
+        'elapsed_seconds': round(elapsed, 3),
+        'routes': {
+            route: summarize(stats[route], elapsed)
+            for route in DEFAULT_MIX
+            if route in stats
+        },
+        'total': summarize(total, elapsed),
+    }
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(report, baseline)
+    print(
+        f"total: {report['total']['requests']} reqs em {elapsed:.1f}s, "
+        f"{report['total']['rps']} req/s, "
+        f"erro {report['total']['error_rate']:.2%}"
+    )
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
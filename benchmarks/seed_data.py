@@ -0,0 +1,464 @@
+"""
+Gerador de dados sintéticos para testes de escala.
+
+Popula as tabelas de domain_entity.models com milhões de usuários, milhares
+de roles e permissions, o fan-out de user_roles/role_permissions e um
+backlog de refresh tokens revogados (parte já expirada, para o purge).
+
+Os ids são gerados aqui (sem RETURNING nem ida e volta por linha) e os
+nomes derivam do id, então rodar de novo acrescenta dados sem colidir com
+os anteriores. Todos os usuários usam o mesmo hash bcrypt, calculado uma
+vez. No PostgreSQL via asyncpg as linhas vão por COPY; nos demais bancos,
+por INSERT com várias linhas por comando (executemany em lotes).
+
+A popularidade das roles segue uma distribuição de Zipf: poucas roles
+ficam com a maioria dos usuários, como em uma base real.
+
+Uso:
+    python -m benchmarks.seed_data --users 1000000 --roles 2000 \\
+        --permissions 5000 --roles-per-user 3 --permissions-per-role 20
+    DB_URL=postgresql+asyncpg://... python -m benchmarks.seed_data --reset
+
+Sem DB_URL no ambiente (ou --db-url) usa um arquivo SQLite temporário.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import tempfile
+import time
+import uuid
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import cast
+
+from sqlalchemy import FromClause, Table, event, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from domain_entity.models import (
+    Base,
+    Permission,
+    RevokedRefreshToken,
+    Role,
+    User,
+    UserEffectiveScopes,
+    role_permission,
+    user_role,
+)
+
+PASSWORD = 'seed-password'
+USERNAME_PREFIX = 'seed_'
+# scope = 'resNNNN:<ação>', no mesmo formato 'recurso:ação' da API
+ACTIONS = (
+    'view',
+    'list',
+    'create',
+    'update',
+    'delete',
+    'export',
+    'import',
+    'admin',
+)
+
+
+@dataclass
+class SeedConfig:
+    users: int
+    roles: int
+    permissions: int
+    roles_per_user: int
+    permissions_per_role: int
+    revoked_tokens: int
+    expired_ratio: float
+    batch_size: int
+    zipf_exponent: float
+    effective_scopes: bool
+    seed: int
+
+
+def default_db_url() -> str:
+    db_path = Path(tempfile.gettempdir()) / 'auth_api_seed.db'
+    return os.environ.get('DB_URL') or f'sqlite+aiosqlite:///{db_path}'
+
+
+def batched(rows: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def fan_out(rng: random.Random, mean: int) -> int:
+    """Quantidade por item: uniforme em [0, 2 * mean], média `mean`."""
+    return rng.randint(0, 2 * mean) if mean > 0 else 0
+
+
+def pick(
+    rng: random.Random,
+    ids: list[int],
+    cum_weights: list[float] | None,
+    count: int,
+) -> list[int]:
+    """`count` ids distintos; com cum_weights, sorteados por popularidade."""
+    count = min(count, len(ids))
+    if cum_weights is None:
+        return sorted(rng.sample(ids, count))
+    chosen: set[int] = set()
+    while len(chosen) < count:
+        chosen.update(
+            rng.choices(ids, cum_weights=cum_weights, k=count - len(chosen))
+        )
+    return sorted(chosen)
+
+
+def zipf_cum_weights(size: int, exponent: float) -> list[float]:
+    return list(
+        itertools.accumulate(
+            1 / rank**exponent for rank in range(1, size + 1)
+        )
+    )
+
+
+class BulkWriter:
+    """
+    Escreve lotes de tuplas em uma tabela: COPY no asyncpg, INSERT com
+    várias linhas nos demais drivers. Acumula linhas e tempo por tabela.
+    """
+
+    def __init__(self, conn: AsyncConnection):
+        self.conn = conn
+        self.use_copy = conn.dialect.driver == 'asyncpg'
+        self.rows: dict[str, int] = {}
+        self.seconds: dict[str, float] = {}
+
+    async def write(
+        self,
+        table: FromClause,
+        columns: tuple[str, ...],
+        rows: list[tuple],
+    ) -> None:
+        if not rows:
+            return
+        # __table__ dos modelos é tipado como FromClause
+        table = cast(Table, table)
+        started = time.perf_counter()
+        if self.use_copy:
+            raw = await self.conn.get_raw_connection()
+            assert raw.driver_connection is not None
+            await raw.driver_connection.copy_records_to_table(
+                table.name, records=rows, columns=list(columns)
+            )
+        else:
+            await self.conn.execute(
+                insert(table),
+                [dict(zip(columns, row, strict=True)) for row in rows],
+            )
+        self.rows[table.name] = self.rows.get(table.name, 0) + len(rows)
+        self.seconds[table.name] = self.seconds.get(table.name, 0.0) + (
+            time.perf_counter() - started
+        )
+
+    async def write_all(
+        self,
+        table: FromClause,
+        columns: tuple[str, ...],
+        rows: Iterable[tuple],
+        batch_size: int,
+    ) -> None:
+        for batch in batched(rows, batch_size):
+            await self.write(table, columns, batch)
+
+
+async def next_id(conn: AsyncConnection, column) -> int:
+    return (await conn.scalar(select(func.max(column)))) or 0
+
+
+async def reset_sequences(conn: AsyncConnection) -> None:
+    """Com ids explícitos o serial do PostgreSQL não anda sozinho."""
+    for table in (User, Role, Permission, RevokedRefreshToken):
+        name = table.__tablename__
+        await conn.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), "
+                f'COALESCE((SELECT MAX(id) FROM {name}), 0) + 1, false)'
+            )
+        )
+
+
+def permission_rows(first_id: int, count: int) -> Iterator[tuple]:
+    for perm_id in range(first_id, first_id + count):
+        resource, action = divmod(perm_id, len(ACTIONS))
+        yield (
+            perm_id,
+            f'res{resource:04d}:{ACTIONS[action]}',
+            f'Permissão sintética {perm_id}',
+        )
+
+
+def role_rows(first_id: int, count: int) -> Iterator[tuple]:
+    for role_id in range(first_id, first_id + count):
+        yield role_id, f'seed-role-{role_id}', f'Role sintética {role_id}'
+
+
+def revoked_token_rows(
+    rng: random.Random,
+    first_id: int,
+    config: SeedConfig,
+    user_ids: range,
+    now: datetime,
+) -> Iterator[tuple]:
+    for token_id in range(first_id, first_id + config.revoked_tokens):
+        revoked_at = now - timedelta(seconds=rng.randint(0, 7 * 86400))
+        if rng.random() < config.expired_ratio:
+            expires_at = now - timedelta(seconds=rng.randint(1, 86400))
+        else:
+            expires_at = now + timedelta(seconds=rng.randint(1, 7 * 86400))
+        yield (
+            token_id,
+            str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            rng.choice(user_ids) if user_ids else 0,
+            expires_at,
+            revoked_at,
+        )
+
+
+async def seed(db_url: str, config: SeedConfig, reset: bool = False) -> dict:
+    """Popula o banco e devolve linhas e segundos por tabela."""
+    from passlib.context import CryptContext
+
+    rng = random.Random(config.seed)
+    engine = create_async_engine(db_url)
+    if engine.dialect.name == 'sqlite':
+        # Carga descartável: sem fsync a cada commit
+        @event.listens_for(engine.sync_engine, 'connect')
+        def _fast_sqlite(dbapi_conn, _):
+            cursor = dbapi_conn.cursor()
+            cursor.execute('PRAGMA synchronous=OFF')
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.close()
+
+    started = time.perf_counter()
+    try:
+        async with engine.begin() as conn:
+            if reset:
+                await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+        async with engine.begin() as conn:
+            writer = BulkWriter(conn)
+            first_perm = await next_id(conn, Permission.id) + 1
+            first_role = await next_id(conn, Role.id) + 1
+            first_user = await next_id(conn, User.id) + 1
+            first_token = await next_id(conn, RevokedRefreshToken.id) + 1
+
+            await writer.write_all(
+                Permission.__table__,
+                ('id', 'scope', 'description'),
+                permission_rows(first_perm, config.permissions),
+                config.batch_size,
+            )
+            await writer.write_all(
+                Role.__table__,
+                ('id', 'name', 'description'),
+                role_rows(first_role, config.roles),
+                config.batch_size,
+            )
+
+            # roles x permissions cabe em memória e serve para materializar
+            # user_effective_scopes sem voltar ao banco
+            perm_ids = list(range(first_perm, first_perm + config.permissions))
+            scope_by_perm = {
+                perm_id: scope
+                for perm_id, scope, _ in permission_rows(
+                    first_perm, config.permissions
+                )
+            }
+            perms_by_role = {
+                role_id: pick(
+                    rng,
+                    perm_ids,
+                    None,
+                    fan_out(rng, config.permissions_per_role),
+                )
+                for role_id in range(first_role, first_role + config.roles)
+            }
+            await writer.write_all(
+                role_permission,
+                ('role_id', 'permission_id'),
+                (
+                    (role_id, perm_id)
+                    for role_id, perms in perms_by_role.items()
+                    for perm_id in perms
+                ),
+                config.batch_size,
+            )
+
+        pwd_hash = CryptContext(schemes=['bcrypt']).hash(PASSWORD)
+        role_ids = list(perms_by_role)
+        cum_weights = zipf_cum_weights(len(role_ids), config.zipf_exponent)
+        user_ids = range(first_user, first_user + config.users)
+
+        # Um commit por lote de usuários: a memória e a transação ficam
+        # limitadas ao tamanho do lote
+        for batch in batched(user_ids, config.batch_size):
+            async with engine.begin() as conn:
+                writer.conn = conn
+                users: list[tuple] = []
+                links: list[tuple[int, int]] = []
+                scopes: list[tuple[int, str]] = []
+                for user_id in batch:
+                    username = f'{USERNAME_PREFIX}{user_id:08d}'
+                    users.append(
+                        (
+                            user_id,
+                            username,
+                            f'{username}@seed.test',
+                            f'Seed {user_id}',
+                            pwd_hash,
+                            True,
+                        )
+                    )
+                    roles = pick(
+                        rng,
+                        role_ids,
+                        cum_weights,
+                        fan_out(rng, config.roles_per_user),
+                    )
+                    links.extend((user_id, role_id) for role_id in roles)
+                    if config.effective_scopes:
+                        user_scopes = {
+                            scope_by_perm[perm_id]
+                            for role_id in roles
+                            for perm_id in perms_by_role[role_id]
+                        }
+                        scopes.append((user_id, ','.join(sorted(user_scopes))))
+
+                await writer.write(
+                    User.__table__,
+                    (
+                        'id',
+                        'username',
+                        'email',
+                        'fullname',
+                        'password',
+                        'active',
+                    ),
+                    users,
+                )
+                await writer.write(user_role, ('user_id', 'role_id'), links)
+                await writer.write(
+                    UserEffectiveScopes.__table__,
+                    ('user_id', 'scopes'),
+                    scopes,
+                )
+
+        async with engine.begin() as conn:
+            writer.conn = conn
+            await writer.write_all(
+                RevokedRefreshToken.__table__,
+                ('id', 'token_id', 'user_id', 'expires_at', 'revoked_at'),
+                revoked_token_rows(
+                    rng, first_token, config, user_ids, datetime.now(UTC)
+                ),
+                config.batch_size,
+            )
+            if engine.dialect.name == 'postgresql':
+                await reset_sequences(conn)
+    finally:
+        await engine.dispose()
+
+    return {
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+        'tables': {
+            name: {
+                'rows': rows,
+                'seconds': round(writer.seconds[name], 3),
+                'rows_per_second': round(rows / writer.seconds[name])
+                if writer.seconds[name]
+                else 0,
+            }
+            for name, rows in writer.rows.items()
+        },
+    }
+
+
+def print_report(db_url: str, result: dict) -> None:
+    print(f'banco: {db_url}')
+    print(f'{"tabela":<24}{"linhas":>12}{"seg":>10}{"linhas/s":>12}')
+    for name, table in result['tables'].items():
+        print(
+            f'{name:<24}{table["rows"]:>12}{table["seconds"]:>10.2f}'
+            f'{table["rows_per_second"]:>12}'
+        )
+    print(f'total: {result["elapsed_seconds"]:.2f}s; senha: {PASSWORD}')
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--db-url', default=None)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--roles', type=int, default=1_000)
+    parser.add_argument('--permissions', type=int, default=2_000)
+    parser.add_argument(
+        '--roles-per-user',
+        type=int,
+        default=3,
+        help='média de roles por usuário',
+    )
+    parser.add_argument(
+        '--permissions-per-role',
+        type=int,
+        default=10,
+        help='média de permissions por role',
+    )
+    parser.add_argument('--revoked-tokens', type=int, default=100_000)
+    parser.add_argument(
+        '--expired-ratio',
+        type=float,
+        default=0.5,
+        help='fração dos tokens revogados já expirados',
+    )
+    parser.add_argument('--batch-size', type=int, default=10_000)
+    parser.add_argument(
+        '--zipf-exponent',
+        type=float,
+        default=1.0,
+        help='concentração de usuários nas roles populares (0 = uniforme)',
+    )
+    parser.add_argument(
+        '--skip-effective-scopes',
+        action='store_true',
+        help='não materializa user_effective_scopes (o login calcula)',
+    )
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument(
+        '--reset',
+        action='store_true',
+        help='apaga e recria as tabelas antes de popular',
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    config = SeedConfig(
+        users=args.users,
+        roles=args.roles,
+        permissions=args.permissions,
+        roles_per_user=args.roles_per_user,
+        permissions_per_role=args.permissions_per_role,
+        revoked_tokens=args.revoked_tokens,
+        expired_ratio=args.expired_ratio,
+        batch_size=args.batch_size,
+        zipf_exponent=args.zipf_exponent,
+        effective_scopes=not args.skip_effective_scopes,
+        seed=args.seed,
+    )
+    db_url = args.db_url or default_db_url()
+    print_report(db_url, asyncio.run(seed(db_url, config, reset=args.reset)))
+
+
+if __name__ == '__main__':
+    main()
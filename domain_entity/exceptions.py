@@ -46,8 +46,41 @@ class UserNotFound(AppException):
         )
 
 
+class NotFound(AppException):
+    def __init__(self, message: str = 'Recurso não encontrado'):
+        super().__init__(message, code='AUTH_NOT_FOUND', status_code=404)
+
+
 class BadRequest(AppException):
     def __init__(
         self, message: str = 'Bad Request, avalie a request novamente.'
     ):
         super().__init__(message, code='AUTH_BAD_REQUEST', status_code=400)
+
+
+class ServiceUnavailable(AppException):
+    def __init__(
+        self,
+        message: str = 'Serviço sobrecarregado, tente novamente mais tarde.',
+        retry_after: int = 1,
+    ):
+        super().__init__(
+            message,
+            code='AUTH_SERVICE_UNAVAILABLE',
+            status_code=503,
+            headers={'Retry-After': str(retry_after)},
+        )
+
+
+class TooManyRequests(AppException):
+    def __init__(
+        self,
+        message: str = 'Muitas requisições, tente novamente mais tarde.',
+        retry_after: int = 1,
+    ):
+        super().__init__(
+            message,
+            code='AUTH_RATE_LIMITED',
+            status_code=429,
+            headers={'Retry-After': str(retry_after)},
+        )
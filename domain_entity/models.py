@@ -1,6 +1,15 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Table
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    Text,
+)
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
@@ -16,6 +25,8 @@ user_role = Table(
     Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
     Column('role_id', Integer, ForeignKey('roles.id'), primary_key=True),
+    # A PK (user_id, role_id) só atende buscas por usuário
+    Index('ix_user_roles_role_id', 'role_id'),
 )
 
 # Tabela associativa para Role-Permission
@@ -29,6 +40,7 @@ role_permission = Table(
         ForeignKey('permissions.id'),
         primary_key=True,
     ),
+    Index('ix_role_permissions_permission_id', 'permission_id'),
 )
 
 
@@ -36,7 +48,7 @@ class User(Base):
     __tablename__ = 'users'
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    username: Mapped[str] = mapped_column(String(20))
+    username: Mapped[str] = mapped_column(String(20), unique=True, index=True)
     email: Mapped[str] = mapped_column(unique=True)
     fullname: Mapped[str]
     password: Mapped[str]
@@ -105,13 +117,40 @@ class Permission(Base):
     )
 
 
+class UserEffectiveScopes(Base):
+    """
+    Tablename = 'user_effective_scopes':
+
+    Escopos de um usuário já achatados (roles x permissions), no mesmo
+    formato da claim 'perms' do access token. Mantida pelo AuthService ao
+    atribuir roles ou remover uma role; login e refresh leem uma linha.
+
+        Params
+            user_id: int
+            scopes: str (separados por vírgula)
+            updated_at: datetime
+    """
+
+    __tablename__ = 'user_effective_scopes'
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE'), primary_key=True
+    )
+    scopes: Mapped[str] = mapped_column(Text, default='')
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+
 class RevokedRefreshToken(Base):
     """
     Represents a revoked refresh token entry in the authentication system.
 
     Attributes:
         id (int): Primary key identifier for the revoked token record.
-        token_id (int): Identifier of the refresh token that has been revoked.
+        token_id (str): JWT ID (jti) of the refresh token that has been revoked.
         user_id (int): Identifier of the user associated with the revoked token.
         expires_at (datetime): The original expiration datetime of the refresh token.
         revoked_at (datetime): The datetime when the token was revoked.
@@ -123,10 +162,12 @@ class RevokedRefreshToken(Base):
     """"""
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    token_id: Mapped[int] = mapped_column(nullable=False)
+    token_id: Mapped[str] = mapped_column(
+        String(36), nullable=False, index=True
+    )
     user_id: Mapped[int] = mapped_column(nullable=False)
     expires_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False
+        DateTime(timezone=True), nullable=False, index=True
     )
     revoked_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
@@ -1,8 +1,21 @@
-from sqlalchemy import delete, select
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import cast
+
+from sqlalchemy import CursorResult, delete, func, insert, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm import selectinload
 
-from domain_entity.models import Permission, RevokedRefreshToken, Role, User
+from domain_entity.models import (
+    Permission,
+    RevokedRefreshToken,
+    Role,
+    User,
+    UserEffectiveScopes,
+    role_permission,
+    user_role,
+)
 
 
 class UserCRUD:
@@ -15,6 +28,41 @@ class UserCRUD:
         await async_transaction.refresh(user)
         return user
 
+    @staticmethod
+    async def insert_users(
+        users: list[dict], async_transaction: AsyncSession
+    ) -> list[int]:
+        """
+        INSERT de várias linhas de uma vez. Retorna os ids na mesma ordem
+        de `users`.
+        """
+        if not users:
+            return []
+        result = await async_transaction.execute(
+            insert(User).returning(User.id, sort_by_parameter_order=True),
+            users,
+        )
+        return list(result.scalars())
+
+    @staticmethod
+    async def get_existing_identities(
+        emails: list[str],
+        usernames: list[str],
+        async_transaction: AsyncSession,
+    ) -> tuple[set[str], set[str]]:
+        """Emails e usernames da lista que já estão cadastrados."""
+        result = await async_transaction.execute(
+            select(User.email, User.username).where(
+                or_(User.email.in_(emails), User.username.in_(usernames))
+            )
+        )
+        found_emails: set[str] = set()
+        found_usernames: set[str] = set()
+        for email, username in result:
+            found_emails.add(email)
+            found_usernames.add(username)
+        return found_emails & set(emails), found_usernames & set(usernames)
+
     @staticmethod
     async def delete_user_by_email(
         email: str, async_transaction: AsyncSession
@@ -46,7 +94,7 @@ class UserCRUD:
 
         query = (
             select(User)
-            .options(joinedload(User.roles).joinedload(Role.permissions))
+            .options(selectinload(User.roles).selectinload(Role.permissions))
             .where(User.username == username)
         )
 
@@ -55,12 +103,137 @@ class UserCRUD:
         return result.unique().scalar_one_or_none()
 
     @staticmethod
-    async def get_users(async_transaction: AsyncSession):
+    async def get_principal_by_username(
+        username: str, async_transaction: AsyncSession
+    ) -> User | None:
+        """Só as colunas de users, sem roles e permissions."""
+        query = select(User).where(User.username == username)
+
+        result = await async_transaction.execute(query)
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_user_with_scopes(
+        username: str, async_transaction: AsyncSession
+    ) -> tuple[User, str | None] | None:
+        """
+        Usuário e seus escopos materializados em uma linha, sem carregar
+        roles e permissions. scopes é None quando ainda não foi calculado.
+        """
+        query = (
+            select(User, UserEffectiveScopes.scopes)
+            .outerjoin(
+                UserEffectiveScopes, UserEffectiveScopes.user_id == User.id
+            )
+            .where(User.username == username)
+        )
+        result = await async_transaction.execute(query)
+        row = result.one_or_none()
+        return None if row is None else (row[0], row[1])
+
+    @staticmethod
+    async def compute_effective_scopes(
+        user_ids: list[int], async_transaction: AsyncSession
+    ) -> dict[int, list[str]]:
+        query = (
+            select(user_role.c.user_id, Permission.scope)
+            .join(Role, Role.id == user_role.c.role_id)
+            .join(role_permission, role_permission.c.role_id == Role.id)
+            .join(Permission, Permission.id == role_permission.c.permission_id)
+            .where(user_role.c.user_id.in_(user_ids))
+            .distinct()
+            .order_by(user_role.c.user_id, Permission.scope)
+        )
+        result = await async_transaction.execute(query)
+
+        scopes: dict[int, list[str]] = {user_id: [] for user_id in user_ids}
+        for user_id, scope in result:
+            scopes[user_id].append(scope)
+        return scopes
+
+    @staticmethod
+    async def replace_effective_scopes(
+        scopes_by_user: dict[int, list[str]], async_transaction: AsyncSession
+    ) -> None:
+        if not scopes_by_user:
+            return
+        # Upsert: dois logins simultâneos do mesmo usuário podem gravar a
+        # linha ao mesmo tempo. Só PostgreSQL e SQLite são suportados
+        dialect = async_transaction.get_bind().dialect.name
+        upsert = (
+            postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        )
+        statement = upsert(UserEffectiveScopes)
+        statement = statement.on_conflict_do_update(
+            index_elements=[UserEffectiveScopes.user_id],
+            set_={
+                'scopes': statement.excluded.scopes,
+                'updated_at': func.now(),
+            },
+        )
+        await async_transaction.execute(
+            statement,
+            [
+                {'user_id': user_id, 'scopes': ','.join(scopes)}
+                for user_id, scopes in scopes_by_user.items()
+            ],
+        )
+
+    @staticmethod
+    async def get_users_for_role(
+        role_name: str, async_transaction: AsyncSession
+    ) -> dict[int, str]:
+        """{user_id: username} dos usuários que têm a role."""
+        query = (
+            select(User.id, User.username)
+            .join(user_role, user_role.c.user_id == User.id)
+            .join(Role, Role.id == user_role.c.role_id)
+            .where(Role.name == role_name)
+        )
+        result = await async_transaction.execute(query)
+        return {user_id: username for user_id, username in result.all()}
+
+    @staticmethod
+    def _users_page_query(after_id: int | None, limit: int | None):
+        # Só as colunas do UserFromDBDTO, em ordem de id (keyset)
+        query = select(User.id, User.username, User.email, User.fullname)
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+        query = query.order_by(User.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    @staticmethod
+    async def get_users(
+        async_transaction: AsyncSession,
+        after_id: int | None = None,
+        limit: int | None = None,
+    ):
 
-        query = select(User)
+        query = UserCRUD._users_page_query(after_id, limit)
 
         result = await async_transaction.execute(query)
-        return result.scalars()
+        return result.all()
+
+    @staticmethod
+    async def stream_users(
+        async_transaction: AsyncSession,
+        after_id: int | None = None,
+        limit: int | None = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator:
+        """
+        Lê os usuários com cursor do lado do servidor, `chunk_size` linhas
+        por vez, sem carregar a tabela inteira em memória.
+        """
+        query = UserCRUD._users_page_query(after_id, limit)
+        result = await async_transaction.stream(
+            query.execution_options(yield_per=chunk_size)
+        )
+        async for partition in result.partitions():
+            for row in partition:
+                yield row
 
     @staticmethod
     async def get_permission_by_name(
@@ -70,6 +243,15 @@ class UserCRUD:
         result = await async_transaction.execute(query)
         return result.scalar_one_or_none()
 
+    @staticmethod
+    async def get_permission_scopes(
+        async_transaction: AsyncSession,
+    ) -> list[tuple[int, str]]:
+        result = await async_transaction.execute(
+            select(Permission.id, Permission.scope)
+        )
+        return list(result.all())
+
     @staticmethod
     async def insert_permission(
         permission: Permission, async_transaction: AsyncSession
@@ -121,7 +303,7 @@ class UserCRUD:
     ):
         query = (
             select(User)
-            .options(joinedload(User.roles).joinedload(Role.permissions))
+            .options(selectinload(User.roles).selectinload(Role.permissions))
             .where(User.id == user_id)
         )
         result = await async_transaction.execute(query)
@@ -140,11 +322,40 @@ class UserCRUD:
 
     @staticmethod
     async def is_token_revoked(
-        token_id: int, async_transaction: AsyncSession
+        token_id: str, async_transaction: AsyncSession
     ) -> bool:
         result = await async_transaction.execute(
-            select(RevokedRefreshToken).where(
-                RevokedRefreshToken.id == token_id
+            select(RevokedRefreshToken.id)
+            .where(RevokedRefreshToken.token_id == token_id)
+            .limit(1)
+        )
+        return result.scalar_one_or_none() is not None
+
+    @staticmethod
+    async def get_active_revoked_tokens(
+        now: datetime, async_transaction: AsyncSession
+    ) -> list[tuple[str, datetime]]:
+        result = await async_transaction.execute(
+            select(
+                RevokedRefreshToken.token_id, RevokedRefreshToken.expires_at
+            ).where(RevokedRefreshToken.expires_at > now)
+        )
+        return list(result.all())
+
+    @staticmethod
+    async def delete_expired_revoked_tokens(
+        now: datetime, batch_size: int, async_transaction: AsyncSession
+    ) -> int:
+        batch = (
+            select(RevokedRefreshToken.id)
+            .where(RevokedRefreshToken.expires_at <= now)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = await async_transaction.execute(
+            delete(RevokedRefreshToken).where(
+                RevokedRefreshToken.id.in_(batch)
             )
         )
-        return result.scalars().first() is not None
+        # DELETE devolve um CursorResult, o único com rowcount
+        return cast(CursorResult, result).rowcount
@@ -1,5 +1,12 @@
-from collections.abc import AsyncGenerator
+import itertools
+import logging
+import time
+from collections.abc import AsyncGenerator, Callable
+from pathlib import Path
 
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import Connection, event, make_url, text
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -7,35 +14,218 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
+from application_service import metrics
 from domain_entity.models import Base
 from settings import Settings
 
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / 'alembic.ini'
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool que mede a espera de cada checkout: o tempo que
+    uma sessão ficou parada até receber uma conexão (fila do pool e, se
+    preciso, abertura de uma nova). O logging_name identifica o banco no
+    histograma e sobrevive ao recreate() do dispose.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.acquires = 0
+        self.acquire_seconds = 0.0
+        self.max_acquire_seconds = 0.0
+
+    def connect(self):
+        started = time.perf_counter()
+        connection = super().connect()
+        waited = time.perf_counter() - started
+        self.acquires += 1
+        self.acquire_seconds += waited
+        self.max_acquire_seconds = max(self.max_acquire_seconds, waited)
+        metrics.DB_POOL_ACQUIRE_SECONDS.labels(
+            self.logging_name or 'unknown'
+        ).observe(waited)
+        return connection
+
+    def acquire_stats(self) -> dict:
+        average = self.acquire_seconds / self.acquires if self.acquires else 0
+        return {
+            'count': self.acquires,
+            'avg_ms': round(average * 1000, 3),
+            'max_ms': round(self.max_acquire_seconds * 1000, 3),
+        }
+
+
+def engine_options(
+    settings: Settings, url: str, database: str = 'primary'
+) -> dict:
+    """
+    Parâmetros do create_async_engine a partir do Settings. O SQLite usa
+    pools próprios (StaticPool em memória), então o dimensionamento do
+    pool e a medição do checkout só são aplicados aos demais bancos.
+    """
+    db_url = make_url(url)
+    options: dict = {
+        'echo': settings.DB_ECHO,
+        'pool_pre_ping': settings.DB_POOL_PRE_PING,
+    }
+    if db_url.get_backend_name() != 'sqlite':
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_logging_name=database,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        )
+    if db_url.get_driver_name() == 'asyncpg':
+        options['connect_args'] = {
+            'statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE
+        }
+    return options
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    status: dict = {'pool_class': type(pool).__name__}
+    # Só o QueuePool (e o AsyncAdaptedQueuePool) expõe os contadores
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    if isinstance(pool, TimedQueuePool):
+        status['acquire_wait'] = pool.acquire_stats()
+    return status
+
+
+class Replica:
+    """
+    Engine de uma réplica de leitura. Um erro de conexão marca a réplica
+    como indisponível por `cooldown` segundos; nesse intervalo as leituras
+    vão para as outras réplicas ou para o primário.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        cooldown: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.engine = engine
+        self.session_factory: async_sessionmaker[
+            AsyncSession
+        ] = async_sessionmaker(bind=engine, expire_on_commit=False)
+        self.cooldown = cooldown
+        self._clock = clock
+        self._unhealthy_until = 0.0
+        event.listen(engine.sync_engine, 'handle_error', self._on_error)
+
+    @property
+    def healthy(self) -> bool:
+        return self._clock() >= self._unhealthy_until
+
+    def mark_unhealthy(self) -> None:
+        self._unhealthy_until = self._clock() + self.cooldown
+        logger.warning(
+            'Réplica %s indisponível por %ss',
+            self.engine.url.render_as_string(hide_password=True),
+            self.cooldown,
+        )
+
+    def pool_status(self) -> dict:
+        return pool_status(self.engine)
+
+    def _on_error(self, context) -> None:
+        # Sem connection o erro ocorreu ao conectar; is_disconnect cobre
+        # conexões derrubadas no meio do uso
+        if context.connection is None or context.is_disconnect:
+            self.mark_unhealthy()
+
 
 # Classe de handler de banco de dados.
 class DatabaseHandler:
     def __init__(self, settings: Settings, base: type[DeclarativeBase] = Base):
         self.base = base
         self.engine: AsyncEngine = create_async_engine(
-            settings.DB_URL, echo=True
+            settings.DB_URL, **engine_options(settings, settings.DB_URL)
         )
         self.session_factory: async_sessionmaker[
             AsyncSession
         ] = async_sessionmaker(bind=self.engine, expire_on_commit=False)
+        self.replicas = [
+            Replica(
+                engine=create_async_engine(
+                    url, **engine_options(settings, url, f'replica-{index}')
+                ),
+                cooldown=settings.DB_REPLICA_COOLDOWN_SECONDS,
+            )
+            for index, url in enumerate(settings.DB_REPLICA_URLS)
+        ]
+        self._round_robin = itertools.count()
+
+    def next_replica(self) -> Replica | None:
+        """
+        Próxima réplica saudável em round-robin, ou None quando não há
+        réplicas configuradas ou todas estão em cooldown.
+        """
+        if not self.replicas:
+            return None
+        start = next(self._round_robin)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.healthy:
+                return replica
+        return None
+
+    def read_session_factory(self) -> async_sessionmaker[AsyncSession]:
+        replica = self.next_replica()
+        if replica is None:
+            return self.session_factory
+        return replica.session_factory
 
     async def get_db(self) -> AsyncGenerator[AsyncSession, None]:
         async with self.session_factory() as session:
             yield session
 
+    async def dispose(self) -> None:
+        await self.engine.dispose()
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
     async def create_tables(self) -> None:
         async with self.engine.begin() as conn:
             await conn.run_sync(self.base.metadata.create_all)
 
+    async def run_migrations(self, revision: str = 'head') -> None:
+        """alembic upgrade na conexão do próprio engine."""
+
+        def upgrade(connection: Connection) -> None:
+            config = Config(ALEMBIC_INI)
+            config.attributes['connection'] = connection
+            command.upgrade(config, revision)
+
+        async with self.engine.begin() as conn:
+            await conn.run_sync(upgrade)
+
     async def get_db_session(self) -> AsyncGenerator[AsyncSession, None]:
         async for session in self.get_db():
             yield session
 
+    def pool_status(self) -> dict:
+        return pool_status(self.engine)
 
-settings = Settings()
-db_handler = DatabaseHandler(settings=settings,base=Base)
+    async def ping(self) -> None:
+        """Abre uma conexão do pool e executa SELECT 1."""
+        async with self.engine.connect() as conn:
+            await conn.execute(text('SELECT 1'))
 
+
+settings = Settings()
+db_handler = DatabaseHandler(settings=settings, base=Base)
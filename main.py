@@ -2,12 +2,32 @@ from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
 from api_presentation.auth_router import auth_router
+from api_presentation.health_router import health_router
 from api_presentation.lifespan import lifespan
+from api_presentation.metrics_middleware import MetricsMiddleware
+from api_presentation.metrics_router import metrics_router
+from api_presentation.query_count_middleware import QueryCountMiddleware
 from api_presentation.role_router import role_router
+from api_presentation.server_timing import ServerTimingMiddleware
 from api_presentation.user_router import user_router
+from api_presentation.well_known_router import well_known_router
 from domain_entity.exceptions import AppException
+from settings import Settings
+
+settings = Settings()
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    QueryCountMiddleware,
+    emit_headers=settings.DB_QUERY_COUNT_HEADERS,
+    warn_threshold=settings.DB_QUERY_COUNT_WARNING_THRESHOLD,
+)
+app.add_middleware(
+    ServerTimingMiddleware,
+    always=settings.SERVER_TIMING_ENABLED,
+    token=settings.SERVER_TIMING_TOKEN,
+)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.exception_handler(AppException)
@@ -22,6 +42,11 @@ async def app_exception_handler(request: Request, exc: AppException):
 app.include_router(router=auth_router, prefix='/auth', tags=['auth'])
 app.include_router(router=user_router, prefix='/users', tags=['users'])
 app.include_router(router=role_router, prefix='/roles', tags=['roles'])
+app.include_router(
+    router=well_known_router, prefix='/.well-known', tags=['well-known']
+)
+app.include_router(router=health_router, prefix='/health', tags=['health'])
+app.include_router(router=metrics_router, tags=['metrics'])
 
 
 @app.get('/health')
@@ -0,0 +1,115 @@
+"""jti as string and user_effective_scopes
+
+- revoked_refresh_tokens.token_id passa de Integer para String(36): o jti
+  é um UUID.
+- user_effective_scopes: escopos de cada usuário já achatados. A tabela é
+  preenchida aqui para todos os usuários existentes, então login e
+  refresh só precisam ler uma linha.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from collections.abc import Iterator, Sequence
+from itertools import groupby
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0002'
+down_revision: str | None = '0001'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+users = sa.table('users', sa.column('id', sa.Integer))
+user_roles = sa.table(
+    'user_roles',
+    sa.column('user_id', sa.Integer),
+    sa.column('role_id', sa.Integer),
+)
+role_permissions = sa.table(
+    'role_permissions',
+    sa.column('role_id', sa.Integer),
+    sa.column('permission_id', sa.Integer),
+)
+permissions = sa.table(
+    'permissions',
+    sa.column('id', sa.Integer),
+    sa.column('scope', sa.String),
+)
+
+
+def _effective_scopes(connection: sa.Connection) -> Iterator[dict]:
+    # Mesmo formato do UserCRUD.compute_effective_scopes: sem repetições,
+    # em ordem alfabética; usuário sem roles fica com ''
+    query = (
+        sa.select(users.c.id, permissions.c.scope)
+        .select_from(users)
+        .outerjoin(user_roles, user_roles.c.user_id == users.c.id)
+        .outerjoin(
+            role_permissions,
+            role_permissions.c.role_id == user_roles.c.role_id,
+        )
+        .outerjoin(
+            permissions, permissions.c.id == role_permissions.c.permission_id
+        )
+        .distinct()
+        .order_by(users.c.id, permissions.c.scope)
+    )
+    rows = connection.execute(query)
+    for user_id, group in groupby(rows, key=lambda row: row[0]):
+        scopes = [scope for _, scope in group if scope is not None]
+        yield {'user_id': user_id, 'scopes': ','.join(scopes)}
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('revoked_refresh_tokens') as batch_op:
+        batch_op.alter_column(
+            'token_id',
+            existing_type=sa.Integer(),
+            type_=sa.String(length=36),
+            existing_nullable=False,
+            postgresql_using='token_id::varchar(36)',
+        )
+
+    effective_scopes = op.create_table(
+        'user_effective_scopes',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('scopes', sa.Text(), nullable=False),
+        sa.Column(
+            'updated_at',
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+    batch: list[dict] = []
+    for row in _effective_scopes(op.get_bind()):
+        batch.append(row)
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            op.bulk_insert(effective_scopes, batch)
+            batch = []
+    if batch:
+        op.bulk_insert(effective_scopes, batch)
+
+
+def downgrade() -> None:
+    op.drop_table('user_effective_scopes')
+
+    # No PostgreSQL um jti (UUID) não converte para inteiro; a versão
+    # anterior nem conseguia gravá-los
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DELETE FROM revoked_refresh_tokens')
+    with op.batch_alter_table('revoked_refresh_tokens') as batch_op:
+        batch_op.alter_column(
+            'token_id',
+            existing_type=sa.String(length=36),
+            type_=sa.Integer(),
+            existing_nullable=False,
+            postgresql_using='token_id::integer',
+        )
@@ -0,0 +1,57 @@
+"""hot query indexes
+
+- users.username: único e indexado (login e toda rota protegida filtram
+  por ele). Falha se já houver usernames repetidos; resolva-os antes.
+- revoked_refresh_tokens.token_id: checagem de revogação no refresh.
+- revoked_refresh_tokens.expires_at: carga do índice em memória e purge.
+- user_roles.role_id e role_permissions.permission_id: a PK composta só
+  atende buscas pela primeira coluna.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = '0003'
+down_revision: str | None = '0002'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+    op.create_index(
+        'ix_revoked_refresh_tokens_token_id',
+        'revoked_refresh_tokens',
+        ['token_id'],
+    )
+    op.create_index(
+        'ix_revoked_refresh_tokens_expires_at',
+        'revoked_refresh_tokens',
+        ['expires_at'],
+    )
+    op.create_index('ix_user_roles_role_id', 'user_roles', ['role_id'])
+    op.create_index(
+        'ix_role_permissions_permission_id',
+        'role_permissions',
+        ['permission_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_role_permissions_permission_id', table_name='role_permissions'
+    )
+    op.drop_index('ix_user_roles_role_id', table_name='user_roles')
+    op.drop_index(
+        'ix_revoked_refresh_tokens_expires_at',
+        table_name='revoked_refresh_tokens',
+    )
+    op.drop_index(
+        'ix_revoked_refresh_tokens_token_id',
+        table_name='revoked_refresh_tokens',
+    )
+    op.drop_index('ix_users_username', table_name='users')
@@ -13,3 +13,66 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int = Field(default=7)
     SECRET_KEY: str = Field(default='')
     ALGORITHM: str = Field(default='')
+    HASHER_MAX_WORKERS: int = Field(default=4, ge=1)
+    LOGIN_MAX_CONCURRENCY: int = Field(default=8, ge=1)
+    LOGIN_MAX_QUEUE: int = Field(default=32, ge=0)
+    LOGIN_QUEUE_TIMEOUT_SECONDS: float = Field(default=5.0, ge=0)
+    LOGIN_RETRY_AFTER_SECONDS: int = Field(default=1, ge=1)
+    AUTH_RATE_LIMIT_PER_IP: int = Field(default=60, ge=0)
+    AUTH_RATE_LIMIT_PER_USERNAME: int = Field(default=10, ge=0)
+    AUTH_RATE_LIMIT_WINDOW_SECONDS: float = Field(default=60, gt=0)
+    # Cadastro (POST /users/create-user)
+    USER_RATE_LIMIT_PER_IP: int = Field(default=120, ge=0)
+    USER_RATE_LIMIT_PER_USERNAME: int = Field(default=5, ge=0)
+    USER_RATE_LIMIT_WINDOW_SECONDS: float = Field(default=60, gt=0)
+    RATE_LIMIT_MAX_KEYS: int = Field(default=100_000, ge=1)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = Field(default=30, ge=0)
+    PRINCIPAL_CACHE_MAX_SIZE: int = Field(default=10_000, ge=1)
+    # True só com um único processo: ausências no índice não vão ao banco
+    REVOCATION_INDEX_AUTHORITATIVE: bool = Field(default=False)
+    REVOKED_TOKEN_PURGE_INTERVAL_SECONDS: float = Field(default=3600, ge=0)
+    REVOKED_TOKEN_PURGE_BATCH_SIZE: int = Field(default=1000, ge=1)
+    # Diretório com chaves <kid>.pem (RSA, EC ou Ed25519). Vazio = HS256
+    JWT_KEYS_DIR: str = Field(default='')
+    JWT_ACTIVE_KID: str = Field(default='')
+    JWKS_CACHE_MAX_AGE_SECONDS: int = Field(default=300, ge=0)
+    # Escopos do access token como bitmap/ids de permission (claim 'pmap')
+    # em vez da lista separada por vírgula
+    TOKEN_COMPACT_SCOPES: bool = Field(default=False)
+    SCOPE_REGISTRY_CACHE_MAX_AGE_SECONDS: int = Field(default=300, ge=0)
+    # Ação -> ações que ela concede em qualquer recurso (users:write
+    # atende users:view). JSON no .env
+    SCOPE_IMPLIES: dict[str, list[str]] = Field(
+        default_factory=lambda: {'write': ['view']}
+    )
+    TOKEN_CACHE_TTL_SECONDS: float = Field(default=300, ge=0)
+    TOKEN_CACHE_MAX_SIZE: int = Field(default=10_000, ge=1)
+    DB_ECHO: bool = Field(default=False)
+    DB_POOL_SIZE: int = Field(default=5, ge=1)
+    DB_MAX_OVERFLOW: int = Field(default=10, ge=0)
+    DB_POOL_TIMEOUT_SECONDS: float = Field(default=30, gt=0)
+    DB_POOL_RECYCLE_SECONDS: int = Field(default=1800, ge=-1)
+    DB_POOL_PRE_PING: bool = Field(default=True)
+    DB_STATEMENT_CACHE_SIZE: int = Field(default=100, ge=0)
+    # Lista JSON, ex.: ["postgresql+asyncpg://...", "..."]
+    DB_REPLICA_URLS: list[str] = Field(default_factory=list)
+    DB_REPLICA_COOLDOWN_SECONDS: float = Field(default=30, ge=0)
+    USER_IMPORT_BATCH_SIZE: int = Field(default=500, ge=1)
+    USER_IMPORT_HASHER_MAX_WORKERS: int = Field(default=2, ge=1)
+    USERS_PAGE_SIZE: int = Field(default=100, ge=1)
+    USERS_MAX_PAGE_SIZE: int = Field(default=1000, ge=1)
+    # Aplica as migrações do Alembic no startup em vez do create_all
+    DB_RUN_MIGRATIONS: bool = Field(default=False)
+    # Headers X-DB-Query-Count/X-DB-Query-Time-Ms (só em debug)
+    DB_QUERY_COUNT_HEADERS: bool = Field(default=False)
+    # Warning para requisições com mais consultas que isso; 0 desativa
+    DB_QUERY_COUNT_WARNING_THRESHOLD: int = Field(default=25, ge=0)
+    # Server-Timing em todas as respostas
+    SERVER_TIMING_ENABLED: bool = Field(default=False)
+    # Liga o Server-Timing só nas requisições com X-Server-Timing: <token>
+    SERVER_TIMING_TOKEN: str = Field(default='')
+    # Intervalo das amostras de atraso do event loop; 0 desliga
+    LOOP_LAG_INTERVAL_SECONDS: float = Field(default=0.5, ge=0)
+    LOOP_LAG_WINDOW_SIZE: int = Field(default=600, ge=1)
+    # Bloqueios acima disso têm a pilha registrada; 0 desliga o watchdog
+    LOOP_BLOCK_THRESHOLD_SECONDS: float = Field(default=0, ge=0)
@@ -0,0 +1,82 @@
+from collections.abc import Callable
+from contextlib import contextmanager
+from typing import Any
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from application_service import query_counter
+from domain_entity.models import Base
+
+
+@pytest.fixture
+async def session_factory():
+    """
+    SQLite em memória com as tabelas dos models. O StaticPool mantém uma
+    única conexão, então o banco é o mesmo também nas requisições do
+    TestClient (que rodam em outra thread). Dados de cada teste ficam em
+    fixtures pequenas no próprio arquivo, construídas sobre esta.
+    """
+    engine = create_async_engine(
+        'sqlite+aiosqlite:///:memory:', poolclass=StaticPool
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def make_client():
+    """
+    TestClient de uma aplicação montada só com o que o teste precisa:
+
+        client = make_client(
+            (health_router, '/health'),
+            middleware=[(ServerTimingMiddleware, {'always': True})],
+            overrides={get_container: lambda: container},
+        )
+    """
+
+    def build(
+        *routers: tuple[APIRouter, str],
+        middleware: list[tuple[Any, dict]] | None = None,
+        overrides: dict[Callable, Callable] | None = None,
+    ) -> TestClient:
+        app = FastAPI()
+        for middleware_class, options in middleware or []:
+            app.add_middleware(middleware_class, **options)
+        for router, prefix in routers:
+            app.include_router(router, prefix=prefix)
+        app.dependency_overrides.update(overrides or {})
+        return TestClient(app)
+
+    return build
+
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    Falha o teste se o bloco executar mais que `max_queries` consultas.
+    Vale tanto para chamadas diretas ao service/CRUD quanto para
+    requisições pelo TestClient (o contexto segue para a aplicação):
+
+        with assert_max_queries(3):
+            client.post('/roles/roles', json=...)
+    """
+    query_counter.install()
+
+    @contextmanager
+    def check(max_queries: int):
+        with query_counter.track_queries(keep_statements=True) as stats:
+            yield stats
+        assert (
+            stats.count <= max_queries
+        ), f'{stats.count} consultas (máximo {max_queries}):\n' + '\n'.join(
+            stats.statements
+        )
+
+    return check
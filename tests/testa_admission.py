@@ -0,0 +1,101 @@
+import asyncio
+from unittest.mock import AsyncMock, create_autospec
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api_presentation.admission import ConcurrencyLimiter
+from api_presentation.auth_router import auth_router
+from api_presentation.dependencies import get_auth_service, get_login_limiter
+from application_service.auth_service import AuthServiceProtocol
+from domain_entity.exceptions import ServiceUnavailable
+from domain_entity.schemas import Token
+from main import app_exception_handler
+
+
+async def testa_limiter_admite_ate_o_limite():
+    limiter = ConcurrencyLimiter(max_concurrency=2, max_queue=0)
+
+    async with limiter.slot():
+        async with limiter.slot():
+            assert limiter.stats()['active'] == 2
+
+    assert limiter.stats()['active'] == 0
+    assert limiter.stats()['admitted'] == 2
+
+
+async def testa_limiter_rejeita_com_fila_cheia():
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=1)
+    liberar = asyncio.Event()
+
+    async def ocupa():
+        async with limiter.slot():
+            await liberar.wait()
+
+    primeira = asyncio.create_task(ocupa())
+    segunda = asyncio.create_task(ocupa())
+    await asyncio.sleep(0)
+    assert limiter.stats()['queued'] == 1
+
+    with pytest.raises(ServiceUnavailable) as exc:
+        async with limiter.slot():
+            pass  # pragma: no cover
+
+    assert exc.value.status_code == 503
+    assert exc.value.headers['Retry-After'] == '1'
+    assert limiter.stats()['rejected'] == 1
+
+    liberar.set()
+    await asyncio.gather(primeira, segunda)
+    assert limiter.stats()['admitted'] == 2
+    assert limiter.stats()['queued'] == 0
+
+
+async def testa_limiter_timeout_na_fila():
+    limiter = ConcurrencyLimiter(
+        max_concurrency=1, max_queue=5, queue_timeout=0.01, retry_after=3
+    )
+
+    async with limiter.slot():
+        with pytest.raises(ServiceUnavailable) as exc:
+            async with limiter.slot():
+                pass  # pragma: no cover
+
+    assert exc.value.headers['Retry-After'] == '3'
+    stats = limiter.stats()
+    assert stats['timed_out'] == 1
+    assert stats['queued'] == 0
+
+    # O slot liberado continua utilizável após o timeout
+    async with limiter.slot():
+        assert limiter.stats()['active'] == 1
+
+
+def testa_rota_auth_token_retorna_503():
+    app = FastAPI()
+    app.add_exception_handler(ServiceUnavailable, app_exception_handler)
+    app.include_router(auth_router)
+
+    service = create_autospec(AuthServiceProtocol)
+    service.authenticate_get_token = AsyncMock(
+        return_value=Token(
+            access_token='a', refresh_token='r', token_type='bearer'
+        )
+    )
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=0)
+    # Ocupa o único slot sem liberar
+    limiter._semaphore = asyncio.Semaphore(0)
+
+    app.dependency_overrides[get_auth_service] = lambda: service
+    app.dependency_overrides[get_login_limiter] = lambda: limiter
+    client = TestClient(app)
+
+    response = client.post(
+        '/auth-token', data={'username': 'user', 'password': 'pwd'}
+    )
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert response.json()['code'] == 'AUTH_SERVICE_UNAVAILABLE'
+    service.authenticate_get_token.assert_not_called()
@@ -1,11 +1,23 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from unittest.mock import AsyncMock, MagicMock, Mock
 
 import pytest
-from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.security import OAuth2PasswordRequestForm, SecurityScopes
 from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from application_service.auth_service import AuthService, BcryptHasher
+from application_service import phase_timer
+from application_service.auth_service import (
+    AuthService,
+    BcryptHasher,
+    ExecutorHasher,
+)
+from application_service.cache import TTLCache
+from application_service.revocation_index import RevocationIndex
 from application_service.token_service import JWTLibHandler, JWTTokenService
 from domain_entity.exceptions import (
     BadRequest,
@@ -14,7 +26,7 @@ from domain_entity.exceptions import (
     UnauthorizedException,
     UserNotFound,
 )
-from domain_entity.models import User
+from domain_entity.models import Role, User
 from domain_entity.schemas import Token, UserCreateDTO, UserFromDBDTO
 from infra_repository.crud import UserCRUD
 from settings import Settings
@@ -39,9 +51,14 @@ def user_create_dto():
 
 @pytest.fixture
 def get_hasher():
-    return BcryptHasher(
-        context=CryptContext(schemes=['bcrypt'], deprecated='auto')
+    executor = ThreadPoolExecutor(max_workers=1)
+    yield ExecutorHasher(
+        hasher=BcryptHasher(
+            context=CryptContext(schemes=['bcrypt'], deprecated='auto')
+        ),
+        executor=executor,
     )
+    executor.shutdown()
 
 
 @pytest.fixture
@@ -120,12 +137,17 @@ async def testa_service_create_user_valido(
     )
 
     user_crud.insert_user = AsyncMock(return_value=mock_return)
-    user_crud.get_user_by_email = AsyncMock(return_value=None)
+    user_crud.get_existing_identities = AsyncMock(return_value=(set(), set()))
+    user_crud.replace_effective_scopes = AsyncMock()
 
     result = await auth_service.create_user_from_route(user=user_create)
 
     assert result == mock_return
     user_crud.insert_user.assert_called_once()
+    # Login de um usuário novo só lê user_effective_scopes
+    user_crud.replace_effective_scopes.assert_awaited_once_with(
+        {mock_return.id: []}, async_transaction=mock_db
+    )
 
 
 async def testa_service_create_user_none(
@@ -148,7 +170,7 @@ async def testa_service_create_user_none(
     )
 
     user_crud.insert_user = AsyncMock(return_value=None)
-    user_crud.get_user_by_email = AsyncMock(return_value=None)
+    user_crud.get_existing_identities = AsyncMock(return_value=(set(), set()))
 
     with pytest.raises(UserNotFound):
         await auth_service.create_user_from_route(user=user_create)
@@ -159,9 +181,9 @@ async def testa_service_create_user_duplicated(user_create_dto, get_hasher):
 
     user_crud = UserCRUD()
 
-    return_mock = mock_user_from_db
-
-    user_crud.get_user_by_email = AsyncMock(return_value=return_mock)
+    user_crud.get_existing_identities = AsyncMock(
+        return_value=({user_create_dto.email}, set())
+    )
     mock_settings = Mock()
     mock_token_service = Mock()
     auth_service = AuthService(
@@ -176,13 +198,35 @@ async def testa_service_create_user_duplicated(user_create_dto, get_hasher):
         await auth_service.create_user_from_route(user=user_create_dto)
 
 
+async def testa_service_create_user_username_duplicado(
+    user_create_dto, get_hasher
+):
+    user_crud = UserCRUD()
+    user_crud.get_existing_identities = AsyncMock(
+        return_value=(set(), {user_create_dto.username})
+    )
+    user_crud.insert_user = AsyncMock()
+    auth_service = AuthService(
+        get_hasher,
+        user_crud,
+        AsyncMock(spec=AsyncSession),
+        settings=Mock(),
+        token_service=Mock(),
+    )
+
+    with pytest.raises(DuplicateUserError):
+        await auth_service.create_user_from_route(user=user_create_dto)
+
+    user_crud.insert_user.assert_not_awaited()
+
+
 async def testa_create_user_pwd_unmatch(user_create_dto, get_hasher):
     mock_db = AsyncMock(spec=AsyncSession)
 
     user_create = user_create_dto
     user_create.pwd_plain = 'senha não bate'
     user_crud = UserCRUD()
-    user_crud.get_user_by_email = AsyncMock(return_value=None)
+    user_crud.get_existing_identities = AsyncMock(return_value=(set(), set()))
     mock_settings = Mock()
     mock_token_service = Mock()
     auth_service = AuthService(
@@ -204,7 +248,7 @@ async def testa_create_user_valid(
     mock_db = AsyncMock(spec=AsyncSession)
 
     user_crud = UserCRUD()
-    user_crud.get_user_by_email = AsyncMock(return_value=None)
+    user_crud.get_existing_identities = AsyncMock(return_value=(set(), set()))
     user_crud.insert_user = AsyncMock(return_value=mock_user_from_db)
 
     mock_settings = Mock()
@@ -230,10 +274,12 @@ async def testa_authenticate_get_token_pwd_unmatch(
 
     hasher = get_hasher
 
-    hasher.verify = Mock(return_value=False)
+    hasher.verify = AsyncMock(return_value=False)
 
     user_crud = UserCRUD()
-    user_crud.get_user_by_username = AsyncMock(return_value=mock_user_class)
+    user_crud.get_user_with_scopes = AsyncMock(
+        return_value=(mock_user_class, 'users:view')
+    )
 
     mock_settings = Mock()
     mock_token_service = Mock()
@@ -260,6 +306,7 @@ async def testa_authenticate_get_token_user_invalid(
     mock_result = MagicMock()
     mock_result.unique.return_value = mock_result
     mock_result.scalar_one_or_none.return_value = None
+    mock_result.one_or_none.return_value = None
 
     mock_db.execute.return_value = mock_result
 
@@ -290,10 +337,12 @@ async def testa_authenticate_get_token_user_valid(
 
     hasher = get_hasher
 
-    hasher.verify = MagicMock(return_value=True)
+    hasher.verify = AsyncMock(return_value=True)
 
     user_crud = UserCRUD()
-    user_crud.get_user_by_username = AsyncMock(return_value=mock_user_class)
+    user_crud.get_user_with_scopes = AsyncMock(
+        return_value=(mock_user_class, 'users:view')
+    )
 
     mock_settings = get_settings
     mock_token_service = get_token_service
@@ -314,10 +363,56 @@ async def testa_authenticate_get_token_user_valid(
 # Testes Bcrypt Hasher estão abaixo :
 
 
-def testa_bcrypt_hash(get_hasher):
-    hash = get_hasher.hash('senha_teste')
+async def testa_bcrypt_hash(get_hasher):
+    hash = await get_hasher.hash('senha_teste')
 
-    assert get_hasher.verify('senha_teste', hash)
+    assert await get_hasher.verify('senha_teste', hash)
+    assert not await get_hasher.verify('outra_senha', hash)
+
+
+async def testa_executor_hasher_stats_fila():
+    liberar = threading.Event()
+    sync_hasher = Mock()
+    sync_hasher.hash = Mock(side_effect=lambda pwd: liberar.wait() and pwd)
+    executor = ThreadPoolExecutor(max_workers=1)
+    hasher = ExecutorHasher(hasher=sync_hasher, executor=executor)
+
+    tarefas = [asyncio.create_task(hasher.hash(str(i))) for i in range(3)]
+    await asyncio.sleep(0.05)
+
+    stats = hasher.stats()
+    assert stats['running'] == 1
+    assert stats['queued'] == 2
+
+    liberar.set()
+    assert await asyncio.gather(*tarefas) == ['0', '1', '2']
+
+    stats = hasher.stats()
+    assert stats['queued'] == 0
+    assert stats['running'] == 0
+    assert stats['started'] == 3
+    assert stats['wait_seconds_max'] > 0
+    executor.shutdown()
+
+
+async def testa_executor_hasher_cancelamento_na_fila():
+    liberar = threading.Event()
+    sync_hasher = Mock()
+    sync_hasher.hash = Mock(side_effect=lambda pwd: liberar.wait() and pwd)
+    executor = ThreadPoolExecutor(max_workers=1)
+    hasher = ExecutorHasher(hasher=sync_hasher, executor=executor)
+
+    rodando = asyncio.create_task(hasher.hash('a'))
+    na_fila = asyncio.create_task(hasher.hash('b'))
+    await asyncio.sleep(0.05)
+    na_fila.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await na_fila
+
+    assert hasher.stats()['queued'] == 0
+    liberar.set()
+    assert await rodando == 'a'
+    executor.shutdown()
 
 
 async def testa_refresh_access_token_bad_request(
@@ -347,8 +442,303 @@ async def testa_refresh_access_token_user_not_found(
         'token_type': 'refresh',
         'jti': '123',
     }
-    auth_service.user_crud.get_user_by_username = AsyncMock(return_value=None)
+    auth_service.user_crud.get_user_with_scopes = AsyncMock(return_value=None)
     auth_service.user_crud.is_token_revoked = AsyncMock(return_value=False)
 
     with pytest.raises(UserNotFound):
         await auth_service.refresh_access_token('refresh_teste')
+
+
+@pytest.fixture
+def access_token(get_token_service):
+    return get_token_service.create_access_token(
+        'Username_Teste',
+        permissions=['users:view'],
+        expires_delta=timedelta(minutes=5),
+    )
+
+
+async def testa_current_active_user_usa_principal_cache(
+    get_auth_service, mock_user_class, access_token
+):
+    auth_service = get_auth_service
+    auth_service.principal_cache = TTLCache(max_size=10, ttl=60)
+    auth_service.user_crud.get_principal_by_username = AsyncMock(
+        return_value=mock_user_class
+    )
+    scopes = SecurityScopes(scopes=['users:view'])
+
+    first = await auth_service.get_current_active_user(access_token, scopes)
+    second = await auth_service.get_current_active_user(access_token, scopes)
+
+    assert first == second
+    auth_service.user_crud.get_principal_by_username.assert_awaited_once()
+    assert auth_service.principal_cache.stats()['hits'] == 1
+
+
+async def testa_current_active_user_nao_cacheia_inativo(
+    get_auth_service, mock_user_class, access_token
+):
+    auth_service = get_auth_service
+    auth_service.principal_cache = TTLCache(max_size=10, ttl=60)
+    mock_user_class.active = False
+    auth_service.user_crud.get_principal_by_username = AsyncMock(
+        return_value=mock_user_class
+    )
+
+    with pytest.raises(UnauthorizedException):
+        await auth_service.get_current_active_user(
+            access_token, SecurityScopes()
+        )
+
+    assert len(auth_service.principal_cache) == 0
+
+
+async def testa_current_active_user_escopo_negado_com_cache(
+    get_auth_service, mock_user_class, access_token
+):
+    auth_service = get_auth_service
+    auth_service.principal_cache = TTLCache(max_size=10, ttl=60)
+    auth_service.user_crud.get_principal_by_username = AsyncMock(
+        return_value=mock_user_class
+    )
+    await auth_service.get_current_active_user(access_token, SecurityScopes())
+
+    with pytest.raises(UnauthorizedException):
+        await auth_service.get_current_active_user(
+            access_token, SecurityScopes(scopes=['users:write'])
+        )
+
+
+async def testa_assign_role_invalida_principal_cache(
+    get_auth_service, mock_user_class, mock_user_from_db
+):
+    auth_service = get_auth_service
+    auth_service.principal_cache = TTLCache(max_size=10, ttl=60)
+    auth_service.principal_cache.set('Username_Teste', mock_user_from_db)
+    auth_service.principal_cache.set('outro', mock_user_from_db)
+    mock_user_class.roles = []
+    auth_service.user_crud.get_user_by_id = AsyncMock(
+        return_value=mock_user_class
+    )
+    auth_service.user_crud.get_role_by_id = AsyncMock(
+        return_value=Role(id=1, name='admin', description='admin')
+    )
+    auth_service.user_crud.compute_effective_scopes = AsyncMock(
+        return_value={1: []}
+    )
+    auth_service.user_crud.replace_effective_scopes = AsyncMock()
+    auth_service.user_crud.get_users_for_role = AsyncMock(
+        return_value={1: 'Username_Teste'}
+    )
+
+    await auth_service.assign_role_to_user(role_id=1, user_id=1)
+
+    assert auth_service.principal_cache.get('Username_Teste') is None
+    assert auth_service.principal_cache.get('outro') is not None
+
+    # delete_role só descarta quem tinha a role
+    auth_service.principal_cache.set('Username_Teste', mock_user_from_db)
+    auth_service.user_crud.delete_role = AsyncMock(return_value=1)
+    await auth_service.delete_role_by_name('admin')
+    assert auth_service.principal_cache.get('Username_Teste') is None
+    assert auth_service.principal_cache.get('outro') is not None
+
+
+async def testa_refresh_token_revogado_no_indice(
+    get_auth_service, get_token_service
+):
+    auth_service = get_auth_service
+    auth_service.revocation_index = RevocationIndex()
+    refresh = get_token_service.create_refresh_token(
+        'Username_Teste', expires_delta=timedelta(minutes=5)
+    )
+    jti = get_token_service.decode_token(refresh)['jti']
+    auth_service.revocation_index.add(jti, time.time() + 300)
+    auth_service.user_crud.is_token_revoked = AsyncMock()
+
+    with pytest.raises(UnauthorizedException):
+        await auth_service.refresh_access_token(refresh)
+
+    auth_service.user_crud.is_token_revoked.assert_not_called()
+
+
+async def testa_refresh_token_indice_nao_autoritativo_consulta_banco(
+    get_auth_service, get_token_service
+):
+    auth_service = get_auth_service
+    auth_service.revocation_index = RevocationIndex(authoritative=False)
+    auth_service.revocation_index.loaded = True
+    refresh = get_token_service.create_refresh_token(
+        'Username_Teste', expires_delta=timedelta(minutes=5)
+    )
+    auth_service.user_crud.is_token_revoked = AsyncMock(return_value=True)
+
+    with pytest.raises(UnauthorizedException):
+        await auth_service.refresh_access_token(refresh)
+
+    auth_service.user_crud.is_token_revoked.assert_awaited_once()
+
+
+async def testa_refresh_token_ausente_no_indice_confirma_no_banco(
+    get_auth_service, get_token_service
+):
+    # Outro worker pode ter revogado o token: a ausência não é conclusiva
+    auth_service = get_auth_service
+    auth_service.revocation_index = RevocationIndex()
+    auth_service.revocation_index.loaded = True
+    refresh = get_token_service.create_refresh_token(
+        'Username_Teste', expires_delta=timedelta(minutes=5)
+    )
+    auth_service.user_crud.is_token_revoked = AsyncMock(return_value=True)
+
+    with pytest.raises(UnauthorizedException):
+        await auth_service.refresh_access_token(refresh)
+
+    auth_service.user_crud.is_token_revoked.assert_awaited_once()
+
+
+async def testa_revoke_token_atualiza_indice(
+    get_auth_service, get_token_service
+):
+    auth_service = get_auth_service
+    auth_service.revocation_index = RevocationIndex()
+    refresh = get_token_service.create_refresh_token(
+        'Username_Teste', expires_delta=timedelta(minutes=5)
+    )
+    auth_service.user_crud.revoke_token = AsyncMock()
+
+    await auth_service.revoke_token(refresh, user_id=1)
+
+    jti = get_token_service.decode_token(refresh)['jti']
+    assert jti in auth_service.revocation_index
+
+
+async def testa_current_active_user_le_na_replica(
+    get_auth_service, mock_user_class, access_token
+):
+    auth_service = get_auth_service
+    auth_service.read_db = AsyncMock(spec=AsyncSession)
+    auth_service.user_crud.get_principal_by_username = AsyncMock(
+        return_value=mock_user_class
+    )
+
+    await auth_service.get_current_active_user(access_token, SecurityScopes())
+
+    auth_service.user_crud.get_principal_by_username.assert_awaited_once_with(
+        username='Username_Teste', async_transaction=auth_service.read_db
+    )
+
+
+def testa_read_db_padrao_e_o_primario(get_auth_service):
+    assert get_auth_service.read_db is get_auth_service.db
+
+
+async def testa_authenticate_libera_conexao_antes_do_bcrypt(
+    get_auth_service, auth_request_dto, mock_user_class
+):
+    auth_service = get_auth_service
+    calls = []
+    auth_service.db.commit = AsyncMock(
+        side_effect=lambda: calls.append('commit')
+    )
+    auth_service.hasher.verify = AsyncMock(
+        side_effect=lambda *args: calls.append('verify') or True
+    )
+    auth_service.user_crud.get_user_with_scopes = AsyncMock(
+        return_value=(mock_user_class, '')
+    )
+
+    await auth_service.authenticate_get_token(auth_request_dto)
+
+    assert calls == ['commit', 'verify']
+
+
+async def testa_authenticate_usa_escopos_materializados(
+    get_auth_service, auth_request_dto, mock_user_class
+):
+    auth_service = get_auth_service
+    auth_service.hasher.verify = AsyncMock(return_value=True)
+    auth_service.user_crud.get_user_with_scopes = AsyncMock(
+        return_value=(mock_user_class, 'users:view,users:write')
+    )
+    auth_service.user_crud.compute_effective_scopes = AsyncMock()
+
+    token = await auth_service.authenticate_get_token(auth_request_dto)
+
+    payload = auth_service.token_service.decode_token(token.access_token)
+    assert payload['perms'] == 'users:view,users:write'
+    auth_service.user_crud.compute_effective_scopes.assert_not_called()
+
+
+async def testa_authenticate_materializa_escopos_ausentes(
+    get_auth_service, auth_request_dto, mock_user_class
+):
+    auth_service = get_auth_service
+    auth_service.hasher.verify = AsyncMock(return_value=True)
+    auth_service.user_crud.get_user_with_scopes = AsyncMock(
+        return_value=(mock_user_class, None)
+    )
+    auth_service.user_crud.compute_effective_scopes = AsyncMock(
+        return_value={1: ['users:view']}
+    )
+    auth_service.user_crud.replace_effective_scopes = AsyncMock()
+
+    token = await auth_service.authenticate_get_token(auth_request_dto)
+
+    payload = auth_service.token_service.decode_token(token.access_token)
+    assert payload['perms'] == 'users:view'
+    auth_service.user_crud.replace_effective_scopes.assert_awaited_once_with(
+        scopes_by_user={1: ['users:view']},
+        async_transaction=auth_service.db,
+    )
+
+
+async def testa_delete_role_recalcula_escopos_dos_usuarios(get_auth_service):
+    auth_service = get_auth_service
+    auth_service.user_crud.get_users_for_role = AsyncMock(
+        return_value={1: 'um', 2: 'dois'}
+    )
+    auth_service.user_crud.delete_role = AsyncMock(return_value=1)
+    auth_service.user_crud.compute_effective_scopes = AsyncMock(
+        return_value={1: [], 2: ['users:view']}
+    )
+    auth_service.user_crud.replace_effective_scopes = AsyncMock()
+
+    await auth_service.delete_role_by_name('admin')
+
+    auth_service.user_crud.compute_effective_scopes.assert_awaited_once_with(
+        user_ids=[1, 2], async_transaction=auth_service.db
+    )
+    auth_service.user_crud.replace_effective_scopes.assert_awaited_once()
+
+
+async def testa_refresh_registra_fases_no_server_timing(
+    get_auth_service, get_token_service, mock_user_class
+):
+    auth_service = get_auth_service
+    refresh = get_token_service.create_refresh_token(
+        'Username_Teste', expires_delta=timedelta(minutes=5)
+    )
+    auth_service.user_crud.is_token_revoked = AsyncMock(return_value=False)
+    auth_service.user_crud.get_user_with_scopes = AsyncMock(
+        return_value=(mock_user_class, '')
+    )
+    auth_service.user_crud.revoke_token = AsyncMock()
+
+    with phase_timer.timing() as timer:
+        await auth_service.refresh_access_token(refresh)
+
+    assert {
+        'jwt',
+        'revocation_check',
+        'user_lookup',
+        'revoke',
+    } <= set(timer.phases)
+
+
+async def testa_executor_hasher_registra_fase_hash(get_hasher):
+    with phase_timer.timing() as timer:
+        await get_hasher.hash('senha')
+
+    assert timer.phases['hash'] > 0
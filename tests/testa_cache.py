@@ -0,0 +1,75 @@
+from application_service.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def testa_cache_hit_e_miss():
+    cache = TTLCache(max_size=10, ttl=5)
+
+    assert cache.get('a') is None
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['hit_ratio'] == 0.5
+
+
+def testa_cache_expira_pelo_ttl():
+    clock = FakeClock()
+    cache = TTLCache(max_size=10, ttl=5, clock=clock)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=1)
+
+    clock.now = 2
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+
+    clock.now = 5
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def testa_cache_ttl_nao_passa_do_padrao():
+    clock = FakeClock()
+    cache = TTLCache(max_size=10, ttl=5, clock=clock)
+    cache.set('a', 1, ttl=60)
+    cache.set('b', 2, ttl=0)
+
+    clock.now = 5
+    assert cache.get('a') is None
+    assert 'b' not in cache._data
+
+
+def testa_cache_lru_descarta_menos_usado():
+    cache = TTLCache(max_size=2, ttl=5)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def testa_cache_invalidate_e_clear():
+    cache = TTLCache(max_size=10, ttl=5)
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    cache.invalidate('a')
+    cache.invalidate('inexistente')
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+
+    cache.clear()
+    assert len(cache) == 0
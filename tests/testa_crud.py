@@ -1,10 +1,23 @@
+from datetime import UTC, datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
 
 import pytest
+from sqlalchemy import inspect
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from domain_entity.models import User
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from domain_entity.models import (
+    Base,
+    Permission,
+    RevokedRefreshToken,
+    Role,
+    User,
+)
 from infra_repository.crud import UserCRUD
 
 """
@@ -123,3 +136,194 @@ async def testa_crud_delete_all_users():
 
     assert result == 5
     mock_db.execute.assert_called_once()
+
+
+@pytest.fixture
+async def sqlite_session():
+    engine = create_async_engine('sqlite+aiosqlite:///:memory:')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine)() as session:
+        yield session
+    await engine.dispose()
+
+
+async def testa_crud_is_token_revoked_usa_token_id(sqlite_session):
+    user_crud = UserCRUD()
+    jti = str(uuid4())
+    await user_crud.revoke_token(
+        RevokedRefreshToken(
+            token_id=jti,
+            user_id=1,
+            expires_at=datetime.now(UTC) + timedelta(days=1),
+        ),
+        async_transaction=sqlite_session,
+    )
+
+    assert await user_crud.is_token_revoked(jti, sqlite_session)
+    # O id da linha não é o jti
+    assert not await user_crud.is_token_revoked('1', sqlite_session)
+
+
+async def testa_crud_get_active_revoked_tokens(sqlite_session):
+    user_crud = UserCRUD()
+    now = datetime.now(UTC)
+    for jti, delta in (('valido', 1), ('expirado', -1)):
+        sqlite_session.add(
+            RevokedRefreshToken(
+                token_id=jti,
+                user_id=1,
+                expires_at=now + timedelta(days=delta),
+            )
+        )
+    await sqlite_session.flush()
+
+    rows = await user_crud.get_active_revoked_tokens(now, sqlite_session)
+
+    assert [token_id for token_id, _ in rows] == ['valido']
+
+
+@pytest.fixture
+async def usuario_com_roles(sqlite_session):
+    leitura = Permission(scope='users:view', description='ver usuários')
+    escrita = Permission(scope='users:write', description='criar usuários')
+    user = User(
+        username='scopes_user',
+        email='scopes@email.com',
+        fullname='Scopes User',
+        password='hash',
+        active=True,
+        roles=[
+            Role(name='leitor', description='', permissions=[leitura]),
+            Role(
+                name='editor',
+                description='',
+                permissions=[leitura, escrita],
+            ),
+        ],
+    )
+    sqlite_session.add(user)
+    await sqlite_session.flush()
+    return user
+
+
+async def testa_crud_compute_effective_scopes(
+    sqlite_session, usuario_com_roles
+):
+    user_crud = UserCRUD()
+
+    scopes = await user_crud.compute_effective_scopes(
+        [usuario_com_roles.id, 999], sqlite_session
+    )
+
+    # Escopo repetido entre roles aparece uma vez
+    assert scopes == {
+        usuario_com_roles.id: ['users:view', 'users:write'],
+        999: [],
+    }
+
+
+async def testa_crud_compute_effective_scopes_ignora_role_removida(
+    sqlite_session, usuario_com_roles
+):
+    user_crud = UserCRUD()
+
+    await user_crud.delete_role('editor', sqlite_session)
+    scopes = await user_crud.compute_effective_scopes(
+        [usuario_com_roles.id], sqlite_session
+    )
+
+    assert scopes == {usuario_com_roles.id: ['users:view']}
+
+
+async def testa_crud_get_user_with_scopes(sqlite_session, usuario_com_roles):
+    user_crud = UserCRUD()
+
+    user, scopes = await user_crud.get_user_with_scopes(
+        'scopes_user', sqlite_session
+    )
+    assert user.id == usuario_com_roles.id
+    assert scopes is None
+
+    await user_crud.replace_effective_scopes(
+        {user.id: ['users:view']}, sqlite_session
+    )
+    await user_crud.replace_effective_scopes(
+        {user.id: ['users:view', 'users:write']}, sqlite_session
+    )
+    _, scopes = await user_crud.get_user_with_scopes(
+        'scopes_user', sqlite_session
+    )
+    assert scopes == 'users:view,users:write'
+    missing = await user_crud.get_user_with_scopes('outro', sqlite_session)
+    assert missing is None
+
+
+async def testa_crud_get_principal_by_username(
+    sqlite_session, usuario_com_roles
+):
+    user_crud = UserCRUD()
+    sqlite_session.expunge_all()
+
+    user = await user_crud.get_principal_by_username(
+        'scopes_user', sqlite_session
+    )
+
+    assert user.id == usuario_com_roles.id
+    assert 'roles' in inspect(user).unloaded
+    assert (
+        await user_crud.get_principal_by_username('outro', sqlite_session)
+        is None
+    )
+
+
+async def testa_crud_get_users_for_role(sqlite_session, usuario_com_roles):
+    user_crud = UserCRUD()
+
+    leitores = await user_crud.get_users_for_role('leitor', sqlite_session)
+    nenhum = await user_crud.get_users_for_role('nenhuma', sqlite_session)
+
+    assert leitores == {usuario_com_roles.id: usuario_com_roles.username}
+    assert nenhum == {}
+
+
+@pytest.fixture
+async def varios_usuarios(sqlite_session):
+    sqlite_session.add_all(
+        User(
+            username=f'user_{n:02d}',
+            email=f'user{n}@email.com',
+            fullname=f'User {n}',
+            password='hash',
+            active=True,
+        )
+        for n in range(7)
+    )
+    await sqlite_session.flush()
+
+
+async def testa_crud_get_users_keyset(sqlite_session, varios_usuarios):
+    user_crud = UserCRUD()
+
+    first = await user_crud.get_users(sqlite_session, limit=3)
+    second = await user_crud.get_users(
+        sqlite_session, after_id=first[-1].id, limit=3
+    )
+
+    assert [u.username for u in first] == ['user_00', 'user_01', 'user_02']
+    assert [u.username for u in second] == ['user_03', 'user_04', 'user_05']
+    # Projeção: a senha não sai do banco
+    assert 'password' not in first[0]._fields
+
+
+async def testa_crud_stream_users(sqlite_session, varios_usuarios):
+    user_crud = UserCRUD()
+
+    rows = [
+        row
+        async for row in user_crud.stream_users(
+            sqlite_session, after_id=2, chunk_size=2
+        )
+    ]
+
+    assert [row.id for row in rows] == [3, 4, 5, 6, 7]
@@ -1,30 +1,43 @@
 from collections.abc import AsyncGenerator
+from types import SimpleNamespace
+from typing import Annotated
 
 import pytest
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
 from passlib.context import CryptContext
+from sqlalchemy import event, text
 
+from api_presentation.container import ServiceContainer
 from api_presentation.dependencies import (
-    _crypt_context,
     _settings_singleton,
     get_auth_service,
     get_bcrypt_hasher,
+    get_container,
     get_jwt_token_service,
+    get_read_session,
     get_session,
     get_settings,
     get_user_crud,
 )
 from application_service.auth_service import (
+    AsyncHasherProtocol,
+    AuthService,
     AuthServiceProtocol,
-    HasherProtocol,
 )
 from application_service.token_service import TokenService
+from domain_entity.exceptions import AppException
 from infra_repository.crud import UserCRUD
+from infra_repository.db import db_handler
 from settings import Settings
 
 
 @pytest.fixture
-def get_context():
-    return _crypt_context
+def container():
+    container = ServiceContainer(get_settings(), db_handler)
+    yield container
+    container.close()
 
 
 @pytest.fixture
@@ -44,14 +57,15 @@ async def testa_get_session():
     assert isinstance(session, AsyncGenerator)
 
 
-async def testa_get_hasher(get_context):
-    assert isinstance(get_context, CryptContext)
-    hasher = get_bcrypt_hasher()
-    assert isinstance(hasher, HasherProtocol)
+async def testa_get_hasher(container):
+    hasher = get_bcrypt_hasher(container)
+    assert isinstance(hasher, AsyncHasherProtocol)
+    assert isinstance(hasher.hasher.context, CryptContext)
+    assert get_bcrypt_hasher(container) is hasher
 
 
-async def testa_get_user_crud():
-    user = get_user_crud()
+async def testa_get_user_crud(container):
+    user = get_user_crud(container)
     assert isinstance(user, UserCRUD)
 
 
@@ -61,16 +75,98 @@ async def testa_get_settings(get_settings_singleton):
     assert isinstance(get_settings(), Settings)
 
 
-async def testa_get_jwt_service():
-    assert isinstance(get_jwt_token_service(), TokenService)
+async def testa_get_jwt_service(container):
+    token_service = get_jwt_token_service(container)
+    assert isinstance(token_service, TokenService)
+    assert token_service.settings is get_settings()
 
 
-async def testa_auth_service(get_session_fixture):
+async def testa_get_container_criado_uma_vez():
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace()))
+
+    container = get_container(request)
+
+    assert isinstance(container, ServiceContainer)
+    assert request.app.state.container is container
+    assert get_container(request) is container
+    container.close()
+
+
+async def testa_auth_service(get_session_fixture, container):
     auth_serv = get_auth_service(
-        hasher=get_bcrypt_hasher(),
-        user_crud=get_user_crud(),
         db=get_session_fixture,
-        settings=get_settings(),
-        token_service=get_jwt_token_service(),
+        read_db=get_session_fixture,
+        container=container,
     )
     assert isinstance(auth_serv, AuthServiceProtocol)
+    assert auth_serv.db is get_session_fixture
+    assert auth_serv.read_db is get_session_fixture
+    # Serviços sem estado são compartilhados entre requisições
+    assert auth_serv.token_service is container.token_service
+    assert auth_serv.hasher is container.hasher
+
+
+async def testa_get_read_session_sem_replica_usa_primario(
+    get_session_fixture,
+):
+    generator = get_read_session(primary=get_session_fixture)
+    session = await anext(generator)
+
+    assert session is get_session_fixture
+    await generator.aclose()
+
+
+@pytest.fixture
+def pool_checkouts():
+    checkouts = []
+    pool = db_handler.engine.sync_engine.pool
+
+    def on_checkout(*args):
+        checkouts.append('checkout')
+
+    def on_checkin(*args):
+        checkouts.append('checkin')
+
+    event.listen(pool, 'checkout', on_checkout)
+    event.listen(pool, 'checkin', on_checkin)
+    yield checkouts
+    event.remove(pool, 'checkout', on_checkout)
+    event.remove(pool, 'checkin', on_checkin)
+
+
+@pytest.fixture
+def session_app():
+    app = FastAPI()
+
+    @app.get('/me')
+    async def me(
+        auth_service: Annotated[AuthService, Depends(get_auth_service)]
+    ):
+        return await auth_service.get_users_me('token-invalido')
+
+    @app.get('/ping-db')
+    async def ping_db(
+        auth_service: Annotated[AuthService, Depends(get_auth_service)]
+    ):
+        await auth_service.db.execute(text('SELECT 1'))
+        return {'ok': True}
+
+    @app.exception_handler(AppException)
+    async def app_exception_handler(request, exc: AppException):
+        return JSONResponse(status_code=exc.status_code, content={})
+
+    return app
+
+
+def testa_token_invalido_nao_pega_conexao(session_app, pool_checkouts):
+    response = TestClient(session_app).get('/me')
+
+    assert response.status_code == 401
+    assert pool_checkouts == []
+
+
+def testa_conexao_devolvida_ao_fim_do_handler(session_app, pool_checkouts):
+    response = TestClient(session_app).get('/ping-db')
+
+    assert response.status_code == 200
+    assert pool_checkouts == ['checkout', 'checkin']
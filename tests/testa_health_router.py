@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from api_presentation.dependencies import get_container
+from api_presentation.health_router import health_router
+from application_service.loop_monitor import LoopLagMonitor
+
+
+@pytest.fixture
+def health_client(make_client):
+    def build(db_handler=None, loop_monitor=None):
+        container = SimpleNamespace(
+            db_handler=db_handler, loop_monitor=loop_monitor
+        )
+        return make_client(
+            (health_router, '/health'),
+            overrides={get_container: lambda: container},
+        )
+
+    return build
+
+
+def testa_health_db_ok(health_client):
+    db_handler = MagicMock()
+    db_handler.ping = AsyncMock()
+    db_handler.pool_status.return_value = {
+        'pool_class': 'TimedQueuePool',
+        'size': 5,
+        'checked_out': 1,
+        'idle': 4,
+        'overflow': 0,
+        'acquire_wait': {'count': 40, 'avg_ms': 0.5, 'max_ms': 2.5},
+    }
+
+    response = health_client(db_handler).get('/health/db')
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body['status'] == 'ok'
+    assert body['pool']['checked_out'] == 1
+    assert body['pool']['acquire_wait']['max_ms'] == 2.5
+    db_handler.ping.assert_awaited_once()
+
+
+def testa_health_db_indisponivel(health_client):
+    db_handler = MagicMock()
+    db_handler.ping = AsyncMock(
+        side_effect=OperationalError('SELECT 1', {}, Exception('down'))
+    )
+    db_handler.pool_status.return_value = {'pool_class': 'StaticPool'}
+
+    response = health_client(db_handler).get('/health/db')
+
+    assert response.status_code == 503
+    assert response.json()['status'] == 'unavailable'
+
+
+def testa_health_loop(health_client):
+    loop_monitor = LoopLagMonitor(interval=0.5)
+    for lag in (0.001, 0.002, 0.2):
+        loop_monitor.record(lag)
+    loop_monitor.reports.append({'blocked_seconds': 0.2, 'stack': '...'})
+
+    response = health_client(loop_monitor=loop_monitor).get('/health/loop')
+
+    body = response.json()
+    assert body['lag']['samples'] == 3
+    assert body['lag']['max_seconds'] == 0.2
+    assert body['recent_blocks'][0]['blocked_seconds'] == 0.2
@@ -0,0 +1,163 @@
+from datetime import timedelta
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api_presentation.dependencies import get_key_store
+from api_presentation.well_known_router import well_known_router
+from application_service.key_store import KeyStore, SigningKey
+from application_service.token_service import JWTLibHandler, JWTTokenService
+from domain_entity.exceptions import UnauthorizedException
+from settings import Settings
+
+
+def _escreve_pem(path, kid, private_key, public_only=False):
+    if public_only:
+        data = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    else:
+        data = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    (path / f'{kid}.pem').write_bytes(data)
+
+
+@pytest.fixture(scope='module')
+def chaves():
+    return {
+        'rsa': rsa.generate_private_key(public_exponent=65537, key_size=2048),
+        'ec': ec.generate_private_key(ec.SECP256R1()),
+        'ed': ed25519.Ed25519PrivateKey.generate(),
+    }
+
+
+def _token_service(key_store):
+    return JWTTokenService(
+        jwt_handler=JWTLibHandler(), settings=Settings(), key_store=key_store
+    )
+
+
+@pytest.mark.parametrize(
+    ('kid', 'algoritmo'), [('rsa', 'RS256'), ('ec', 'ES256'), ('ed', 'EdDSA')]
+)
+def testa_assina_e_verifica_com_kid(chaves, kid, algoritmo):
+    service = _token_service(
+        KeyStore([SigningKey(kid, private_key=chaves[kid])])
+    )
+
+    token = service.create_access_token(
+        'usuario', ['users:view'], expires_delta=timedelta(minutes=5)
+    )
+
+    header = jwt.get_unverified_header(token)
+    assert header == {'alg': algoritmo, 'kid': kid, 'typ': 'JWT'}
+    assert service.decode_token(token)['sub'] == 'usuario'
+
+
+def testa_rotacao_mantem_tokens_antigos(tmp_path, chaves):
+    _escreve_pem(tmp_path, 'rsa', chaves['rsa'])
+    antigo = _token_service(KeyStore.from_directory(str(tmp_path)))
+    token_antigo = antigo.create_refresh_token(
+        'usuario', expires_delta=timedelta(minutes=5)
+    )
+
+    # Nova chave ativa; a antiga fica só com a parte pública
+    _escreve_pem(tmp_path, 'rsa', chaves['rsa'], public_only=True)
+    _escreve_pem(tmp_path, 'ed', chaves['ed'])
+    key_store = KeyStore.from_directory(str(tmp_path), active_kid='ed')
+    novo = _token_service(key_store)
+
+    assert key_store.signing_key.kid == 'ed'
+    assert key_store.get('rsa').private_key is None
+    assert novo.decode_token(token_antigo)['sub'] == 'usuario'
+    token_novo = novo.create_refresh_token(
+        'usuario', expires_delta=timedelta(minutes=5)
+    )
+    assert jwt.get_unverified_header(token_novo)['kid'] == 'ed'
+
+
+def testa_kid_desconhecido_rejeitado(chaves):
+    emissor = _token_service(
+        KeyStore([SigningKey('ec', private_key=chaves['ec'])])
+    )
+    token = emissor.create_refresh_token(
+        'usuario', expires_delta=timedelta(minutes=5)
+    )
+    verificador = _token_service(
+        KeyStore([SigningKey('rsa', private_key=chaves['rsa'])])
+    )
+
+    with pytest.raises(UnauthorizedException):
+        verificador.decode_token(token)
+
+
+def testa_token_hs_sem_kid_continua_valido(chaves):
+    legado = _token_service(None)
+    token = legado.create_refresh_token(
+        'usuario', expires_delta=timedelta(minutes=5)
+    )
+    service = _token_service(
+        KeyStore([SigningKey('ec', private_key=chaves['ec'])])
+    )
+
+    assert service.decode_token(token)['sub'] == 'usuario'
+
+
+def testa_varias_chaves_privadas_exigem_active_kid(chaves):
+    keys = [
+        SigningKey('rsa', private_key=chaves['rsa']),
+        SigningKey('ec', private_key=chaves['ec']),
+    ]
+
+    with pytest.raises(ValueError):
+        KeyStore(keys)
+    with pytest.raises(ValueError):
+        KeyStore(keys, active_kid='nao-existe')
+    assert KeyStore(keys, active_kid='ec').signing_key.kid == 'ec'
+
+
+def testa_rota_jwks_com_cache(chaves):
+    key_store = KeyStore(
+        [
+            SigningKey('rsa', private_key=chaves['rsa']),
+            SigningKey('ed', public_key=chaves['ed'].public_key()),
+        ],
+        active_kid='rsa',
+    )
+    app = FastAPI()
+    app.include_router(well_known_router, prefix='/.well-known')
+    app.dependency_overrides[get_key_store] = lambda: key_store
+    client = TestClient(app)
+
+    response = client.get('/.well-known/jwks.json')
+
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'].startswith('public, max-age=')
+    etag = response.headers['ETag']
+    keys = {jwk['kid']: jwk for jwk in response.json()['keys']}
+    assert keys['rsa']['kty'] == 'RSA'
+    assert keys['rsa']['alg'] == 'RS256'
+    assert keys['ed']['crv'] == 'Ed25519'
+    assert all('d' not in jwk for jwk in keys.values())
+
+    response = client.get(
+        '/.well-known/jwks.json', headers={'If-None-Match': etag}
+    )
+    assert response.status_code == 304
+
+    # Um consumidor consegue verificar localmente com o JWKS publicado
+    token = _token_service(key_store).create_refresh_token(
+        'usuario', expires_delta=timedelta(minutes=5)
+    )
+    public_key = jwt.PyJWK(keys['rsa']).key
+    assert jwt.decode(token, public_key, algorithms=['RS256'])['sub'] == (
+        'usuario'
+    )
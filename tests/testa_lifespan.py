@@ -1,7 +1,9 @@
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from api_presentation.container import ServiceContainer
 from api_presentation.lifespan import lifespan
 from domain_entity.models import Base
+from settings import Settings
 
 
 async def testa_lifespan():
@@ -18,13 +20,43 @@ async def testa_lifespan():
 
     # Aplica o mock ao db_handler.engine
 
-    with patch('infra_repository.db.db_handler.engine', mock_engine):
+    mock_warm = AsyncMock(return_value=0)
+
+    with patch('infra_repository.db.db_handler.engine', mock_engine), patch(
+        'api_presentation.container.ServiceContainer.warm_revocation_index',
+        mock_warm,
+    ), patch('application_service.metrics.instrument_engine'):
         app = MagicMock()
         async with lifespan(app):
+            assert isinstance(app.state.container, ServiceContainer)
             # Verifica chamadas durante a entrada
             mock_engine.begin.assert_called_once()
             mock_conn.run_sync.assert_awaited_once_with(
                 Base.metadata.create_all
             )
+            mock_warm.assert_awaited_once()
 
         mock_engine.dispose.assert_awaited_once()
+
+
+async def testa_lifespan_roda_migracoes():
+    settings = Settings(
+        DB_RUN_MIGRATIONS=True, REVOKED_TOKEN_PURGE_INTERVAL_SECONDS=0
+    )
+    mock_engine = MagicMock()
+    mock_engine.dispose = AsyncMock()
+    mock_migrations = AsyncMock()
+
+    with patch(
+        'api_presentation.lifespan.get_settings', return_value=settings
+    ), patch('infra_repository.db.db_handler.engine', mock_engine), patch(
+        'infra_repository.db.db_handler.run_migrations', mock_migrations
+    ), patch(
+        'api_presentation.container.ServiceContainer.warm_revocation_index',
+        AsyncMock(return_value=0),
+    ), patch(
+        'application_service.metrics.instrument_engine'
+    ):
+        async with lifespan(MagicMock()):
+            mock_migrations.assert_awaited_once()
+            mock_engine.begin.assert_not_called()
@@ -0,0 +1,57 @@
+import asyncio
+import time
+from contextlib import suppress
+
+from application_service.loop_monitor import LoopLagMonitor
+
+
+def testa_stats_percentis_da_janela():
+    monitor = LoopLagMonitor(interval=0.5, window=100)
+    monitor.record(5.0)
+    for n in range(1, 101):
+        monitor.record(n / 1000)
+
+    stats = monitor.stats()
+
+    # A amostra de 5s saiu da janela, mas continua no máximo histórico
+    assert stats['samples'] == 100
+    assert stats['p50_seconds'] == 0.05
+    assert stats['p99_seconds'] == 0.099
+    assert stats['window_max_seconds'] == 0.1
+    assert stats['max_seconds'] == 5.0
+
+
+def _bloqueia_o_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+async def _run_monitor(monitor: LoopLagMonitor, blocking: float) -> None:
+    task = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.05)
+    _bloqueia_o_loop(blocking)
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
+
+
+async def testa_run_mede_o_atraso():
+    monitor = LoopLagMonitor(interval=0.01)
+
+    await _run_monitor(monitor, blocking=0.1)
+
+    stats = monitor.stats()
+    assert stats['max_seconds'] >= 0.08
+    assert stats['blocks'] == 0
+
+
+async def testa_watchdog_captura_a_pilha_do_bloqueio():
+    monitor = LoopLagMonitor(interval=0.01, block_threshold=0.05)
+
+    await _run_monitor(monitor, blocking=0.3)
+
+    assert monitor.stats()['blocks'] == 1
+    report = monitor.reports[0]
+    assert '_bloqueia_o_loop' in report['stack']
+    # Duração completa, atualizada quando o loop voltou
+    assert report['blocked_seconds'] >= 0.25
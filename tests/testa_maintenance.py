@@ -0,0 +1,75 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import func, select
+
+from application_service.maintenance import RevokedTokenPurger
+from application_service.revocation_index import RevocationIndex
+from domain_entity.models import RevokedRefreshToken
+from infra_repository.crud import UserCRUD
+
+
+async def _insere_tokens(session_factory, expirados: int, validos: int):
+    now = datetime.now(UTC)
+    async with session_factory() as session, session.begin():
+        for i in range(expirados + validos):
+            delta = timedelta(days=-1 if i < expirados else 1)
+            session.add(
+                RevokedRefreshToken(
+                    token_id=f'jti-{i}', user_id=1, expires_at=now + delta
+                )
+            )
+
+
+async def testa_purge_remove_expirados_em_lotes(session_factory):
+    await _insere_tokens(session_factory, expirados=5, validos=2)
+    user_crud = UserCRUD()
+    user_crud.delete_expired_revoked_tokens = AsyncMock(
+        wraps=user_crud.delete_expired_revoked_tokens
+    )
+    index = RevocationIndex()
+    purger = RevokedTokenPurger(
+        session_factory=session_factory,
+        user_crud=user_crud,
+        batch_size=2,
+        revocation_index=index,
+    )
+
+    assert await purger.purge_once() == 5
+
+    # Lotes de 2, 2 e 1
+    assert user_crud.delete_expired_revoked_tokens.await_count == 3
+    async with session_factory() as session:
+        restantes = await session.scalar(
+            select(func.count()).select_from(RevokedRefreshToken)
+        )
+    assert restantes == 2
+
+    stats = purger.stats()
+    assert stats['runs'] == 1
+    assert stats['last_rows_purged'] == 5
+    assert stats['rows_purged_total'] == 5
+    assert stats['last_duration_seconds'] > 0
+
+
+async def testa_purge_run_continua_apos_erro():
+    purger = RevokedTokenPurger(
+        session_factory=AsyncMock(), user_crud=UserCRUD(), batch_size=10
+    )
+    chamadas = 0
+
+    async def falha():
+        nonlocal chamadas
+        chamadas += 1
+        raise RuntimeError('db fora do ar')
+
+    purger.purge_once = falha
+    task = asyncio.create_task(purger.run(0.001))
+    await asyncio.sleep(0.05)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert chamadas > 1
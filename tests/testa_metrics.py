@@ -0,0 +1,202 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from api_presentation.dependencies import get_container
+from api_presentation.metrics_middleware import MetricsMiddleware
+from api_presentation.metrics_router import metrics_router
+from api_presentation.rate_limit import RateLimit
+from application_service import metrics
+from application_service.cache import TTLCache
+from application_service.loop_monitor import LoopLagMonitor
+
+
+def testa_histograma_renderiza_buckets_acumulados():
+    registry = metrics.Registry()
+    histogram = registry.register(
+        metrics.Histogram(
+            'latencia_seconds', 'Latência.', ('rota',), buckets=(0.1, 1.0)
+        )
+    )
+
+    child = histogram.labels('/a')
+    for value in (0.05, 0.1, 0.5, 3.0):
+        child.observe(value)
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == [
+        '# HELP latencia_seconds Latência.',
+        '# TYPE latencia_seconds histogram',
+    ]
+    assert lines[2:] == [
+        'latencia_seconds_bucket{rota="/a",le="0.1"} 2',
+        'latencia_seconds_bucket{rota="/a",le="1"} 3',
+        'latencia_seconds_bucket{rota="/a",le="+Inf"} 4',
+        'latencia_seconds_sum{rota="/a"} 3.65',
+        'latencia_seconds_count{rota="/a"} 4',
+    ]
+
+
+def testa_counter_escapa_labels_e_valida_quantidade():
+    registry = metrics.Registry()
+    counter = registry.register(
+        metrics.Counter('eventos_total', 'Eventos.', ('nome',))
+    )
+
+    counter.labels('a"b').inc()
+    counter.labels('a"b').inc(2)
+
+    assert 'eventos_total{nome="a\\"b"} 3' in registry.render()
+    with pytest.raises(ValueError, match='espera os labels'):
+        counter.labels('a', 'b')
+    with pytest.raises(ValueError, match='duplicada'):
+        registry.register(metrics.Counter('eventos_total', 'De novo.'))
+
+
+async def testa_instrument_engine_mede_consultas_sem_duplicar():
+    engine = create_async_engine('sqlite+aiosqlite:///:memory:')
+    metrics.instrument_engine(engine, 'teste')
+    metrics.instrument_engine(engine, 'teste')
+    select_child = metrics.DB_QUERY_SECONDS.labels('teste', 'SELECT')
+    before, _ = select_child.snapshot()
+
+    async with engine.connect() as conn:
+        await conn.execute(text('SELECT 1'))
+        await conn.execute(text('select 2'))
+    await engine.dispose()
+
+    after, _ = select_child.snapshot()
+    assert sum(after) - sum(before) == 2
+
+
+@pytest.fixture
+def metrics_client():
+    itens_router = APIRouter()
+
+    @itens_router.get('/{item_id}')
+    async def get_item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404)
+        return {'id': item_id}
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router)
+    # O label deve incluir o prefixo do include_router
+    app.include_router(itens_router, prefix='/itens')
+
+    db_handler = MagicMock()
+    db_handler.pool_status.return_value = {
+        'pool_class': 'AsyncAdaptedQueuePool',
+        'size': 5,
+        'checked_out': 2,
+        'idle': 3,
+        'overflow': 0,
+    }
+    replica = MagicMock()
+    replica.pool_status.return_value = {
+        'pool_class': 'AsyncAdaptedQueuePool',
+        'checked_out': 1,
+    }
+    db_handler.replicas = [replica]
+    hasher = MagicMock()
+    hasher.stats.return_value = {'queued': 4, 'running': 1}
+    loop_monitor = LoopLagMonitor(interval=1)
+    loop_monitor.record(0.02)
+    principal_cache = TTLCache(max_size=10, ttl=60)
+    principal_cache.set('usuario', object())
+    principal_cache.get('usuario')
+    principal_cache.get('outro')
+    login_limiter = MagicMock()
+    login_limiter.stats.return_value = {
+        'active': 2,
+        'queued': 1,
+        'admitted': 10,
+        'rejected': 3,
+        'timed_out': 1,
+    }
+    rate_limit = RateLimit(per_ip=1, per_username=0, window_seconds=60)
+    rate_limit.by_ip.hit('10.0.0.1')
+    rate_limit.by_ip.hit('10.0.0.1')
+    purger = MagicMock()
+    purger.stats.return_value = {
+        'runs': 2,
+        'rows_purged_total': 40,
+        'last_rows_purged': 15,
+        'last_duration_seconds': 0.5,
+    }
+    app.dependency_overrides[get_container] = lambda: SimpleNamespace(
+        db_handler=db_handler,
+        hasher=hasher,
+        import_hasher=hasher,
+        loop_monitor=loop_monitor,
+        login_limiter=login_limiter,
+        principal_cache=principal_cache,
+        decoded_token_cache=TTLCache(max_size=10, ttl=60),
+        rate_limits={'AUTH': rate_limit},
+        revoked_token_purger=purger,
+    )
+    return TestClient(app)
+
+
+def testa_middleware_usa_template_da_rota(metrics_client):
+    ok = metrics.HTTP_REQUESTS.labels('GET', '/itens/{item_id}', '200')
+    not_found = metrics.HTTP_REQUESTS.labels('GET', '/itens/{item_id}', '404')
+    unmatched = metrics.HTTP_REQUESTS.labels('GET', 'unmatched', '404')
+    counts = (ok.value, not_found.value, unmatched.value)
+
+    metrics_client.get('/itens/1')
+    metrics_client.get('/itens/2')
+    metrics_client.get('/itens/0')
+    metrics_client.get('/nao/existe')
+
+    assert (ok.value, not_found.value, unmatched.value) == (
+        counts[0] + 2,
+        counts[1] + 1,
+        counts[2] + 1,
+    )
+
+
+def testa_rota_metrics_expoe_gauges(metrics_client):
+    metrics_client.get('/itens/1')
+
+    response = metrics_client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith(
+        'text/plain; version=0.0.4'
+    )
+    body = response.text
+    assert 'db_pool_connections{database="primary",state="checked_out"} 2' in (
+        body
+    )
+    assert 'hasher_tasks{pool="login",state="queued"} 4' in body
+    assert 'event_loop_lag_window_seconds{stat="p99"} 0.02' in body
+    assert 'login_admission_requests{state="active"} 2' in body
+    assert 'login_admission_total{outcome="rejected"} 3' in body
+    assert 'cache_lookups_total{cache="principal",result="hit"} 1' in body
+    assert 'cache_lookups_total{cache="principal",result="miss"} 1' in body
+    assert 'cache_entries{cache="principal"} 1' in body
+    assert 'cache_lookups_total{cache="decoded_token",result="miss"} 0' in (
+        body
+    )
+    assert (
+        'db_pool_connections{database="replica-0",state="checked_out"} 1'
+    ) in body
+    assert (
+        'rate_limit_decisions_total{scope="AUTH",key="ip",decision="limited"}'
+        ' 1'
+    ) in body
+    assert 'rate_limit_keys{scope="AUTH",key="ip"} 1' in body
+    assert 'key="username"' not in body
+    assert 'revoked_token_purge_rows_total 40' in body
+    assert 'revoked_token_purge_last_duration_seconds 0.5' in body
+    assert (
+        'http_request_duration_seconds_count'
+        '{method="GET",route="/itens/{item_id}"}'
+    ) in body
@@ -0,0 +1,113 @@
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import inspect, text
+
+from domain_entity.models import Base
+from infra_repository.db import DatabaseHandler
+from settings import Settings
+
+
+def migrated_handler(tmp_path) -> DatabaseHandler:
+    settings = Settings().model_copy(
+        update={'DB_URL': f'sqlite+aiosqlite:///{tmp_path / "mig.db"}'}
+    )
+    return DatabaseHandler(settings=settings)
+
+
+async def testa_migracoes_batem_com_os_models(tmp_path):
+    db_handler = migrated_handler(tmp_path)
+    await db_handler.run_migrations()
+
+    async with db_handler.engine.connect() as conn:
+        diff = await conn.run_sync(
+            lambda sync_conn: compare_metadata(
+                MigrationContext.configure(sync_conn), Base.metadata
+            )
+        )
+    await db_handler.dispose()
+
+    assert diff == []
+
+
+async def testa_migracao_cria_indices(tmp_path):
+    db_handler = migrated_handler(tmp_path)
+    await db_handler.run_migrations()
+
+    async with db_handler.engine.connect() as conn:
+        indexes = await conn.run_sync(
+            lambda sync_conn: {
+                table: {
+                    index['name']: index['unique']
+                    for index in inspect(sync_conn).get_indexes(table)
+                }
+                for table in (
+                    'users',
+                    'revoked_refresh_tokens',
+                    'user_roles',
+                    'role_permissions',
+                )
+            }
+        )
+    await db_handler.dispose()
+
+    assert indexes['users']['ix_users_username']
+    assert set(indexes['revoked_refresh_tokens']) == {
+        'ix_revoked_refresh_tokens_token_id',
+        'ix_revoked_refresh_tokens_expires_at',
+    }
+    assert 'ix_user_roles_role_id' in indexes['user_roles']
+    assert 'ix_role_permissions_permission_id' in indexes['role_permissions']
+
+
+async def testa_migracao_ate_baseline(tmp_path):
+    db_handler = migrated_handler(tmp_path)
+    await db_handler.run_migrations('0001')
+
+    async with db_handler.engine.connect() as conn:
+        indexes = await conn.run_sync(
+            lambda sync_conn: inspect(sync_conn).get_indexes('users')
+        )
+    await db_handler.dispose()
+
+    assert indexes == []
+
+
+async def testa_migracao_de_banco_existente(tmp_path):
+    # Banco no esquema anterior às migrações, já com dados
+    db_handler = migrated_handler(tmp_path)
+    await db_handler.run_migrations('0001')
+    async with db_handler.engine.begin() as conn:
+        for statement in (
+            "INSERT INTO users VALUES (1, 'com_role', 'a@t.com', 'A', 'h', 1)",
+            "INSERT INTO users VALUES (2, 'sem_role', 'b@t.com', 'B', 'h', 1)",
+            "INSERT INTO roles VALUES (1, 'leitor', 'leitor')",
+            "INSERT INTO permissions VALUES (1, 'users:view', 'ver')",
+            "INSERT INTO permissions VALUES (2, 'roles:view', 'ver roles')",
+            'INSERT INTO role_permissions VALUES (1, 1), (1, 2)',
+            'INSERT INTO user_roles VALUES (1, 1)',
+        ):
+            await conn.execute(text(statement))
+
+    await db_handler.run_migrations()
+
+    async with db_handler.engine.connect() as conn:
+        scopes = dict(
+            (
+                await conn.execute(
+                    text('SELECT user_id, scopes FROM user_effective_scopes')
+                )
+            ).all()
+        )
+        token_id = await conn.run_sync(
+            lambda sync_conn: next(
+                column
+                for column in inspect(sync_conn).get_columns(
+                    'revoked_refresh_tokens'
+                )
+                if column['name'] == 'token_id'
+            )
+        )
+    await db_handler.dispose()
+
+    assert scopes == {1: 'roles:view,users:view', 2: ''}
+    assert token_id['type'].length == 36
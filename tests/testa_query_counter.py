@@ -0,0 +1,187 @@
+import logging
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from sqlalchemy import text
+
+from api_presentation.dependencies import get_auth_service
+from api_presentation.query_count_middleware import QueryCountMiddleware
+from api_presentation.role_router import role_router
+from application_service import query_counter
+from application_service.auth_service import AuthService
+from domain_entity.models import Permission, Role, User
+from infra_repository.crud import UserCRUD
+from settings import Settings
+
+
+@pytest.fixture
+async def session_factory(session_factory):
+    # Banco do conftest com o usuário 1
+    async with session_factory() as session, session.begin():
+        session.add(
+            User(
+                username='user_1',
+                email='u1@t.com',
+                fullname='U',
+                password='hash',
+                active=True,
+            )
+        )
+    return session_factory
+
+
+async def testa_track_queries_soma_nos_escopos_externos(session_factory):
+    query_counter.install()
+
+    with query_counter.track_queries() as outer:
+        async with session_factory() as session:
+            await session.execute(text('SELECT 1'))
+            with query_counter.track_queries(keep_statements=True) as inner:
+                await session.execute(text('SELECT 2'))
+
+    assert (outer.count, inner.count) == (2, 1)
+    assert inner.statements == ['SELECT 2']
+    assert outer.duration >= inner.duration > 0
+
+
+async def testa_fora_do_escopo_nada_e_contado(session_factory):
+    query_counter.install()
+    with query_counter.track_queries() as stats:
+        pass
+
+    async with session_factory() as session:
+        await session.execute(text('SELECT 1'))
+
+    assert stats.count == 0
+
+
+@pytest.fixture
+def roles_client(session_factory, make_client):
+    async def auth_service_override():
+        async with session_factory() as session:
+            yield AuthService(
+                hasher=Mock(),
+                user_crud=UserCRUD(),
+                db=session,
+                settings=Settings(),
+                token_service=Mock(),
+            )
+            await session.commit()
+
+    def build(**middleware_options):
+        return make_client(
+            (role_router, '/roles'),
+            middleware=[(QueryCountMiddleware, middleware_options)],
+            overrides={get_auth_service: auth_service_override},
+        )
+
+    return build
+
+
+def role_payload(name: str, permissions: int) -> dict:
+    return {
+        'name': name,
+        'description': 'Role de teste',
+        'permissions': [
+            {'permission': f'{name}:p{n}', 'description': f'{name} {n}'}
+            for n in range(permissions)
+        ],
+    }
+
+
+def testa_middleware_emite_headers(roles_client):
+    client = roles_client(emit_headers=True)
+
+    response = client.post('/roles/roles', json=role_payload('admin', 1))
+
+    assert int(response.headers['X-DB-Query-Count']) > 0
+    assert float(response.headers['X-DB-Query-Time-Ms']) > 0
+
+
+def testa_middleware_sem_headers_por_padrao(roles_client):
+    response = roles_client().post(
+        '/roles/roles', json=role_payload('admin', 1)
+    )
+
+    assert 'X-DB-Query-Count' not in response.headers
+
+
+def testa_middleware_avisa_acima_do_limite(roles_client, caplog):
+    client = roles_client(warn_threshold=2)
+
+    with caplog.at_level(logging.WARNING):
+        client.post('/roles/roles', json=role_payload('admin', 3))
+
+    assert 'POST /roles/roles executou' in caplog.text
+
+
+# Orçamentos de consultas por rota: um aumento aqui é regressão
+
+
+def testa_orcamento_criar_role(roles_client, assert_max_queries):
+    client = roles_client()
+
+    # Hoje cresce com a entrada: 3 consultas por permissão (SELECT,
+    # INSERT e a associação) + 3 da role
+    with assert_max_queries(12):
+        response = client.post('/roles/roles', json=role_payload('admin', 3))
+
+    assert response.status_code == 200
+
+
+def testa_orcamento_atribuir_role(roles_client, assert_max_queries):
+    client = roles_client()
+    role_id = client.post(
+        '/roles/roles', json=role_payload('admin', 3)
+    ).json()['id']
+
+    # Constante: usuário, roles atuais, role, INSERT e os escopos
+    with assert_max_queries(7):
+        response = client.post(
+            '/roles/roles/1/update', params={'role_id': role_id}
+        )
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('roles', [1, 20])
+async def testa_orcamento_login_independe_das_roles(
+    session_factory, assert_max_queries, roles
+):
+    async with session_factory() as session, session.begin():
+        user = await session.get(User, 1)
+        await user.awaitable_attrs.roles
+        user.roles = [
+            Role(
+                name=f'role_{n}',
+                description='Role de teste',
+                permissions=[
+                    Permission(scope=f'r{n}:p{p}', description=f'{n} {p}')
+                    for p in range(5)
+                ],
+            )
+            for n in range(roles)
+        ]
+
+    form = SimpleNamespace(username='user_1', password='senha')
+
+    async def login():
+        async with session_factory() as session:
+            await AuthService(
+                hasher=Mock(verify=AsyncMock(return_value=True)),
+                user_crud=UserCRUD(),
+                db=session,
+                settings=Settings(),
+                token_service=Mock(
+                    create_access_token=Mock(return_value='access'),
+                    create_refresh_token=Mock(return_value='refresh'),
+                ),
+            ).authenticate_get_token(form)
+
+    # Primeiro login calcula e grava os escopos (consulta e upsert); os
+    # seguintes leem só a linha materializada
+    with assert_max_queries(3):
+        await login()
+    with assert_max_queries(1):
+        await login()
@@ -0,0 +1,155 @@
+"""
+Plano de execução (EXPLAIN QUERY PLAN do SQLite) de cada consulta do
+UserCRUD sobre o esquema das migrações. Uma busca que vire SCAN completo
+de tabela indica índice faltando.
+"""
+from datetime import UTC, datetime
+
+import pytest
+from sqlalchemy import event
+
+from domain_entity.models import Permission, Role, User
+from infra_repository.crud import UserCRUD
+from infra_repository.db import DatabaseHandler
+from settings import Settings
+
+NOW = datetime(2026, 1, 1, tzinfo=UTC)
+# Leem a tabela inteira de propósito (carga do registro de escopos)
+FULL_TABLE_READS = {'get_permission_scopes'}
+
+# nome do teste -> chamada do CRUD
+CRUD_CALLS = {
+    'get_user_by_username': lambda crud, s: crud.get_user_by_username(
+        'user_1', s
+    ),
+    'get_principal_by_username': lambda crud, s: (
+        crud.get_principal_by_username('user_1', s)
+    ),
+    'get_user_by_email': lambda crud, s: crud.get_user_by_email('u1@t.com', s),
+    'get_user_by_id': lambda crud, s: crud.get_user_by_id(1, s),
+    'get_user_with_scopes': lambda crud, s: crud.get_user_with_scopes(
+        'user_1', s
+    ),
+    'get_users_keyset': lambda crud, s: crud.get_users(
+        s, after_id=1, limit=10
+    ),
+    'stream_users': lambda crud, s: crud.stream_users(s, after_id=1, limit=10),
+    'get_existing_identities': lambda crud, s: (
+        crud.get_existing_identities(['u1@t.com'], ['user_1'], s)
+    ),
+    'get_role_by_id': lambda crud, s: crud.get_role_by_id(1, s),
+    'get_permission_by_name': lambda crud, s: crud.get_permission_by_name(
+        'users:view', s
+    ),
+    'get_permission_scopes': lambda crud, s: crud.get_permission_scopes(s),
+    'get_roles_and_permissions_for_user_id': lambda crud, s: (
+        crud.get_roles_and_permissions_for_user_id(1, s)
+    ),
+    'get_users_for_role': lambda crud, s: crud.get_users_for_role('admin', s),
+    'compute_effective_scopes': lambda crud, s: (
+        crud.compute_effective_scopes([1], s)
+    ),
+    'replace_effective_scopes': lambda crud, s: (
+        crud.replace_effective_scopes({1: ['users:view']}, s)
+    ),
+    'insert_users': lambda crud, s: crud.insert_users(
+        [
+            {
+                'username': 'user_2',
+                'email': 'u2@t.com',
+                'fullname': 'U',
+                'password': 'hash',
+                'active': True,
+            }
+        ],
+        s,
+    ),
+    'is_token_revoked': lambda crud, s: crud.is_token_revoked('jti', s),
+    'get_active_revoked_tokens': lambda crud, s: (
+        crud.get_active_revoked_tokens(NOW, s)
+    ),
+    'delete_expired_revoked_tokens': lambda crud, s: (
+        crud.delete_expired_revoked_tokens(NOW, 100, s)
+    ),
+    'delete_user_by_email': lambda crud, s: crud.delete_user_by_email(
+        'nobody@t.com', s
+    ),
+    'delete_role': lambda crud, s: crud.delete_role('inexistente', s),
+}
+
+
+@pytest.fixture
+async def migrated_db(tmp_path):
+    settings = Settings().model_copy(
+        update={'DB_URL': f'sqlite+aiosqlite:///{tmp_path / "plans.db"}'}
+    )
+    db_handler = DatabaseHandler(settings=settings)
+    await db_handler.run_migrations()
+    async with db_handler.session_factory() as session, session.begin():
+        permission = Permission(scope='users:view', description='ver')
+        session.add(
+            User(
+                username='user_1',
+                email='u1@t.com',
+                fullname='U',
+                password='hash',
+                active=True,
+                roles=[
+                    Role(
+                        name='admin',
+                        description='',
+                        permissions=[permission],
+                    )
+                ],
+            )
+        )
+    yield db_handler
+    await db_handler.dispose()
+
+
+async def capture_plans(db_handler: DatabaseHandler, call) -> list[str]:
+    statements: list[tuple[str, dict]] = []
+
+    def before_cursor_execute(conn, cursor, statement, params, *args):
+        statements.append((statement, params))
+
+    sync_engine = db_handler.engine.sync_engine
+    event.listen(sync_engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        async with db_handler.session_factory() as session:
+            result = call(UserCRUD(), session)
+            if hasattr(result, '__aiter__'):
+                [row async for row in result]
+            else:
+                await result
+            await session.rollback()
+    finally:
+        event.remove(
+            sync_engine, 'before_cursor_execute', before_cursor_execute
+        )
+
+    assert statements, 'nenhuma consulta executada'
+    plans: list[str] = []
+    async with db_handler.engine.connect() as conn:
+        for statement, params in statements:
+            rows = await conn.exec_driver_sql(
+                f'EXPLAIN QUERY PLAN {statement}', params
+            )
+            # Colunas: id, parent, notused, detail
+            plans.extend(rows.scalars(3))
+    return plans
+
+
+@pytest.mark.parametrize('name', list(CRUD_CALLS))
+async def testa_consulta_usa_indice(migrated_db, name):
+    plans = await capture_plans(migrated_db, CRUD_CALLS[name])
+
+    # INSERT ... VALUES não tem plano; sem linhas, nenhum SCAN
+    if name in FULL_TABLE_READS:
+        return
+    full_scans = [
+        detail
+        for detail in plans
+        if detail.startswith('SCAN ') and detail != 'SCAN CONSTANT ROW'
+    ]
+    assert full_scans == [], f'{name}: {plans}'
@@ -0,0 +1,122 @@
+from unittest.mock import AsyncMock, create_autospec
+
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+
+from api_presentation.rate_limit import (
+    RateLimit,
+    SlidingWindowLimiter,
+    submitted_username,
+)
+from domain_entity.exceptions import TooManyRequests
+from main import app_exception_handler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def testa_limiter_bloqueia_apos_limite(clock):
+    limiter = SlidingWindowLimiter(limit=3, window_seconds=10, clock=clock)
+
+    assert [limiter.hit('ip') for _ in range(3)] == [0.0, 0.0, 0.0]
+    retry_after = limiter.hit('ip')
+
+    assert 0 < retry_after <= 10
+    assert limiter.hit('outro_ip') == 0.0
+    assert limiter.stats()['limited'] == 1
+
+
+def testa_limiter_janela_deslizante(clock):
+    limiter = SlidingWindowLimiter(limit=4, window_seconds=10, clock=clock)
+    for _ in range(4):
+        limiter.hit('ip')
+
+    # Metade da próxima janela: a anterior ainda pesa 50% (2 hits)
+    clock.now += 15
+    assert limiter.hit('ip') == 0.0
+    assert limiter.hit('ip') == 0.0
+    assert limiter.hit('ip') > 0
+
+    # Duas janelas depois o histórico é descartado
+    clock.now += 20
+    assert limiter.hit('ip') == 0.0
+
+
+def testa_limiter_descarta_chaves_lru(clock):
+    limiter = SlidingWindowLimiter(
+        limit=1, window_seconds=10, max_keys=2, clock=clock
+    )
+    limiter.hit('a')
+    limiter.hit('b')
+    limiter.hit('c')
+
+    assert len(limiter) == 2
+    assert limiter.stats()['evicted'] == 1
+    # 'a' foi descartada, então começa do zero
+    assert limiter.hit('a') == 0.0
+
+
+@pytest.fixture
+def app_factory():
+    def factory(limit: RateLimit):
+        app = FastAPI()
+        app.exception_handler(TooManyRequests)(app_exception_handler)
+        handler = AsyncMock(return_value={'ok': True})
+
+        async def checker(request: Request):
+            await limit.check(request)
+
+        @app.post('/login', dependencies=[Depends(checker)])
+        async def login(request: Request):
+            return await handler(await submitted_username(request))
+
+        return TestClient(app), handler
+
+    return factory
+
+
+def testa_rate_limit_por_username(app_factory):
+    client, handler = app_factory(
+        RateLimit(per_ip=0, per_username=2, window_seconds=60)
+    )
+
+    for _ in range(2):
+        response = client.post('/login', data={'username': 'Fulano'})
+        assert response.status_code == 200
+
+    response = client.post('/login', data={'username': 'fulano'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert response.json()['code'] == 'AUTH_RATE_LIMITED'
+
+    response = client.post('/login', json={'username': 'outro'})
+    assert response.status_code == 200
+    handler.assert_awaited_with('outro')
+
+
+def testa_rate_limit_por_ip(app_factory):
+    client, handler = app_factory(
+        RateLimit(per_ip=1, per_username=0, window_seconds=60)
+    )
+
+    assert client.post('/login', json={}).status_code == 200
+    assert client.post('/login', json={}).status_code == 429
+    assert handler.await_count == 1
+
+
+async def testa_submitted_username_sem_corpo():
+    request = create_autospec(Request, instance=True)
+    request.headers = {}
+
+    assert await submitted_username(request) is None
@@ -0,0 +1,73 @@
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+from application_service.revocation_index import RevocationIndex
+from infra_repository.crud import UserCRUD
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def testa_index_contem_jti_revogado():
+    clock = FakeClock()
+    index = RevocationIndex(clock=clock)
+    jti = str(uuid4())
+
+    index.add(jti, clock.now + 60)
+
+    assert jti in index
+    assert str(uuid4()) not in index
+    assert 'nao-e-uuid' not in index
+    assert len(index) == 1
+
+
+def testa_index_descarta_expirados():
+    clock = FakeClock()
+    index = RevocationIndex(clock=clock)
+    curto, longo = str(uuid4()), str(uuid4())
+    index.add(curto, clock.now + 10)
+    index.add(longo, clock.now + 100)
+    # Já expirado: nem entra no índice
+    index.add(str(uuid4()), clock.now - 1)
+
+    clock.now += 50
+    assert index.prune() == 1
+    assert curto not in index
+    assert longo in index
+
+
+def testa_index_aceita_datetime_sem_timezone():
+    clock = FakeClock()
+    index = RevocationIndex(clock=clock)
+    jti = str(uuid4())
+    naive_utc = datetime.fromtimestamp(clock.now + 60, UTC).replace(
+        tzinfo=None
+    )
+
+    index.add(jti, naive_utc)
+    clock.now += 61
+
+    assert index.prune() == 1
+
+
+async def testa_index_load_marca_autoritativo():
+    clock = FakeClock()
+    index = RevocationIndex(authoritative=True, clock=clock)
+    jti = str(uuid4())
+    user_crud = UserCRUD()
+    user_crud.get_active_revoked_tokens = AsyncMock(
+        return_value=[(jti, datetime.fromtimestamp(clock.now + 60, UTC))]
+    )
+
+    assert not index.authoritative
+    assert await index.load(user_crud, AsyncMock()) == 1
+
+    assert index.authoritative
+    assert jti in index
+    assert not RevocationIndex(authoritative=False).authoritative
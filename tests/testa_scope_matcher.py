@@ -0,0 +1,135 @@
+from datetime import timedelta
+from typing import Annotated
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from fastapi import APIRouter, FastAPI, Security
+from fastapi.security import SecurityScopes
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api_presentation.dependencies import (
+    get_current_user,
+    route_scope_requirements,
+)
+from application_service.auth_service import AuthService
+from application_service.scope_matcher import ScopeMatcher
+from application_service.scope_registry import ScopeRegistry
+from application_service.token_service import JWTLibHandler, JWTTokenService
+from domain_entity.exceptions import UnauthorizedException
+from infra_repository.crud import UserCRUD
+from settings import Settings
+
+IMPLIES = {'admin': ['write', 'delete'], 'write': ['view']}
+
+
+@pytest.fixture
+def matcher():
+    return ScopeMatcher(implies=IMPLIES)
+
+
+@pytest.mark.parametrize(
+    ('granted', 'required', 'allowed'),
+    [
+        ({'users:view'}, ['users:view'], True),
+        ({'users:view'}, ['users:write'], False),
+        ({'users:*'}, ['users:write', 'users:view'], True),
+        ({'users:*'}, ['roles:view'], False),
+        ({'*:view'}, ['roles:view'], True),
+        ({'*'}, ['roles:delete', 'admin'], True),
+        ({'users:write'}, ['users:view'], True),
+        ({'users:admin'}, ['users:view'], True),  # admin > write > view
+        ({'roles:write'}, ['users:view'], False),
+        ({'users:view', 'roles:view'}, ['users:view', 'roles:write'], False),
+        ({'admin'}, ['admin'], True),
+        (set(), [], True),
+    ],
+)
+def testa_allows(matcher, granted, required, allowed):
+    assert matcher.allows(frozenset(granted), required) is allowed
+
+
+def testa_hierarquia_com_ciclo():
+    matcher = ScopeMatcher(implies={'write': ['view'], 'view': ['write']})
+
+    assert matcher.allows({'users:view'}, ['users:write'])
+    assert matcher.allows({'users:write'}, ['users:view'])
+
+
+def testa_requisitos_compilados_uma_vez(matcher):
+    assert matcher.warm([('users:view',), ('users:write', 'roles:view')]) == 2
+
+    matcher.allows({'users:write'}, ['users:view'])
+    matcher.allows({'users:admin'}, ['users:view'])
+
+    assert matcher.compile.cache_info().hits == 2
+
+
+def testa_allows_com_bitmap_do_registro(matcher):
+    registry = ScopeRegistry({1: 'users:view', 2: 'users:*', 3: 'roles:write'})
+    granted = registry.granted(registry.encode(['users:*', 'roles:write']))
+
+    assert matcher.allows(granted, ['users:delete', 'roles:view'])
+    assert not matcher.allows(granted, ['roles:delete'])
+
+
+def testa_route_scope_requirements():
+    router = APIRouter()
+
+    @router.get('/ver')
+    async def ver(
+        user: Annotated[dict, Security(get_current_user, scopes=['a:view'])]
+    ):
+        ...
+
+    @router.get('/editar')
+    async def editar(
+        user: Annotated[
+            dict, Security(get_current_user, scopes=['a:write', 'b:view'])
+        ]
+    ):
+        ...
+
+    @router.get('/livre')
+    async def livre():
+        ...
+
+    app = FastAPI()
+    app.include_router(router, prefix='/api')
+
+    assert route_scope_requirements(app.routes) == {
+        ('a:view',),
+        ('a:write', 'b:view'),
+    }
+
+
+async def testa_current_active_user_usa_hierarquia(matcher):
+    user_crud = UserCRUD()
+    user_crud.get_principal_by_username = AsyncMock(
+        return_value=Mock(
+            id=1, username='usuario', email='u@t.com', fullname='U'
+        )
+    )
+    token_service = JWTTokenService(
+        jwt_handler=JWTLibHandler(), settings=Settings()
+    )
+    auth_service = AuthService(
+        Mock(),
+        user_crud=user_crud,
+        db=AsyncMock(spec=AsyncSession),
+        settings=Settings(),
+        token_service=token_service,
+        scope_matcher=matcher,
+    )
+    token = token_service.create_access_token(
+        'usuario', ['users:write'], expires_delta=timedelta(minutes=5)
+    )
+
+    user = await auth_service.get_current_active_user(
+        token, SecurityScopes(['users:view'])
+    )
+
+    assert user.username == 'usuario'
+    with pytest.raises(UnauthorizedException):
+        await auth_service.get_current_active_user(
+            token, SecurityScopes(['users:delete'])
+        )
@@ -0,0 +1,194 @@
+from datetime import timedelta
+from unittest.mock import AsyncMock, Mock
+
+import jwt
+import pytest
+from fastapi import FastAPI
+from fastapi.security import SecurityScopes
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api_presentation.dependencies import get_scope_registry
+from api_presentation.well_known_router import well_known_router
+from application_service.auth_service import AuthService
+from application_service.scope_registry import ScopeRegistry
+from application_service.token_service import JWTLibHandler, JWTTokenService
+from domain_entity.exceptions import UnauthorizedException
+from infra_repository.crud import UserCRUD
+from settings import Settings
+
+SCOPES = {1: 'users:view', 2: 'users:create', 3: 'roles:view', 900: 'x:y'}
+
+
+@pytest.fixture
+def registry():
+    return ScopeRegistry(SCOPES)
+
+
+def testa_pmap_ida_e_volta(registry):
+    granted = registry.granted(registry.encode(['users:view', 'roles:view']))
+
+    assert 'users:view' in granted
+    assert 'roles:view' in granted
+    assert 'users:create' not in granted
+    assert 'desconhecido' not in granted
+
+
+def testa_pmap_escolhe_o_formato_menor(registry):
+    # Ids próximos: bitmap; um id alto e isolado: lista de varints
+    assert registry.encode(['users:view', 'users:create']).startswith('b')
+    assert registry.encode(['x:y']).startswith('v')
+    assert 'x:y' in registry.granted(registry.encode(['x:y']))
+    assert not registry.granted(registry.encode([]))
+
+
+def testa_pmap_malformado(registry):
+    with pytest.raises(ValueError):
+        registry.granted('z' + 'AA')
+    with pytest.raises(ValueError):
+        registry.granted('v' + 'gA')   # varint sem o último byte
+
+
+def testa_versao_muda_com_o_registro(registry):
+    assert registry.version == ScopeRegistry(dict(SCOPES)).version
+    assert registry.version != ScopeRegistry({1: 'users:view'}).version
+    assert registry.etag == f'"{registry.version}"'
+
+
+async def testa_refresh_recarrega_uma_vez_por_versao():
+    registry = ScopeRegistry({1: 'users:view'})
+    user_crud = Mock(
+        get_permission_scopes=AsyncMock(return_value=list(SCOPES.items()))
+    )
+    db = AsyncMock(spec=AsyncSession)
+
+    await registry.refresh(registry.version, user_crud, db)
+    await registry.refresh('outra', user_crud, db)
+    await registry.refresh('outra', user_crud, db)
+
+    user_crud.get_permission_scopes.assert_awaited_once()
+    assert len(registry) == len(SCOPES)
+
+
+def _token_service(registry):
+    return JWTTokenService(
+        jwt_handler=JWTLibHandler(),
+        settings=Settings(),
+        scope_registry=registry,
+    )
+
+
+def testa_token_compacto(registry):
+    service = _token_service(registry)
+
+    token = service.create_access_token(
+        'usuario', ['users:view'], expires_delta=timedelta(minutes=5)
+    )
+    fallback = service.create_access_token(
+        'usuario', ['fora:do_registro'], expires_delta=timedelta(minutes=5)
+    )
+
+    claims = service.decode_token(token)
+    assert 'perms' not in claims
+    assert claims['pver'] == registry.version
+    assert service.decode_token(fallback)['perms'] == 'fora:do_registro'
+
+
+@pytest.fixture
+def auth_service(registry):
+    user_crud = UserCRUD()
+    user_crud.get_principal_by_username = AsyncMock(
+        return_value=Mock(
+            id=1, username='usuario', email='u@t.com', fullname='U'
+        )
+    )
+    return AuthService(
+        Mock(),
+        user_crud=user_crud,
+        db=AsyncMock(spec=AsyncSession),
+        settings=Settings(),
+        token_service=_token_service(registry),
+        scope_registry=registry,
+    )
+
+
+async def testa_current_active_user_com_token_compacto(auth_service):
+    token = auth_service.token_service.create_access_token(
+        'usuario', ['users:view'], expires_delta=timedelta(minutes=5)
+    )
+
+    user = await auth_service.get_current_active_user(
+        token, SecurityScopes(['users:view'])
+    )
+
+    assert user.username == 'usuario'
+    with pytest.raises(UnauthorizedException):
+        await auth_service.get_current_active_user(
+            token, SecurityScopes(['users:create'])
+        )
+
+
+async def testa_current_active_user_versao_nova_recarrega(auth_service):
+    # Token emitido por um worker que já conhece a permission 4
+    newer = ScopeRegistry({**SCOPES, 4: 'roles:create'})
+    token = _token_service(newer).create_access_token(
+        'usuario', ['roles:create'], expires_delta=timedelta(minutes=5)
+    )
+    auth_service.user_crud.get_permission_scopes = AsyncMock(
+        return_value=list({**SCOPES, 4: 'roles:create'}.items())
+    )
+    auth_service.read_db = AsyncMock(spec=AsyncSession)
+
+    await auth_service.get_current_active_user(
+        token, SecurityScopes(['roles:create'])
+    )
+
+    # A réplica pode estar atrasada: recarrega do primário
+    auth_service.user_crud.get_permission_scopes.assert_awaited_once_with(
+        async_transaction=auth_service.db
+    )
+    assert auth_service.scope_registry.version == newer.version
+
+
+async def testa_login_recarrega_registro_sem_o_escopo(auth_service):
+    auth_service.user_crud.get_permission_scopes = AsyncMock(
+        return_value=[(7, 'novo:escopo')]
+    )
+
+    await auth_service._sync_scope_registry(['users:view'])
+    await auth_service._sync_scope_registry(['novo:escopo'])
+
+    auth_service.user_crud.get_permission_scopes.assert_awaited_once()
+    assert 'novo:escopo' in auth_service.scope_registry.id_by_scope
+
+
+def testa_rota_registro_de_escopos(registry):
+    app = FastAPI()
+    app.include_router(well_known_router, prefix='/.well-known')
+    app.dependency_overrides[get_scope_registry] = lambda: registry
+    client = TestClient(app)
+
+    response = client.get('/.well-known/scopes.json')
+
+    document = response.json()
+    assert response.status_code == 200
+    assert document == {
+        'version': registry.version,
+        'scopes': {str(bit): scope for bit, scope in SCOPES.items()},
+    }
+    response = client.get(
+        '/.well-known/scopes.json',
+        headers={'If-None-Match': response.headers['ETag']},
+    )
+    assert response.status_code == 304
+
+    # Um verificador externo decodifica a claim com o registro publicado
+    token = _token_service(registry).create_access_token(
+        'usuario', ['roles:view'], expires_delta=timedelta(minutes=5)
+    )
+    claims = jwt.decode(token, options={'verify_signature': False})
+    published = ScopeRegistry(
+        {int(bit): scope for bit, scope in document['scopes'].items()}
+    )
+    assert published.version == claims['pver']
+    assert 'roles:view' in published.granted(claims['pmap'])
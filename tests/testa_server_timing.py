@@ -0,0 +1,93 @@
+import pytest
+from fastapi import APIRouter
+from pydantic import BaseModel
+
+from api_presentation.server_timing import ServerTimingMiddleware, TimedRoute
+from application_service import phase_timer
+
+
+def testa_phase_sem_timing_nao_faz_nada():
+    with phase_timer.phase('db'):
+        pass
+    phase_timer.record('jwt', 1.0)
+
+    assert phase_timer.current() is None
+
+
+def testa_phase_acumula_duracoes():
+    with phase_timer.timing() as timer:
+        with phase_timer.phase('user_lookup'):
+            pass
+        with phase_timer.phase('user_lookup'):
+            pass
+        phase_timer.record('jwt', 0.002)
+
+    assert set(timer.phases) == {'user_lookup', 'jwt'}
+    assert timer.phases['jwt'] == 0.002
+    assert phase_timer.current() is None
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+@pytest.fixture
+def timed_client(make_client):
+    router = APIRouter(route_class=TimedRoute)
+
+    @router.get('/itens', response_model=list[Item])
+    async def list_items(limit: int = 3):
+        with phase_timer.phase('user_lookup'):
+            return [{'id': n, 'name': f'item {n}'} for n in range(limit)]
+
+    def build(**middleware_options):
+        return make_client(
+            (router, '/api'),
+            middleware=[(ServerTimingMiddleware, middleware_options)],
+        )
+
+    return build
+
+
+def parse_server_timing(value: str) -> dict[str, str]:
+    return {
+        entry.split(';')[0]: entry.split(';', 1)[1]
+        for entry in value.split(', ')
+    }
+
+
+def testa_server_timing_desligado_por_padrao(timed_client):
+    response = timed_client(token='segredo').get('/api/itens')
+
+    assert response.status_code == 200
+    assert 'Server-Timing' not in response.headers
+
+
+@pytest.mark.parametrize('token', ['errado', ''])
+def testa_server_timing_exige_token_correto(timed_client, token):
+    response = timed_client(token='segredo').get(
+        '/api/itens', headers={'X-Server-Timing': token}
+    )
+
+    assert 'Server-Timing' not in response.headers
+
+
+def testa_server_timing_por_requisicao_com_token(timed_client):
+    response = timed_client(token='segredo').get(
+        '/api/itens',
+        params={'limit': 50},
+        headers={'X-Server-Timing': 'segredo'},
+    )
+
+    assert len(response.json()) == 50
+    phases = parse_server_timing(response.headers['Server-Timing'])
+    assert {'user_lookup', 'serialize', 'db', 'total'} <= set(phases)
+    assert phases['db'] == 'dur=0.000;desc="0 queries"'
+    assert phases['serialize'].startswith('dur=')
+
+
+def testa_server_timing_sempre_ligado(timed_client):
+    response = timed_client(always=True).get('/api/itens')
+
+    assert 'total' in parse_server_timing(response.headers['Server-Timing'])
@@ -0,0 +1,71 @@
+import time
+from datetime import timedelta
+from unittest.mock import Mock
+
+import pytest
+
+from application_service.cache import TTLCache
+from application_service.token_service import JWTLibHandler, JWTTokenService
+from domain_entity.exceptions import UnauthorizedException
+from settings import Settings
+
+
+@pytest.fixture
+def token_service():
+    jwt_handler = JWTLibHandler()
+    jwt_handler.decode = Mock(wraps=jwt_handler.decode)
+    return JWTTokenService(
+        jwt_handler=jwt_handler,
+        settings=Settings(),
+        decoded_cache=TTLCache(max_size=100, ttl=300),
+    )
+
+
+def _access_token(service, minutes=5):
+    return service.create_access_token(
+        'usuario', ['users:view'], expires_delta=timedelta(minutes=minutes)
+    )
+
+
+def testa_decode_token_usa_cache(token_service):
+    token = _access_token(token_service)
+
+    first = token_service.decode_token(token)
+    second = token_service.decode_token(token)
+
+    assert first == second
+    assert token_service.jwt_handler.decode.call_count == 1
+    assert token_service.decoded_cache.stats()['hit_ratio'] == 0.5
+
+
+def testa_decode_token_devolve_copia(token_service):
+    token = _access_token(token_service)
+
+    token_service.decode_token(token)['sub'] = 'alterado'
+
+    assert token_service.decode_token(token)['sub'] == 'usuario'
+
+
+def testa_cache_limitado_pelo_exp(token_service):
+    token = _access_token(token_service, minutes=1)
+    token_service.decode_token(token)
+
+    ((expires_at, _),) = token_service.decoded_cache._data.values()
+
+    assert expires_at - time.monotonic() <= 60
+
+
+def testa_token_invalido_nao_entra_no_cache(token_service):
+    with pytest.raises(UnauthorizedException):
+        token_service.decode_token('nao.e.jwt')
+
+    assert len(token_service.decoded_cache) == 0
+
+
+def testa_decode_token_sem_cache():
+    service = JWTTokenService(jwt_handler=JWTLibHandler(), settings=Settings())
+    token = _access_token(service)
+
+    assert service.decode_token(token)['sub'] == 'usuario'
+    with pytest.raises(UnauthorizedException):
+        service.decode_token(token + 'x')
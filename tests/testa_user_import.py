@@ -0,0 +1,218 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import func, select
+
+from api_presentation.dependencies import get_container, get_current_user
+from api_presentation.user_router import user_router
+from application_service.user_import import (
+    UserImporter,
+    iter_lines,
+    parse_csv,
+    parse_ndjson,
+)
+from domain_entity.models import User, UserEffectiveScopes
+from infra_repository.crud import UserCRUD
+
+
+async def chunks_of(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def user_row(n: int, **overrides) -> dict:
+    row = {
+        'username': f'usuario_{n:03d}',
+        'email': f'usuario{n}@teste.com',
+        'fullname': f'Usuário {n}',
+        'pwd_plain': 'senha123',
+        'confirm_pwd_plain': 'senha123',
+    }
+    row.update(overrides)
+    return row
+
+
+async def collect(iterator) -> list:
+    return [item async for item in iterator]
+
+
+async def testa_iter_lines_junta_chunks_partidos():
+    # 'é' em UTF-8 dividido entre dois chunks
+    encoded = 'linha é\nsegunda\r\nfim'.encode()
+    split = encoded.index(b'\xa9')
+
+    lines = await collect(
+        iter_lines(chunks_of(encoded[:split], encoded[split:]))
+    )
+
+    assert lines == ['linha é', 'segunda', 'fim']
+
+
+async def testa_parse_ndjson_numera_linhas_e_marca_json_invalido():
+    rows = await collect(
+        parse_ndjson(chunks_of(b'{"a": 1}\n\n{quebrado\n', b'{"b": 2}\n'))
+    )
+
+    assert rows[0] == (1, {'a': 1})
+    assert rows[1][0] == 3
+    assert isinstance(rows[1][1], ValueError)
+    assert rows[2] == (4, {'b': 2})
+
+
+async def testa_parse_csv_usa_cabecalho():
+    body = (
+        b'username,email,fullname,pwd_plain,confirm_pwd_plain\n'
+        b'usuario_001,u1@teste.com,"Silva, Ana",s,s\n'
+    )
+
+    rows = await collect(parse_csv(chunks_of(body)))
+
+    assert rows == [
+        (
+            2,
+            {
+                'username': 'usuario_001',
+                'email': 'u1@teste.com',
+                'fullname': 'Silva, Ana',
+                'pwd_plain': 's',
+                'confirm_pwd_plain': 's',
+            },
+        )
+    ]
+
+
+@pytest.fixture
+def fake_hasher():
+    hasher = AsyncMock()
+    hasher.hash.side_effect = lambda password: f'hash:{password}'
+    return hasher
+
+
+@pytest.fixture
+def importer(fake_hasher, session_factory):
+    return UserImporter(
+        hasher=fake_hasher,
+        user_crud=UserCRUD(),
+        session_factory=session_factory,
+        batch_size=2,
+    )
+
+
+async def numbered(rows: list):
+    for line, row in enumerate(rows, start=1):
+        yield line, row
+
+
+async def testa_importer_cria_usuarios_em_lotes(
+    importer, session_factory, fake_hasher
+):
+    results = await collect(
+        importer.run(numbered([user_row(n) for n in range(5)]))
+    )
+
+    assert [r['status'] for r in results] == ['created'] * 5
+    assert [r['line'] for r in results] == [1, 2, 3, 4, 5]
+    assert len({r['id'] for r in results}) == 5
+    assert fake_hasher.hash.await_count == 5
+    async with session_factory() as session:
+        assert await session.scalar(select(func.count(User.id))) == 5
+        # Linha de escopos vazia já materializada
+        scopes_rows = await session.scalar(
+            select(func.count(UserEffectiveScopes.user_id))
+        )
+        assert scopes_rows == 5
+        stored = await session.scalar(
+            select(User.password).where(User.username == 'usuario_000')
+        )
+    assert stored == 'hash:senha123'
+
+
+async def testa_importer_detecta_duplicados(importer, session_factory):
+    await collect(importer.run(numbered([user_row(1)])))
+
+    results = await collect(
+        importer.run(
+            numbered(
+                [
+                    user_row(1),
+                    user_row(2),
+                    user_row(3, email='usuario2@teste.com'),
+                ]
+            )
+        )
+    )
+
+    assert [r['status'] for r in results] == [
+        'duplicate',
+        'created',
+        'duplicate',
+    ]
+    async with session_factory() as session:
+        assert await session.scalar(select(func.count(User.id))) == 2
+
+
+async def testa_importer_rejeita_linhas_invalidas(importer, fake_hasher):
+    results = await collect(
+        importer.run(
+            numbered(
+                [
+                    user_row(1, email='sem-arroba'),
+                    user_row(2, confirm_pwd_plain='outra'),
+                    ValueError('linha quebrada'),
+                ]
+            )
+        )
+    )
+
+    assert [r['status'] for r in results] == ['invalid'] * 3
+    assert 'email' in results[0]['error']
+    assert results[1]['error'] == 'As senhas não conferem.'
+    assert results[2]['error'].startswith('JSON inválido')
+    fake_hasher.hash.assert_not_called()
+
+
+@pytest.fixture
+def import_client(importer, make_client):
+    container = SimpleNamespace(user_importer=importer)
+    return make_client(
+        (user_router, '/users'),
+        overrides={
+            get_current_user: lambda: {'id': 1},
+            get_container: lambda: container,
+        },
+    )
+
+
+def testa_rota_import_ndjson(import_client):
+    body = '\n'.join(json.dumps(user_row(n)) for n in range(3))
+
+    response = import_client.post(
+        '/users/import',
+        content=body,
+        headers={'Content-Type': 'application/x-ndjson'},
+    )
+
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r['status'] for r in results] == ['created'] * 3
+
+
+def testa_rota_import_csv(import_client):
+    body = (
+        'username,email,fullname,pwd_plain,confirm_pwd_plain\n'
+        'usuario_001,u1@teste.com,Ana,senha,senha\n'
+        'usuario_002,u2@teste.com,Bia,senha,outra\n'
+    )
+
+    response = import_client.post(
+        '/users/import', content=body, headers={'Content-Type': 'text/csv'}
+    )
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [(r['line'], r['status']) for r in results] == [
+        (2, 'created'),
+        (3, 'invalid'),
+    ]
@@ -0,0 +1,171 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, create_autospec
+
+import pytest
+
+from api_presentation.dependencies import (
+    get_auth_service,
+    get_container,
+    get_current_user,
+)
+from api_presentation.user_router import user_router
+from application_service.auth_service import AuthService, AuthServiceProtocol
+from domain_entity.exceptions import AppException
+from domain_entity.models import User
+from domain_entity.schemas import UserFromDBDTO
+from infra_repository.crud import UserCRUD
+from main import app_exception_handler
+from settings import Settings
+
+
+def make_users(ids) -> list[UserFromDBDTO]:
+    return [
+        UserFromDBDTO(
+            id=n, username=f'user_{n}', email=f'u{n}@t.com', fullname='U'
+        )
+        for n in ids
+    ]
+
+
+@pytest.fixture
+def mock_auth_service():
+    service = create_autospec(AuthServiceProtocol)
+    service.get_users = AsyncMock()
+    return service
+
+
+@pytest.fixture
+async def cinco_usuarios(session_factory):
+    async with session_factory() as session, session.begin():
+        session.add_all(
+            User(
+                username=f'user_{n}',
+                email=f'u{n}@t.com',
+                fullname='U',
+                password='hash',
+                active=True,
+            )
+            for n in range(1, 6)
+        )
+    return session_factory
+
+
+@pytest.fixture
+def client(mock_auth_service, cinco_usuarios, make_client):
+    settings = Settings().model_copy(
+        update={'USERS_PAGE_SIZE': 2, 'USERS_MAX_PAGE_SIZE': 3}
+    )
+    container = SimpleNamespace(
+        settings=settings,
+        rate_limits={'USER': SimpleNamespace(check=AsyncMock())},
+        db_handler=SimpleNamespace(
+            read_session_factory=lambda: cinco_usuarios
+        ),
+        auth_service=lambda db: AuthService(
+            hasher=Mock(),
+            user_crud=UserCRUD(),
+            db=db,
+            settings=settings,
+            token_service=Mock(),
+        ),
+    )
+    return make_client(
+        (user_router, '/users'),
+        overrides={
+            get_auth_service: lambda: mock_auth_service,
+            get_current_user: lambda: {'id': 1},
+            get_container: lambda: container,
+        },
+    )
+
+
+def testa_get_users_pagina_com_cursor(client, mock_auth_service):
+    mock_auth_service.get_users.return_value = make_users([4, 5])
+
+    response = client.get('/users/get_users', params={'after_id': 3})
+
+    assert response.status_code == 200
+    assert [u['id'] for u in response.json()] == [4, 5]
+    assert response.headers['X-Next-Cursor'] == '5'
+    mock_auth_service.get_users.assert_awaited_once_with(after_id=3, limit=2)
+
+
+def testa_get_users_ultima_pagina_sem_cursor(client, mock_auth_service):
+    mock_auth_service.get_users.return_value = make_users([5])
+
+    response = client.get('/users/get_users', params={'after_id': 4})
+
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def testa_get_users_limita_tamanho_da_pagina(client, mock_auth_service):
+    mock_auth_service.get_users.return_value = []
+
+    client.get('/users/get_users', params={'limit': 50})
+
+    mock_auth_service.get_users.assert_awaited_once_with(
+        after_id=None, limit=3
+    )
+
+
+def testa_get_users_stream_ndjson(client, mock_auth_service):
+    response = client.get(
+        '/users/get_users', params={'stream': 'true', 'after_id': 1}
+    )
+
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    users = [json.loads(line) for line in response.text.splitlines()]
+    assert [u['id'] for u in users] == [2, 3, 4, 5]
+    assert set(users[0]) == {'id', 'username', 'email', 'fullname'}
+    mock_auth_service.get_users.assert_not_called()
+
+
+@pytest.fixture
+def signup_client(client, cinco_usuarios):
+    async def auth_service_override():
+        async with cinco_usuarios() as session:
+            yield AuthService(
+                hasher=Mock(hash=AsyncMock(return_value='hash')),
+                user_crud=UserCRUD(),
+                db=session,
+                settings=Settings(),
+                token_service=Mock(),
+            )
+            await session.commit()
+
+    client.app.dependency_overrides[get_auth_service] = auth_service_override
+    client.app.add_exception_handler(AppException, app_exception_handler)
+    return client
+
+
+def testa_create_user_username_duplicado(signup_client):
+    user = {
+        'username': 'novo_usuario',
+        'email': 'novo@t.com',
+        'fullname': 'Novo',
+        'pwd_plain': 'segredo',
+        'confirm_pwd_plain': 'segredo',
+    }
+
+    created = signup_client.post('/users/create-user', json=user)
+    duplicated = signup_client.post(
+        '/users/create-user', json={**user, 'email': 'outro@t.com'}
+    )
+
+    assert created.status_code == 200
+    assert duplicated.status_code == 409
+    assert duplicated.json()['code'] == 'AUTH_USER_DUPLICATE'
+
+
+def testa_rate_limit_so_no_cadastro(client, mock_auth_service):
+    container = client.app.dependency_overrides[get_container]()
+    limiter = container.rate_limits['USER']
+    mock_auth_service.get_users.return_value = []
+
+    client.get('/users/get_users')
+    limiter.check.assert_not_awaited()
+
+    client.post('/users/create-user', json={})
+    limiter.check.assert_awaited_once()